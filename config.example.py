@@ -18,3 +18,124 @@ MODEL_ID = 'us.anthropic.claude-3-5-sonnet-20240620-v1:0'
 # 또는 다른 모델 사용 가능:
 # MODEL_ID = 'anthropic.claude-3-5-sonnet-20240620-v1:0'
 # MODEL_ID = 'anthropic.claude-3-haiku-20240307-v1:0'
+
+# Bedrock 클라이언트 설정 (선택, 미설정 시 기본값 사용)
+BEDROCK_MAX_POOL_CONNECTIONS = 50   # HTTP 커넥션 풀 크기
+BEDROCK_MAX_ATTEMPTS = 8            # adaptive retry 최대 시도 횟수
+BEDROCK_CONNECT_TIMEOUT = 5         # 초
+BEDROCK_READ_TIMEOUT = 120          # 초
+BEDROCK_REQUESTS_PER_MINUTE = 0     # 계정 RPM 쿼터에 맞춘 클라이언트 측 제한 (0: 제한 없음)
+BEDROCK_BURST = 5                   # 토큰 버킷 최대 버스트
+BEDROCK_MAX_CONCURRENCY = 0         # 프로세스당 동시 모델 호출 수 (0: 제한 없음)
+
+# 모델 라우팅 (선택)
+# 'off': 항상 MODEL_ID 사용, 'rules': 키워드 규칙 분류, 'model': FAST_MODEL_ID로 분류
+MODEL_ROUTING = 'rules'
+FAST_MODEL_ID = 'anthropic.claude-3-haiku-20240307-v1:0'  # 단순 조회/집계용
+
+# Streamlit 대화 기록 (선택)
+SESSION_MAX_MESSAGES = 40               # 메모리에 유지할 최근 메시지 수
+SESSION_MAX_BYTES = 2 * 1024 * 1024     # 메모리에 유지할 메시지 추정 크기 상한
+SESSION_SPILL_DIR = None                # 오래된 메시지 저장 위치 (None: 시스템 임시 디렉터리)
+
+# 데이터베이스 연결 풀 및 읽기 복제본 (선택)
+# 복제본은 DB_CONFIG와 다른 항목만 지정하면 됩니다
+DB_REPLICAS = [
+    # {'host': 'your-replica-1.rds.amazonaws.com'},
+    # {'host': 'your-replica-2.rds.amazonaws.com'},
+]
+DB_ROUTING_STRATEGY = 'least_outstanding'   # 또는 'round_robin'
+DB_MAX_REPLICATION_LAG = 30                 # 초, 초과 시 해당 복제본 제외
+DB_POOL_MIN = 1                             # 엔드포인트별 최소 연결 수
+DB_POOL_MAX = 10                            # 엔드포인트별 최대 연결 수
+
+# 데이터베이스 승인 제어 (선택)
+DB_MAX_CONCURRENT_QUERIES = 10      # 프로세스 전체 동시 쿼리 수
+DB_MAX_QUERIES_PER_SESSION = 2      # 세션(대화)별 동시 쿼리 수
+DB_QUEUE_TIMEOUT = 15               # 초, 대기 시간 초과 시 요청 거절
+
+# EXPLAIN 비용 게이트 (선택)
+COST_GATE_ENABLED = True            # Agent 쿼리 실행 전 EXPLAIN으로 비용 확인
+COST_GATE_MAX_COST = 500000         # 플래너 예상 비용 한도
+COST_GATE_MAX_ROWS = 100000         # 예상 결과 행 수 한도
+COST_GATE_ACTION = 'limit'          # 'limit': LIMIT을 붙여 실행, 'reject': 거절
+COST_GATE_LIMIT_ROWS = 1000         # 'limit' 시 조회할 최대 행 수
+
+# 쿼리 워크로드 기록 (선택, scripts/index_advisor.py 입력)
+WORKLOAD_LOG_ENABLED = True
+# WORKLOAD_LOG_PATH = 'logs/workload.jsonl'
+# WORKLOAD_LOG_SAMPLES = False      # 형태별 원본 SQL 예시도 기록 (사용자 UUID, 이름 등 리터럴이 남음)
+
+# 도구 결과 JSON 직렬화 (선택)
+RESULT_JSON_BACKEND = 'auto'        # 'auto': orjson이 설치되어 있으면 사용, 'json': 표준 라이브러리
+
+# 로컬 분석 저장소 (선택, scripts/sync_analytics.py로 동기화)
+# 집계 전용 쿼리를 운영 DB 대신 SQLite 복제본에서 실행
+ANALYTICS_ENABLED = False
+# ANALYTICS_DB_PATH = 'data/analytics.sqlite'
+ANALYTICS_MAX_STALENESS = 3600      # 초, 마지막 동기화가 이보다 오래되면 운영 DB 사용
+
+# 혈당 예측 도구 (선택)
+FORECAST_TIMEZONE = 'Asia/Seoul'    # 시간대별 프로필과 예측 시각 기준
+FORECAST_MAX_HORIZON_HOURS = 72     # 최대 예측 기간
+
+# 전체 사용자 혈당 이상 스캔 (선택, scripts/scan_population.py)
+GLUCOSE_LOW = 70                    # 저혈당 기준 (미만)
+GLUCOSE_HIGH = 140                  # 고혈당 기준 (초과)
+SCAN_WINDOW_DAYS = 14               # 최근 며칠간의 측정값을 분석
+SCAN_WORKERS = 4                    # 프로세스 수
+SCAN_CHUNK_USERS = 200              # 작업당 사용자 수
+SCAN_SUMMARY_TABLE = 'agent.tb_glucose_scan_summary'   # 결과 테이블 (쓰기 권한 필요)
+
+# HTTP API 서버 (선택, python src/api_server.py)
+API_HOST = '127.0.0.1'              # 인증이 없으므로 외부에 열 때(0.0.0.0)는 인증 프록시 뒤에 둘 것
+API_PORT = 8000
+API_WORKERS = 1                     # 워커 프로세스 수 (2 이상이면 sticky session 필요)
+API_MAX_SESSIONS = 1000             # 워커당 최대 세션 수
+API_SESSION_TTL = 1800              # 초, 이 시간 동안 사용하지 않은 세션은 정리
+API_MAX_CONCURRENT_CHATS = 32       # 워커당 동시에 처리할 대화 수
+API_QUEUE_TIMEOUT = 10              # 초, 대화 슬롯 대기 한도 (초과 시 429)
+API_MAX_MESSAGE_CHARS = 4000        # 질문 최대 길이
+API_MAX_ROWS = 10000                # /sql 응답 최대 행 수
+
+# Agent 대화 저장소 (선택, CLI --session / API 서버 / 웹 UI 새로고침 시 대화 이어가기)
+CONVERSATION_STORE = 'none'         # 'none', 'file': 세션별 파일, 'sqlite': SQLite 파일 (여러 워커가 공유 가능)
+# CONVERSATION_STORE_PATH = 'data/conversations.sqlite'   # 'file'이면 디렉터리 경로
+CONVERSATION_TTL = 604800           # 초, 이 시간 동안 갱신되지 않은 대화는 삭제 (0: 유지)
+
+# 대화 내 도구 호출 기록 (같은 쿼리 재실행 방지)
+TOOL_MEMO_ENABLED = True
+TOOL_MEMO_TTL = 300                 # 초, 이 시간이 지난 조회 결과는 다시 실행
+TOOL_MEMO_MAX_ENTRIES = 64          # 대화 하나에 보관할 최대 조회 결과 수 (오래 쓰지 않은 것부터 삭제)
+TOOL_MAX_REPEATED_FAILURES = 3      # 한 턴에서 같은 형태의 쿼리가 이 횟수만큼 실패하면 중단
+
+# 실패한 쿼리 자동 수정 (JSON 연산자, agent 스키마 누락, msrmt_ymd 날짜 비교를 고쳐 한 번 재실행)
+SQL_REPAIR_ENABLED = True
+
+# 사용자 이름 -> user_uuid 검색 인덱스 (Agent의 find_user 도구)
+USER_DIRECTORY_ENABLED = True       # False면 find_user가 tb_user_info를 직접 조회
+USER_DIRECTORY_REFRESH = 60         # 초, reg_dt 기준 신규 사용자 증분 갱신 주기
+USER_DIRECTORY_FULL_REFRESH = 3600  # 초, 전체 다시 읽기 주기 (이름 변경/삭제 반영)
+
+# 시작 전 점검 (scripts/check_aws_credentials.py, scripts/test_all.py, 웹 UI 시작 준비)
+PREFLIGHT_TIMEOUT = 5               # 초, 점검별 제한 시간 (Bedrock 호출은 최소 15초)
+PREFLIGHT_CACHE_TTL = 300           # 초, 이 시간 안에 성공한 점검은 다시 실행하지 않음 (--no-cache로 무시)
+# PREFLIGHT_CACHE_PATH = '/tmp/health_agent_preflight.json'
+
+# 운영 메트릭 (Prometheus 텍스트 형식, 웹 UI 사이드바 '📈 메트릭', API 서버 /metrics)
+METRICS_ENABLED = True
+METRICS_PORT = 0                    # 0이 아니면 웹 UI 프로세스에서 http://METRICS_HOST:METRICS_PORT/metrics 제공
+METRICS_HOST = '127.0.0.1'
+
+# 토큰/비용 예산 (0: 제한 없음, 사용량은 logs/usage.jsonl에 기록 -> scripts/usage_report.py)
+TURN_TOKEN_BUDGET = 100000          # 한 질문에서 모델 재호출을 포함한 최대 토큰 (넘으면 조회 중단)
+TOOL_OUTPUT_MAX_TOKENS = 8000       # 도구 결과 한 건의 최대 토큰 (턴 예산이 줄면 더 작게 자름)
+SESSION_TOKEN_BUDGET = 0            # 대화(세션)당 누적 토큰 한도 (넘으면 모델을 호출하지 않음)
+SESSION_COST_BUDGET = 0             # 대화(세션)당 누적 예상 비용 한도 (USD)
+USAGE_LOG_ENABLED = True
+# USAGE_LOG_PATH = 'logs/usage.jsonl'
+# 모델 ID -> (입력, 출력) 100만 토큰당 USD (리전 접두어 us. 등 제외, 기본값: 공개 온디맨드 가격 추정치)
+# MODEL_PRICES = {
+#     'anthropic.claude-3-5-sonnet-20240620-v1:0': (3.0, 15.0),
+#     'anthropic.claude-3-haiku-20240307-v1:0': (0.25, 1.25),
+# }
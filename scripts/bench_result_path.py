@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+결과 변환 경로 벤치마크 - 행 딕셔너리 vs 컬럼 배열 vs COPY
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pandas as pd
+
+
+def measure(label, func):
+    """실행 시간과 최대 메모리 사용량 측정"""
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    df = func()
+    elapsed = time.perf_counter() - start_time
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<28} {elapsed * 1000:>10.1f} ms   peak {peak / 1024 / 1024:>8.1f} MB   rows {len(df)}")
+    return elapsed
+
+
+def synthetic_rows(n):
+    """tb_sensor_log 형태의 가짜 커서 결과 생성"""
+    base = datetime(2025, 12, 1)
+    columns = ['user_uuid', 'sn_nm', 'msrmt_dt', 'analog_glucose', 'rcd_indx_no', 'reg_dt']
+    rows = [
+        ('b1c7ac6c33769a2f0c8bf0fbb08ecfb8', 'SN0001', base + timedelta(minutes=i),
+         Decimal(100 + i % 80), str(i), base)
+        for i in range(n)
+    ]
+    return columns, rows
+
+
+def bench_synthetic(n):
+    """DB 없이 변환 비용만 비교"""
+    columns, rows = synthetic_rows(n)
+    print(f"\n[synthetic] {n:,} rows")
+
+    def dict_path():
+        # 기존 경로: RealDictRow -> dict -> DataFrame
+        records = [dict(zip(columns, row)) for row in rows]
+        data = [dict(row) for row in records]
+        return pd.DataFrame(data)
+
+    def columnar_path():
+        values = list(zip(*rows))
+        return pd.DataFrame({name: list(col) for name, col in zip(columns, values)}, columns=columns)
+
+    measure("dict rows", dict_path)
+    measure("columnar", columnar_path)
+
+
+def bench_database(sql_query, repeat):
+    """실제 DB에서 세 경로 비교"""
+    from src.text_to_sql_tool import TextToSQLTool
+
+    tool = TextToSQLTool()
+    print(f"\n[database] {sql_query}")
+
+    def dict_path():
+        result = tool.execute_sql(sql_query)
+        return pd.DataFrame(result['data'])
+
+    def cursor_path():
+        return tool.fetch_dataframe(sql_query, method='cursor')['dataframe']
+
+    def copy_path():
+        return tool.fetch_dataframe(sql_query, method='copy')['dataframe']
+
+    for _ in range(repeat):
+        measure("dict rows (execute_sql)", dict_path)
+        measure("columnar (cursor)", cursor_path)
+        measure("columnar (COPY)", copy_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='결과 변환 경로 벤치마크')
+    parser.add_argument('--synthetic', type=int, default=0, help='DB 없이 N행 가짜 데이터로 측정')
+    parser.add_argument('--query', default='SELECT * FROM agent.tb_sensor_log LIMIT 200000',
+                        help='DB 측정에 사용할 쿼리')
+    parser.add_argument('--repeat', type=int, default=3, help='반복 횟수')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        bench_synthetic(args.synthetic)
+    else:
+        bench_database(args.query, args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+결과 행 표현 벤치마크 - 행 딕셔너리(RealDictCursor 방식) vs 튜플 ResultSet
+"""
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.result_rows import ResultSet
+
+COLUMNS = ['user_uuid', 'sn_nm', 'msrmt_dt', 'analog_glucose', 'rcd_indx_no', 'reg_dt']
+
+
+def synthetic_rows(n):
+    """tb_sensor_log 형태의 가짜 커서 결과 (튜플) 생성"""
+    base = datetime(2025, 12, 1)
+    glucose = [Decimal(v) for v in range(100, 180)]
+    return [
+        ('b1c7ac6c33769a2f0c8bf0fbb08ecfb8', 'SN0001', base + timedelta(minutes=i),
+         glucose[i % 80], i, base)
+        for i in range(n)
+    ]
+
+
+def measure(label, build, consume, n):
+    """생성 시간, 결과가 유지하는 추가 메모리, 전체 순회 시간 측정"""
+    gc.collect()
+    start_time = time.perf_counter()
+    result = build()
+    build_time = time.perf_counter() - start_time
+
+    # 메모리는 별도로 다시 만들어 측정 (tracemalloc이 시간 측정에 영향을 주지 않도록)
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start_time = time.perf_counter()
+    total = consume(result)
+    scan_time = time.perf_counter() - start_time
+    print(f"  {label:<30} build {build_time * 1000:>8.0f} ms ({n / build_time:>11,.0f} rows/s)   "
+          f"scan {scan_time * 1000:>7.0f} ms   +{retained / 1024 / 1024:>7.1f} MB "
+          f"({retained / max(1, n):>5.0f} B/row)   check {total}")
+
+
+def bench_synthetic(n):
+    """DB 없이 행 표현 비용만 비교 (커서 튜플은 양쪽 공통이므로 미리 생성)"""
+    tracemalloc.start()
+    rows = synthetic_rows(n)
+    tuple_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # RealDictCursor는 튜플 대신 행 dict를 만들므로 dict 경로와 비교할 때는 이 값을 더해야 함
+    print(f"\n[synthetic] {n:,} rows · 커서 튜플(값 포함) {tuple_bytes / 1024 / 1024:.1f} MB "
+          f"({tuple_bytes / max(1, n):.0f} B/row)")
+
+    def dict_path():
+        # 기존 경로: RealDictRow(행마다 dict) -> dict 복사
+        real_dict_rows = [dict(zip(COLUMNS, row)) for row in rows]
+        return [dict(row) for row in real_dict_rows]
+
+    def records_path():
+        # records 형식: 커서 튜플에서 dict 한 번만 생성
+        return ResultSet(COLUMNS, rows).to_records()
+
+    def rows_path():
+        # rows 형식: 커서 튜플 목록을 그대로 공유
+        return ResultSet(COLUMNS, list(rows))
+
+    measure("dict rows (RealDictCursor)", dict_path,
+            lambda data: sum(row['rcd_indx_no'] for row in data), n)
+    measure("records (tuple cursor)", records_path,
+            lambda data: sum(row['rcd_indx_no'] for row in data), n)
+    measure("ResultSet (index)", rows_path,
+            lambda data: sum(row[4] for row in data.rows), n)
+    measure("ResultSet (namedtuple)", rows_path,
+            lambda data: sum(row.rcd_indx_no for row in data), n)
+
+
+def bench_database(sql_query, repeat):
+    """실제 DB에서 records 형식과 rows 형식 비교"""
+    from src.text_to_sql_tool import TextToSQLTool
+
+    tool = TextToSQLTool()
+    print(f"\n[database] {sql_query}")
+    for _ in range(repeat):
+        for result_format in ('records', 'rows'):
+            gc.collect()
+            tracemalloc.start()
+            start_time = time.perf_counter()
+            result = tool.execute_sql(sql_query, result_format=result_format, cost_gate=False)
+            elapsed = time.perf_counter() - start_time
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            if not result["success"]:
+                print(f"  오류: {result['error']}")
+                return
+            print(f"  {result_format:<10} {elapsed * 1000:>10.1f} ms   peak {peak / 1024 / 1024:>8.1f} MB   "
+                  f"rows {result['row_count']:,}")
+            del result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='결과 행 표현 벤치마크')
+    parser.add_argument('--synthetic', type=int, default=0, help='DB 없이 N행 가짜 데이터로 측정')
+    parser.add_argument('--query', default='SELECT * FROM agent.tb_sensor_log LIMIT 1000000',
+                        help='DB 측정에 사용할 쿼리')
+    parser.add_argument('--repeat', type=int, default=2, help='반복 횟수')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        bench_synthetic(args.synthetic)
+    else:
+        bench_database(args.query, args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+도구 결과 JSON 직렬화 벤치마크 - json.dumps(default=str, indent=2) vs result_serializer
+"""
+import argparse
+import copy
+import json
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import result_serializer
+from src.result_serializer import serialize_result
+
+
+def synthetic_rows(n):
+    """timestamp, timestamptz, date, numeric, bytea 컬럼을 포함한 가짜 결과 행 생성"""
+    base = datetime(2025, 12, 1, 9, 0, 0)
+    kst = timezone(timedelta(hours=9))
+    return [
+        {
+            'user_uuid': 'b1c7ac6c33769a2f0c8bf0fbb08ecfb8',
+            'sn_nm': 'SN0001',
+            'msrmt_ymd': date(2025, 12, 1) + timedelta(days=i % 30),
+            'msrmt_dt': base + timedelta(minutes=i),
+            'reg_dt': (base + timedelta(minutes=i)).replace(tzinfo=kst),
+            'analog_glucose': Decimal(100 + i % 80),
+            'avg_glucose': Decimal('123.4567890123456789'),
+            'rd_cn': b'\x01\x02\x03\x04',
+            'rcd_indx_no': i,
+            'note': None if i % 3 else '식후'
+        }
+        for i in range(n)
+    ]
+
+
+def baseline(payload):
+    # 기존 경로
+    return json.dumps(payload, ensure_ascii=False, default=str, indent=2)
+
+
+def measure(label, func, rows, repeat):
+    """매 반복마다 새 행 복사본으로 측정 (serialize_result는 제자리 변환)"""
+    timings = []
+    output = ""
+    for _ in range(repeat):
+        payload = {"success": True, "row_count": len(rows), "data": copy.deepcopy(rows)}
+        start_time = time.perf_counter()
+        output = func(payload)
+        timings.append(time.perf_counter() - start_time)
+    best = min(timings)
+    print(f"  {label:<34} {best * 1000:>9.1f} ms   {len(rows) / best:>12,.0f} rows/s   "
+          f"{len(output.encode('utf-8')) / 1024:>8.1f} KB")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='도구 결과 JSON 직렬화 벤치마크')
+    parser.add_argument('--rows', type=int, default=10000, help='결과 행 수')
+    parser.add_argument('--repeat', type=int, default=5, help='반복 횟수 (최솟값 사용)')
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows)
+    print(f"\n[serializer] {args.rows:,} rows · orjson "
+          f"{'사용 가능' if result_serializer.orjson is not None else '없음'}")
+
+    base = measure("json.dumps(default=str, indent=2)", baseline, rows, args.repeat)
+    fast = measure("serialize_result (json)",
+                   lambda p: serialize_result(p, backend='json'), rows, args.repeat)
+    print(f"  {'':<34} x{base / fast:.1f}")
+    if result_serializer.orjson is not None:
+        fast = measure("serialize_result (orjson)",
+                       lambda p: serialize_result(p, backend='orjson'), rows, args.repeat)
+        print(f"  {'':<34} x{base / fast:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
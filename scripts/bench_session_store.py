@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+대화 기록 저장소 벤치마크 - 세션 길이에 따른 렌더링 비용 비교
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.session_store import MessageStore
+
+
+def render(messages):
+    """app.py의 대화 기록 HTML 생성과 같은 비용의 작업"""
+    html = []
+    for message in messages:
+        html.append(
+            f'<div class="chat-message"><strong>{message["role"]}</strong> '
+            f'<small>({message["timestamp"].strftime("%H:%M:%S")})</small><br>{message["content"]}</div>'
+        )
+    return "".join(html)
+
+
+def make_message(i):
+    data = [{"msrmt_ymd": "20251201", "glucose_value": 100 + j} for j in range(50)]
+    return {
+        "role": "agent" if i % 2 else "user",
+        "content": f"User_1의 혈당 분석 결과입니다. " * 40,
+        "timestamp": datetime.now(),
+        "data": data if i % 2 else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='대화 기록 저장소 벤치마크')
+    parser.add_argument('--messages', type=int, default=5000, help='최대 메시지 수')
+    parser.add_argument('--page-size', type=int, default=20, help='렌더링할 메시지 수')
+    args = parser.parse_args()
+
+    store = MessageStore()
+    plain = []
+    checkpoints = {100, 500, 1000, 2000, 5000, 10000, 20000, args.messages}
+
+    print(f"{'messages':>10} {'list render':>14} {'store render':>14}")
+    try:
+        for i in range(1, args.messages + 1):
+            message = make_message(i)
+            plain.append(message)
+            store.append(dict(message))
+            if i in checkpoints:
+                start_time = time.perf_counter()
+                render(plain)
+                list_ms = (time.perf_counter() - start_time) * 1000
+
+                start_time = time.perf_counter()
+                render(store.tail(args.page_size))
+                store_ms = (time.perf_counter() - start_time) * 1000
+                print(f"{i:>10,} {list_ms:>11.2f} ms {store_ms:>11.2f} ms")
+    finally:
+        store.clear()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
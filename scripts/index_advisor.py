@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+워크로드 로그 분석 및 인덱스 추천
+logs/workload.jsonl을 쿼리 형태별로 집계하고, WHERE/ORDER BY 패턴에서 인덱스 후보를 만듭니다.
+--explain을 주면 HypoPG 가상 인덱스로 계획 비용 변화를 비교하여 예상 효과를 계산합니다.
+"""
+import argparse
+import itertools
+import json
+import re
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.metrics import percentile
+from src.workload_log import WORKLOAD_LOG_PATH
+
+# 테이블별 컬럼과 기본 키 (text_to_sql_tool 스키마 설명과 동일)
+TABLE_COLUMNS = {
+    'tb_user_info': ['user_uuid', 'eml_addr', 'flnm', 'gndr_cd', 'brdt', 'ntn_cd', 'ntn_no',
+                     'mbl_telno', 'user_type_cd', 'join_dt', 'use_yn', 'reg_dt'],
+    'tb_glucose_msrmt': ['user_uuid', 'sn_nm', 'msrmt_ymd', 'bs_rslt_cn', 'rd_cn', 'reg_dt'],
+    'tb_sensor_log': ['user_uuid', 'sn_nm', 'msrmt_dt', 'analog_glucose', 'rcd_indx_no', 'reg_dt'],
+}
+PRIMARY_KEYS = {
+    'tb_user_info': ('user_uuid',),
+    'tb_glucose_msrmt': ('user_uuid', 'sn_nm', 'msrmt_ymd'),
+    'tb_sensor_log': ('user_uuid', 'sn_nm', 'msrmt_dt'),
+}
+
+SQL_KEYWORDS = {
+    'where', 'join', 'left', 'right', 'inner', 'outer', 'full', 'cross', 'on', 'group',
+    'order', 'limit', 'union', 'having', 'offset', 'using', 'natural', 'window'
+}
+TABLE_REF = re.compile(r'\b(?:from|join)\s+(?:agent\.)?(tb_\w+)(?:\s+(?:as\s+)?(\w+))?')
+PREDICATE = re.compile(
+    r'(?:(\w+)\.)?(\w+)\s*(=|>=|<=|<>|>|<|\bbetween\b|\bnot\s+like\b|\blike\b|\bilike\b|\bin\b)'
+)
+ORDER_BY = re.compile(r'\border\s+by\s+(?:(\w+)\.)?(\w+)')
+
+
+def load_workload(path):
+    """로그를 형태 ID별로 집계"""
+    shapes = defaultdict(lambda: {
+        "count": 0, "errors": 0, "total_ms": 0.0, "latencies": [], "rows": 0,
+        "shape": None, "sample": None, "wildcard": [], "cost": None, "scans": []
+    })
+    for log_path in [Path(str(path) + '.1'), Path(path)]:
+        if not log_path.exists():
+            continue
+        with open(log_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                item = shapes[entry["id"]]
+                item["count"] += 1
+                item["errors"] += 0 if entry.get("ok") else 1
+                item["total_ms"] += entry.get("ms", 0)
+                item["latencies"].append(entry.get("ms", 0))
+                item["rows"] += entry.get("rows", 0)
+                if entry.get("shape"):
+                    item["shape"] = entry["shape"]
+                    item["wildcard"] = entry.get("wildcard", [])
+                    item["sample"] = entry.get("sample") or item["sample"]
+                if "cost" in entry:
+                    item["cost"] = entry["cost"]
+                    item["scans"] = entry.get("scans", [])
+    return {k: v for k, v in shapes.items() if v["shape"]}
+
+
+def resolve_table(qualifier, column, aliases, tables):
+    """컬럼이 속한 테이블 추정"""
+    if qualifier:
+        table = aliases.get(qualifier, qualifier)
+        return table if column in TABLE_COLUMNS.get(table, []) else None
+    for table in tables:
+        if column in TABLE_COLUMNS.get(table, []):
+            return table
+    return None
+
+
+def index_candidates(shape, wildcard_columns):
+    """
+    쿼리 형태에서 인덱스 후보 추출
+
+    Args:
+        shape: 정규화된 쿼리 형태
+        wildcard_columns: 앞쪽 와일드카드('%...')로 LIKE 비교하는 컬럼 (워크로드 로그의 wildcard)
+
+    Returns:
+        [(table, columns, method)] - method는 'btree' 또는 'gin_trgm'
+    """
+    aliases = {}
+    tables = []
+    for table, alias in TABLE_REF.findall(shape):
+        if table not in TABLE_COLUMNS:
+            continue
+        tables.append(table)
+        if alias and alias not in SQL_KEYWORDS:
+            aliases[alias] = table
+
+    equality = defaultdict(list)
+    ranges = defaultdict(list)
+    candidates = []
+
+    for qualifier, column, operator in PREDICATE.findall(shape):
+        table = resolve_table(qualifier, column, aliases, tables)
+        if not table:
+            continue
+        operator = operator.strip()
+        if operator in ('=', 'in'):
+            if column not in equality[table]:
+                equality[table].append(column)
+        elif operator in ('>', '<', '>=', '<=', 'between'):
+            if column not in ranges[table]:
+                ranges[table].append(column)
+        elif operator in ('like', 'ilike'):
+            # 앞쪽 와일드카드는 B-tree로 처리할 수 없으므로 trigram 인덱스 후보
+            if column in wildcard_columns:
+                candidates.append((table, (column,), 'gin_trgm'))
+            elif column not in ranges[table]:
+                ranges[table].append(column)
+
+    for qualifier, column in ORDER_BY.findall(shape):
+        table = resolve_table(qualifier, column, aliases, tables)
+        if table and column not in ranges[table] and column not in equality[table]:
+            ranges[table].append(column)
+
+    for table in set(equality) | set(ranges):
+        columns = tuple(equality[table] + ranges[table][:1])
+        if columns:
+            candidates.append((table, columns, 'btree'))
+    return candidates
+
+
+def is_covered(table, columns, method, existing):
+    """기본 키나 기존 인덱스의 앞부분으로 이미 처리되는지 확인"""
+    if method != 'btree':
+        return (table, columns, method) in existing
+    prefixes = [PRIMARY_KEYS.get(table, ())] + [
+        cols for (t, cols, m) in existing if t == table and m == 'btree'
+    ]
+    return any(prefix[:len(columns)] == columns for prefix in prefixes)
+
+
+def index_ddl(table, columns, method):
+    """CREATE INDEX 문 생성"""
+    if method == 'gin_trgm':
+        return (f"CREATE INDEX CONCURRENTLY ON agent.{table} USING gin ({columns[0]} gin_trgm_ops);"
+                f"  -- CREATE EXTENSION IF NOT EXISTS pg_trgm 필요")
+    return f"CREATE INDEX CONCURRENTLY ON agent.{table} ({', '.join(columns)});"
+
+
+def load_existing_indexes(conn):
+    """agent 스키마의 기존 인덱스를 (table, columns, method) 집합으로 반환"""
+    existing = set()
+    with conn.cursor() as cur:
+        cur.execute("SELECT tablename, indexdef FROM pg_indexes WHERE schemaname = 'agent'")
+        for table, indexdef in cur.fetchall():
+            match = re.search(r'USING (\w+) \((.+)\)', indexdef)
+            if not match:
+                continue
+            method, body = match.groups()
+            columns = tuple(c.strip().split()[0] for c in body.split(','))
+            if method == 'gin' and 'gin_trgm_ops' in body:
+                existing.add((table, columns, 'gin_trgm'))
+            elif method == 'btree':
+                existing.add((table, columns, 'btree'))
+    return existing
+
+
+def explain_target(item):
+    """
+    EXPLAIN할 (쿼리, 일반 계획 여부)
+
+    원본 예시(WORKLOAD_LOG_SAMPLES)가 없으면 형태의 ?를 $1, $2...로 바꿔
+    EXPLAIN (GENERIC_PLAN)으로 추정합니다 (PostgreSQL 16 이상).
+    """
+    if item["sample"]:
+        return item["sample"], False
+    counter = itertools.count(1)
+    return re.sub(r"\?", lambda _: f"${next(counter)}", item["shape"]), True
+
+
+def explain_cost(cur, sql_query, generic=False):
+    options = "FORMAT JSON, GENERIC_PLAN" if generic else "FORMAT JSON"
+    cur.execute(f"EXPLAIN ({options}) {sql_query.strip().rstrip(';')}")
+    return cur.fetchone()[0][0]['Plan']['Total Cost']
+
+
+def hypothetical_benefit(conn, table, columns, targets):
+    """
+    HypoPG 가상 인덱스 전후의 계획 비용 비교
+
+    Args:
+        targets: {shape_id: (쿼리, 일반 계획 여부)} (explain_target 결과)
+
+    Returns:
+        {shape_id: (before, after)} - 비교할 수 없으면 빈 딕셔너리
+    """
+    results = {}
+    with conn.cursor() as cur:
+        before = {}
+        for shape_key, (sql_query, generic) in targets.items():
+            try:
+                before[shape_key] = explain_cost(cur, sql_query, generic)
+            except Exception:
+                conn.rollback()
+        cur.execute("SELECT * FROM hypopg_create_index(%s)",
+                    (f"CREATE INDEX ON agent.{table} ({', '.join(columns)})",))
+        try:
+            for shape_key, cost in before.items():
+                try:
+                    results[shape_key] = (cost, explain_cost(cur, *targets[shape_key]))
+                except Exception:
+                    conn.rollback()
+        finally:
+            cur.execute("SELECT hypopg_reset()")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='워크로드 로그 분석 및 인덱스 추천')
+    parser.add_argument('--log', default=WORKLOAD_LOG_PATH, help='워크로드 로그 경로')
+    parser.add_argument('--top', type=int, default=15, help='출력할 쿼리 형태 수')
+    parser.add_argument('--min-count', type=int, default=1, help='후보로 고려할 최소 실행 횟수')
+    parser.add_argument('--explain', action='store_true',
+                        help='DB에 연결하여 기존 인덱스 확인 및 HypoPG 가상 인덱스로 효과 추정')
+    args = parser.parse_args()
+
+    shapes = load_workload(args.log)
+    if not shapes:
+        print(f"기록된 쿼리가 없습니다: {args.log}")
+        return 1
+
+    ranked = sorted(shapes.items(), key=lambda kv: kv[1]["total_ms"], reverse=True)
+
+    print("=" * 70)
+    print(f"  쿼리 형태별 워크로드 (총 {len(shapes)}개 형태)")
+    print("=" * 70)
+    for key, item in ranked[:args.top]:
+        print(f"\n[{key}] {item['count']}회 · 총 {item['total_ms']:,.0f}ms · "
+              f"p95 {percentile(sorted(item['latencies']), 0.95):,.1f}ms · "
+              f"평균 {item['rows'] / item['count']:,.0f}행 · 오류 {item['errors']}회")
+        if item["cost"] is not None:
+            print(f"  계획 비용 {item['cost']:,.0f} · {', '.join(item['scans']) or '-'}")
+        print(f"  {item['shape'][:200]}")
+
+    # 인덱스 후보별로 관련 쿼리 형태 모으기
+    candidates = defaultdict(list)
+    for key, item in shapes.items():
+        if item["count"] < args.min_count:
+            continue
+        for candidate in index_candidates(item["shape"], item["wildcard"]):
+            candidates[candidate].append(key)
+
+    conn = None
+    existing = set()
+    hypopg = False
+    if args.explain:
+        import psycopg2
+        from config import DB_CONFIG
+        conn = psycopg2.connect(**DB_CONFIG)
+        existing = load_existing_indexes(conn)
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1 FROM pg_extension WHERE extname = 'hypopg'")
+            hypopg = cur.fetchone() is not None
+        if not hypopg:
+            print("\n⚠️  hypopg 확장이 없어 예상 효과를 계산하지 않습니다 (CREATE EXTENSION hypopg).")
+
+    print("\n" + "=" * 70)
+    print("  인덱스 추천")
+    print("=" * 70)
+
+    recommendations = []
+    for (table, columns, method), keys in candidates.items():
+        if is_covered(table, columns, method, existing):
+            continue
+        executions = sum(shapes[k]["count"] for k in keys)
+        total_ms = sum(shapes[k]["total_ms"] for k in keys)
+        benefit = None
+        if hypopg and method == 'btree':
+            costs = hypothetical_benefit(conn, table, columns, {k: explain_target(shapes[k]) for k in keys})
+            if costs:
+                benefit = sum((before - after) * shapes[k]["count"] for k, (before, after) in costs.items())
+        recommendations.append((benefit, total_ms, executions, table, columns, method, keys))
+
+    if not recommendations:
+        print("\n추천할 인덱스가 없습니다.")
+    # 예상 효과가 있으면 효과 순, 없으면 관련 쿼리 총 실행 시간 순
+    recommendations.sort(key=lambda r: (r[0] if r[0] is not None else -1, r[1]), reverse=True)
+    for benefit, total_ms, executions, table, columns, method, keys in recommendations:
+        print(f"\n{index_ddl(table, columns, method)}")
+        print(f"  관련 쿼리 형태 {len(keys)}개 · {executions}회 실행 · 총 {total_ms:,.0f}ms")
+        if benefit is not None:
+            print(f"  예상 계획 비용 절감 (실행 횟수 가중): {benefit:,.0f}")
+
+    if conn is not None:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
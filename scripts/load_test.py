@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+부하 테스트 - 여러 사용자의 동시 대화 시뮬레이션
+스텁 모델(지연 시간 설정 가능)과 config.py의 PostgreSQL(로컬 DB 권장)로 HealthChatAgent를 구동합니다.
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import psycopg2
+
+from config import DB_CONFIG
+from src.metrics import percentile
+from src.model_stubs import ReplayModel, ScriptedModel, cassette_questions
+from src.strands_health_agent import HealthChatAgent, sql_tool
+
+USER_UUID_SQL = "(SELECT user_uuid FROM agent.tb_user_info WHERE flnm LIKE '%User_1%' LIMIT 1)"
+GLUCOSE_VALUE_SQL = "CAST(SUBSTRING(bs_rslt_cn FROM 'Glucose Level: ([0-9]+)') AS INTEGER)"
+
+# 질문 키워드 -> 스텁 모델이 실행할 SQL (cli.py / app.py 예제 질문 기준)
+SCRIPTED_SQL = [
+    ("여성", "SELECT user_uuid, flnm, gndr_cd FROM agent.tb_user_info WHERE gndr_cd = 'F' LIMIT 5"),
+    ("가입", "SELECT user_uuid, flnm, join_dt FROM agent.tb_user_info ORDER BY join_dt DESC LIMIT 10"),
+    ("7일", f"SELECT msrmt_ymd, {GLUCOSE_VALUE_SQL} AS glucose_value FROM agent.tb_glucose_msrmt "
+            f"WHERE user_uuid = {USER_UUID_SQL} ORDER BY msrmt_ymd DESC LIMIT 7"),
+    ("횟수를 세어", f"SELECT COUNT(*) AS count FROM agent.tb_glucose_msrmt WHERE user_uuid = {USER_UUID_SQL}"),
+    ("평균", f"SELECT AVG({GLUCOSE_VALUE_SQL}) AS avg_glucose FROM agent.tb_glucose_msrmt "
+            f"WHERE user_uuid = {USER_UUID_SQL}"),
+    ("고혈당", f"SELECT COUNT(*) AS high_count FROM agent.tb_glucose_msrmt "
+              f"WHERE user_uuid = {USER_UUID_SQL} AND {GLUCOSE_VALUE_SQL} > 140"),
+    ("분석", f"WITH g AS (SELECT msrmt_ymd, {GLUCOSE_VALUE_SQL} AS v FROM agent.tb_glucose_msrmt "
+            f"WHERE user_uuid = {USER_UUID_SQL}) SELECT msrmt_ymd, v, CASE WHEN v < 70 THEN '저혈당' "
+            f"WHEN v > 140 THEN '고혈당' ELSE '정상' END AS status FROM g ORDER BY msrmt_ymd DESC LIMIT 30"),
+    ("찾", "SELECT user_uuid, flnm, eml_addr FROM agent.tb_user_info WHERE flnm LIKE '%User_1%' LIMIT 10"),
+]
+
+# 예제 질문으로 만든 다중 턴 대화
+CONVERSATIONS = [
+    ["User_1 이라는 이름의 사용자를 찾아줘",
+     "User_1의 최근 7일간 혈당 데이터를 보여줘",
+     "User_1의 혈당을 분석해줘"],
+    ["성별이 여성인 사용자 5명을 보여줘",
+     "최근에 가입한 사용자 10명을 알려줘"],
+    ["User_1의 혈당 측정 횟수를 세어줘",
+     "User_1의 평균 혈당 수치를 계산해줘",
+     "User_1의 고혈당 발생 횟수를 알려줘",
+     "User_1의 최근 혈당 추세를 분석해줘"],
+]
+
+
+def script(question):
+    """스텁 모델의 턴별 도구 호출 계획"""
+    for keyword, sql_query in SCRIPTED_SQL:
+        if keyword in question:
+            return [("execute_sql_query", {"sql_query": sql_query})]
+    return [("get_database_schema", {})]
+
+
+def current_rss_kb():
+    """현재 RSS (KB). ru_maxrss는 최댓값이라 단계별 증감을 볼 수 없으므로 /proc에서 읽음"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def admission_snapshot():
+    """승인 제어 누적 카운터 (단계 시작 시점)"""
+    controller = sql_tool.admission
+    with controller.condition:
+        return controller.admitted, controller.rejected
+
+
+def admission_delta(before):
+    """단계 시작 이후의 승인/거절 수와 대기 시간 p95 (승인 제어 통계는 프로세스 누적이므로 차이만 계산)"""
+    controller = sql_tool.admission
+    with controller.condition:
+        admitted = controller.admitted - before[0]
+        rejected = controller.rejected - before[1]
+        waits = sorted(list(controller.wait_times)[-admitted:]) if admitted else []
+    return {"admitted": admitted, "rejected": rejected, "wait_p95_ms": percentile(waits, 0.95)}
+
+
+class ConnectionSampler(threading.Thread):
+    """pg_stat_activity의 연결 수를 주기적으로 측정"""
+
+    def __init__(self, interval=0.5):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples = []
+        self.stop_event = threading.Event()
+
+    def run(self):
+        try:
+            conn = psycopg2.connect(**DB_CONFIG)
+            conn.autocommit = True
+        except psycopg2.Error:
+            return
+        with conn, conn.cursor() as cur:
+            while not self.stop_event.is_set():
+                cur.execute("SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()")
+                self.samples.append(cur.fetchone()[0])
+                self.stop_event.wait(self.interval)
+        conn.close()
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+
+
+def simulate_user(user_index, conversations, args, latencies, errors, agents):
+    """한 사용자가 대화 여러 개를 순서대로 진행"""
+    rng = random.Random(user_index)
+    if args.cassette:
+        # 기록된 실제 모델 응답을 재생 (카세트에 기록된 질문 순서 그대로, 대화마다 처음부터)
+        model = ReplayModel(args.cassette, latency_scale=args.replay_latency_scale)
+    else:
+        model = ScriptedModel(script, latency_ms=args.model_latency_ms,
+                              jitter_ms=args.model_jitter_ms, seed=user_index)
+    agent = HealthChatAgent(model=model)
+    agents.append(agent)
+
+    for _ in range(conversations):
+        questions = args.cassette_questions if args.cassette else rng.choice(CONVERSATIONS)
+        for question in questions:
+            start_time = time.perf_counter()
+            response = agent.chat(question)
+            latencies.append((time.perf_counter() - start_time) * 1000)
+            if str(response).startswith("오류 발생"):
+                errors.append(str(response))
+            time.sleep(args.think_time_ms / 1000)
+        agent.reset()
+
+
+def run_level(concurrency, args):
+    """동시 사용자 수 하나에 대해 부하 실행"""
+    latencies, errors, agents = [], [], []
+    sampler = ConnectionSampler()
+    sampler.start()
+    if args.trace_memory:
+        tracemalloc.start()
+    rss_before = current_rss_kb()
+    admission_before = admission_snapshot()
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(simulate_user, i, args.conversations, args, latencies, errors, agents)
+            for i in range(concurrency)
+        ]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - start_time
+
+    memory_per_session = None
+    if args.trace_memory:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        memory_per_session = current / max(1, len(agents)) / 1024
+    rss_growth = current_rss_kb() - rss_before
+    sampler.stop()
+    latencies.sort()
+
+    return {
+        "concurrency": concurrency,
+        "turns": len(latencies),
+        "errors": len(errors),
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 0.50) or 0.0,
+        "p95": percentile(latencies, 0.95) or 0.0,
+        "p99": percentile(latencies, 0.99) or 0.0,
+        "db_connections_max": max(sampler.samples) if sampler.samples else None,
+        "memory_per_session_kb": memory_per_session,
+        "rss_growth_kb": rss_growth,
+        "admission": admission_delta(admission_before)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HealthChatAgent 동시 대화 부하 테스트')
+    parser.add_argument('--levels', default='1,2,4,8,16', help='동시 사용자 수 단계 (쉼표 구분)')
+    parser.add_argument('--conversations', type=int, default=3,
+                        help='사용자당 대화 수 (카세트 재생 시 기록된 질문 순서를 반복하는 횟수)')
+    parser.add_argument('--model-latency-ms', type=float, default=800, help='스텁 모델 호출 지연 시간')
+    parser.add_argument('--model-jitter-ms', type=float, default=200, help='지연 시간 변동 폭')
+    parser.add_argument('--think-time-ms', type=float, default=0, help='턴 사이 사용자 대기 시간')
+    parser.add_argument('--cassette', help='스텁 대신 재생할 카세트 파일 (cli.py --record로 기록)')
+    parser.add_argument('--replay-latency-scale', type=float, default=1.0,
+                        help='카세트 재생 시 기록된 지연 시간 배율')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='tracemalloc으로 세션당 메모리 측정 (처리량이 낮아짐)')
+    args = parser.parse_args()
+    args.cassette_questions = cassette_questions(args.cassette) if args.cassette else None
+    if args.cassette and not args.cassette_questions:
+        parser.error(f"카세트에 질문 기록이 없습니다 (cli.py --record로 다시 기록하세요): {args.cassette}")
+
+    print("=" * 100)
+    print(f"  부하 테스트 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"  DB: {DB_CONFIG.get('host')}:{DB_CONFIG.get('port')} · 스텁 모델 지연 "
+          f"{args.model_latency_ms:.0f}±{args.model_jitter_ms:.0f}ms")
+    print("=" * 100)
+    print(f"{'users':>6} {'turns':>6} {'err':>4} {'turns/s':>8} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'DB conn':>8} {'KB/session':>11} {'RSS +KB':>9} {'DB wait p95':>12}")
+
+    for level in [int(x) for x in args.levels.split(',') if x.strip()]:
+        r = run_level(level, args)
+        memory = f"{r['memory_per_session_kb']:.0f}" if r['memory_per_session_kb'] is not None else "-"
+        print(f"{r['concurrency']:>6} {r['turns']:>6} {r['errors']:>4} {r['throughput']:>8.2f} "
+              f"{r['p50']:>9.0f} {r['p95']:>9.0f} {r['p99']:>9.0f} "
+              f"{r['db_connections_max'] if r['db_connections_max'] is not None else '-':>8} "
+              f"{memory:>11} {r['rss_growth_kb']:>9} {r['admission']['wait_p95_ms'] or 0:>10.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
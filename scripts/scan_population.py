@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+전체 사용자 혈당 이상 스캔
+프로세스 풀로 모든 사용자의 최근 측정값을 분석하여 요약 테이블을 갱신합니다.
+Agent의 list_users_needing_attention 도구가 이 결과를 사용합니다.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.population_scan import (
+    SCAN_CHUNK_USERS, SCAN_SUMMARY_TABLE, SCAN_WINDOW_DAYS, SCAN_WORKERS, run_scan
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='전체 사용자 혈당 이상 스캔')
+    parser.add_argument('--workers', type=int, default=SCAN_WORKERS, help='프로세스 수')
+    parser.add_argument('--chunk-users', type=int, default=SCAN_CHUNK_USERS, help='작업당 사용자 수')
+    parser.add_argument('--window-days', type=int, default=SCAN_WINDOW_DAYS, help='최근 며칠간의 측정값 사용')
+    args = parser.parse_args()
+
+    print(f"스캔 시작: 최근 {args.window_days}일, 프로세스 {args.workers}개, 작업당 {args.chunk_users}명")
+
+    def progress(done, total):
+        print(f"\r  {done}/{total} 묶음 완료", end="", flush=True)
+
+    summary = run_scan(args.workers, args.chunk_users, args.window_days, progress)
+    print(f"\n완료 ({summary['elapsed']:.1f}초): 사용자 {summary['users']:,}명, "
+          f"결과 {summary['rows']:,}행, 주의 대상 {summary['flagged']:,}행 -> {SCAN_SUMMARY_TABLE}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+분석 저장소 동기화
+tb_glucose_msrmt, tb_sensor_log의 reg_dt 워터마크 이후 행을 로컬 SQLite 분석 저장소로 가져옵니다.
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.analytics_store import ANALYTICS_DB_PATH, AnalyticsStore
+
+
+def run_once(store, full):
+    start_time = time.perf_counter()
+    synced = store.sync(full=full)
+    elapsed = time.perf_counter() - start_time
+    counts = ", ".join(f"{table} {count:,}행" for table, count in synced.items())
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] 동기화 완료 ({elapsed:.1f}초): {counts}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='분석 저장소 동기화')
+    parser.add_argument('--path', default=ANALYTICS_DB_PATH, help='SQLite 파일 경로')
+    parser.add_argument('--full', action='store_true', help='워터마크를 무시하고 전체 다시 동기화')
+    parser.add_argument('--interval', type=float, default=0,
+                        help='지정하면 N초마다 반복 동기화 (Ctrl+C로 종료)')
+    args = parser.parse_args()
+
+    store = AnalyticsStore(args.path)
+    print(f"분석 저장소: {args.path}")
+    run_once(store, args.full)
+    if args.interval > 0:
+        try:
+            while True:
+                time.sleep(args.interval)
+                run_once(store, False)
+        except KeyboardInterrupt:
+            print("\n종료합니다.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
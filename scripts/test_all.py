@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """
 통합 테스트 스크립트 - 모든 기능 테스트
+테스트는 동시에 실행되며 각각 제한 시간이 있습니다 (Agent 테스트는 자격 증명과 DB 확인 후 실행).
 """
 import sys
 import time
@@ -10,6 +11,10 @@ from pathlib import Path
 # 프로젝트 루트를 Python 경로에 추가
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from src.preflight import PREFLIGHT_TIMEOUT, Check, check_aws_credentials, run_checks
+
+AGENT_TIMEOUT = 120
+
 
 def print_section(title):
     """섹션 헤더 출력"""
@@ -18,107 +23,74 @@ def print_section(title):
     print("=" * 70)
 
 
-def test_aws_credentials():
-    """AWS 자격 증명 테스트"""
-    print_section("1. AWS 자격 증명 확인")
-    
-    try:
-        import boto3
-        sts = boto3.client('sts')
-        identity = sts.get_caller_identity()
-        print(f"✅ AWS 자격 증명 확인 성공")
-        print(f"   Account: {identity['Account']}")
-        print(f"   User/Role: {identity['Arn'].split('/')[-1]}")
-        return True
-    except Exception as e:
-        print(f"❌ AWS 자격 증명 실패: {e}")
-        return False
-
-
-def test_database():
+def _tool_with_timeout(timeout):
+    """
+    연결/쿼리 제한 시간을 건 전용 라우터로 만든 도구
+
+    기본 풀은 제한 시간이 없어 응답 없는 DB에서 테스트 스레드가 끝나지 않으므로
+    connect_timeout과 statement_timeout을 연결 설정에 넣습니다.
+    """
+    import config
+    from src.db_router import DatabaseRouter
+    from src.text_to_sql_tool import TextToSQLTool
+
+    db_config = dict(
+        config.DB_CONFIG,
+        connect_timeout=max(1, int(timeout)),
+        options=f"-c statement_timeout={int(timeout * 1000)}"
+    )
+    return TextToSQLTool(router=DatabaseRouter(db_config))
+
+
+def check_database(timeout):
     """데이터베이스 연결 테스트"""
-    print_section("2. 데이터베이스 연결 확인")
-    
-    try:
-        from src.text_to_sql_tool import TextToSQLTool
-        
-        tool = TextToSQLTool()
-        result = tool.execute_sql("SELECT COUNT(*) as count FROM agent.tb_user_info LIMIT 1")
-        
-        if result['success']:
-            count = result['data'][0]['count']
-            print(f"✅ 데이터베이스 연결 성공")
-            print(f"   사용자 수: {count}명")
-            return True
-        else:
-            print(f"❌ 쿼리 실패: {result['error']}")
-            return False
-    except Exception as e:
-        print(f"❌ 데이터베이스 연결 실패: {e}")
-        return False
+    tool = _tool_with_timeout(timeout)
+    result = tool.execute_sql("SELECT COUNT(*) as count FROM agent.tb_user_info LIMIT 1")
+    if not result['success']:
+        raise RuntimeError(f"쿼리 실패: {result['error']}")
+    return {"사용자 수": f"{result['data'][0]['count']}명"}
 
 
-def test_text_to_sql():
+def check_text_to_sql(timeout):
     """Text-to-SQL 도구 테스트"""
-    print_section("3. Text-to-SQL 도구 테스트")
-    
-    try:
-        from src.text_to_sql_tool import TextToSQLTool
-        
-        tool = TextToSQLTool()
-        
-        # 간단한 쿼리 테스트
-        result = tool.execute_sql(
-            "SELECT user_uuid, flnm, eml_addr FROM agent.tb_user_info WHERE flnm LIKE '%User_1%' LIMIT 3"
-        )
-        
-        if result['success']:
-            print(f"✅ SQL 실행 성공")
-            print(f"   조회 결과: {result['row_count']}건")
-            if result['data']:
-                print(f"   첫 번째 사용자: {result['data'][0]['flnm']}")
-            return True
-        else:
-            print(f"❌ SQL 실행 실패: {result['error']}")
-            return False
-    except Exception as e:
-        print(f"❌ Text-to-SQL 테스트 실패: {e}")
-        return False
+    tool = _tool_with_timeout(timeout)
+
+    # 간단한 쿼리 테스트
+    result = tool.execute_sql(
+        "SELECT user_uuid, flnm, eml_addr FROM agent.tb_user_info WHERE flnm LIKE '%User_1%' LIMIT 3"
+    )
+    if not result['success']:
+        raise RuntimeError(f"SQL 실행 실패: {result['error']}")
+    detail = {"조회 결과": f"{result['row_count']}건"}
+    if result['data']:
+        detail["첫 번째 사용자"] = result['data'][0]['flnm']
+    return detail
 
 
-def test_strands_agent():
+def check_strands_agent(timeout):
     """Strands Agent 테스트"""
-    print_section("4. Strands Agent 테스트")
-    
-    try:
-        from src.strands_health_agent import HealthChatAgent
-        
-        print("   Agent 초기화 중...")
-        agent = HealthChatAgent()
-        print("   ✅ Agent 초기화 성공")
-        
-        # 간단한 질문 테스트
-        print("\n   질문: User_1을 찾아줘")
-        start_time = time.time()
-        response = agent.chat("User_1 이라는 이름의 사용자를 찾아줘")
-        elapsed = time.time() - start_time
-        
-        print(f"\n   ✅ Agent 응답 성공 (소요 시간: {elapsed:.1f}초)")
-        print(f"   응답 길이: {len(response)}자")
-        
-        # 응답에 User_1이 포함되어 있는지 확인
-        if "User_1" in response:
-            print("   ✅ 응답 내용 검증 성공")
-            return True
-        else:
-            print("   ⚠️  응답 내용 검증 실패")
-            return False
-            
-    except Exception as e:
-        print(f"❌ Strands Agent 테스트 실패: {e}")
-        import traceback
-        traceback.print_exc()
-        return False
+    from src.strands_health_agent import HealthChatAgent
+
+    agent = HealthChatAgent()
+
+    # 간단한 질문 테스트
+    start_time = time.time()
+    response = agent.chat("User_1 이라는 이름의 사용자를 찾아줘")
+    elapsed = time.time() - start_time
+
+    # 응답에 User_1이 포함되어 있는지 확인
+    if "User_1" not in response:
+        raise RuntimeError(f"응답 내용 검증 실패 (응답 길이: {len(response)}자)")
+    return {"소요 시간": f"{elapsed:.1f}초", "응답 길이": f"{len(response)}자"}
+
+
+TESTS = [
+    Check('aws_credentials', "AWS 자격 증명", check_aws_credentials, PREFLIGHT_TIMEOUT),
+    Check('database', "데이터베이스", check_database, PREFLIGHT_TIMEOUT * 2),
+    Check('text_to_sql', "Text-to-SQL", check_text_to_sql, PREFLIGHT_TIMEOUT * 2),
+    Check('strands_agent', "Strands Agent", check_strands_agent, AGENT_TIMEOUT,
+          ('aws_credentials', 'database')),
+]
 
 
 def main():
@@ -127,26 +99,33 @@ def main():
     print("  건강 데이터 AI Agent - 통합 테스트")
     print("=" * 70)
     print(f"  시작 시간: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    
-    results = {
-        "AWS 자격 증명": test_aws_credentials(),
-        "데이터베이스": test_database(),
-        "Text-to-SQL": test_text_to_sql(),
-        "Strands Agent": test_strands_agent()
-    }
-    
+
+    start_time = time.time()
+    results = run_checks(TESTS, cache_path=None)
+
+    for index, result in enumerate(results.values(), 1):
+        print_section(f"{index}. {result.label}")
+        if result.ok:
+            print(f"✅ 성공 ({result.elapsed_ms / 1000:.1f}초)")
+            for key, value in result.detail.items():
+                print(f"   {key}: {value}")
+        elif result.status == 'skipped':
+            print(f"⊘ {result.error}")
+        else:
+            print(f"❌ 실패: {result.error}")
+
     # 결과 요약
     print_section("테스트 결과 요약")
-    
-    for test_name, result in results.items():
-        status = "✅ 성공" if result else "❌ 실패"
-        print(f"  {test_name:<20} {status}")
-    
-    success_count = sum(results.values())
+
+    for result in results.values():
+        status = {'ok': "✅ 성공", 'fail': "❌ 실패", 'timeout': "⏱ 시간 초과", 'skipped': "⊘ 건너뜀"}[result.status]
+        print(f"  {result.label:<20} {status}")
+
+    success_count = sum(result.ok for result in results.values())
     total_count = len(results)
-    
-    print(f"\n  총 {total_count}개 테스트 중 {success_count}개 성공")
-    
+
+    print(f"\n  총 {total_count}개 테스트 중 {success_count}개 성공 ({time.time() - start_time:.1f}초)")
+
     if success_count == total_count:
         print("\n  🎉 모든 테스트 통과! Streamlit UI를 실행하세요:")
         print("     ./scripts/run_streamlit.sh")
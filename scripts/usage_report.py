@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+모델 사용량 리포트
+logs/usage.jsonl을 모델 ID별, 일별, 세션별로 집계하여 토큰 수와 예상 비용을 보여줍니다.
+"""
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.usage_log import USAGE_LOG_PATH
+
+
+def new_totals():
+    return {"turns": 0, "in": 0, "out": 0, "calls": 0, "cost": 0.0,
+            "stopped": 0, "trimmed": 0, "rejected": 0}
+
+
+def load_usage(path, since=None, session=None):
+    """로그를 모델, 일, 세션별로 집계"""
+    by_model = defaultdict(new_totals)
+    by_day = defaultdict(new_totals)
+    by_session = defaultdict(new_totals)
+    total = new_totals()
+    for log_path in [Path(str(path) + '.1'), Path(path)]:
+        if not log_path.exists():
+            continue
+        with open(log_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if since is not None and entry["t"] < since:
+                    continue
+                if session is not None and entry["session"] != session:
+                    continue
+                day = datetime.fromtimestamp(entry["t"]).strftime('%Y-%m-%d')
+                turn_groups = (total, by_day[day], by_session[entry["session"]])
+                for item in turn_groups:
+                    item["turns"] += 1
+                    if entry.get("stopped") == 'session_budget':
+                        item["rejected"] += 1
+                    elif entry.get("stopped") == 'budget':
+                        item["stopped"] += 1
+                    item["trimmed"] += entry.get("trimmed", 0)
+                for model_id, usage in entry["models"].items():
+                    by_model[model_id]["turns"] += 1
+                    for item in turn_groups + (by_model[model_id],):
+                        item["in"] += usage["in"]
+                        item["out"] += usage["out"]
+                        item["calls"] += usage["calls"]
+                        item["cost"] += usage["cost"]
+    return total, by_model, by_day, by_session
+
+
+def print_table(title, rows, key_width=44):
+    print(f"\n{title}")
+    print(f"  {'':<{key_width}} {'턴':>7} {'호출':>7} {'입력 토큰':>12} {'출력 토큰':>11} {'예상 비용':>11}")
+    for key, item in rows:
+        print(f"  {str(key)[:key_width]:<{key_width}} {item['turns']:>7,} {item['calls']:>7,} "
+              f"{item['in']:>12,} {item['out']:>11,} {'$' + format(item['cost'], ',.4f'):>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='모델 사용량 및 예상 비용 리포트')
+    parser.add_argument('--log', default=USAGE_LOG_PATH, help='사용량 로그 경로')
+    parser.add_argument('--days', type=float, help='최근 N일만 집계')
+    parser.add_argument('--session', help='특정 세션만 집계')
+    parser.add_argument('--top', type=int, default=10, help='출력할 세션 수 (비용 순)')
+    parser.add_argument('--json', action='store_true', help='JSON으로 출력')
+    args = parser.parse_args()
+
+    since = time.time() - args.days * 86400 if args.days else None
+    total, by_model, by_day, by_session = load_usage(args.log, since, args.session)
+    if not total["turns"]:
+        print(f"기록된 사용량이 없습니다: {args.log}")
+        return 1
+
+    top_sessions = sorted(by_session.items(), key=lambda kv: kv[1]["cost"], reverse=True)[:args.top]
+    if args.json:
+        print(json.dumps({
+            "total": total,
+            "models": by_model,
+            "days": by_day,
+            "top_sessions": dict(top_sessions)
+        }, ensure_ascii=False, indent=2))
+        return 0
+
+    print("=" * 70)
+    print(f"  모델 사용량 (턴 {total['turns']:,}회 · 세션 {len(by_session):,}개)")
+    print("=" * 70)
+    print(f"  입력 {total['in']:,} · 출력 {total['out']:,} 토큰 · 모델 호출 {total['calls']:,}회 · "
+          f"예상 비용 ${total['cost']:,.4f}")
+    print(f"  예산으로 중단 {total['stopped']:,}턴 · 거절 {total['rejected']:,}턴 · "
+          f"줄인 도구 결과 {total['trimmed']:,}건")
+    if total["turns"] > total["rejected"]:
+        turns = total["turns"] - total["rejected"]
+        print(f"  턴당 평균: 입력 {total['in'] / turns:,.0f} · 출력 {total['out'] / turns:,.0f} 토큰 · "
+              f"${total['cost'] / turns:,.5f}")
+
+    print_table("모델 ID별", sorted(by_model.items(), key=lambda kv: kv[1]["cost"], reverse=True))
+    print_table("일별", sorted(by_day.items()))
+    print_table(f"세션별 (비용 상위 {len(top_sessions)}개)", top_sessions)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+데이터베이스 접근 승인 제어
+전체/세션별 동시 쿼리 수를 제한하고, 대기 중인 요청을 세션 간에 공정하게 처리합니다.
+"""
+import threading
+import time
+from collections import OrderedDict, deque, Counter
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+import config
+from src.metrics import percentile
+
+DB_MAX_CONCURRENT_QUERIES = getattr(config, 'DB_MAX_CONCURRENT_QUERIES', 10)
+DB_MAX_QUERIES_PER_SESSION = getattr(config, 'DB_MAX_QUERIES_PER_SESSION', 2)
+DB_QUEUE_TIMEOUT = getattr(config, 'DB_QUEUE_TIMEOUT', 15)
+
+DEFAULT_SESSION = 'default'
+
+
+class AdmissionRejected(Exception):
+    """대기 시간 예산을 넘겨 요청이 거절됨"""
+
+
+class _Ticket:
+    __slots__ = ('session_id', 'granted', 'enqueued_at')
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.granted = False
+        self.enqueued_at = time.monotonic()
+
+
+class AdmissionController:
+    """
+    전체/세션별 동시 실행 수 제한과 세션 간 라운드 로빈 대기열
+
+    슬롯이 비면 대기 중인 세션을 돌아가며 하나씩 승인하므로, 한 세션이 요청을
+    연달아 보내도 다른 세션의 요청이 뒤로 밀리지 않습니다.
+    """
+
+    def __init__(self, max_concurrent: int = DB_MAX_CONCURRENT_QUERIES,
+                 max_per_session: int = DB_MAX_QUERIES_PER_SESSION,
+                 queue_timeout: float = DB_QUEUE_TIMEOUT):
+        self.max_concurrent = max_concurrent
+        self.max_per_session = max_per_session
+        self.queue_timeout = queue_timeout
+        self.condition = threading.Condition()
+        self.active = 0
+        self.active_by_session = Counter()
+        # 세션별 대기열 (순서 = 다음 승인 순번)
+        self.queues: "OrderedDict[str, deque]" = OrderedDict()
+        self.waiting = 0
+        self.max_waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_times = deque(maxlen=1000)
+
+    def _dispatch(self):
+        """빈 슬롯을 대기 중인 세션에 라운드 로빈으로 배정 (condition 잠금 상태에서 호출)"""
+        granted = False
+        while self.active < self.max_concurrent and self.queues:
+            for session_id in list(self.queues):
+                if self.active_by_session[session_id] < self.max_per_session:
+                    break
+            else:
+                break
+
+            queue = self.queues[session_id]
+            ticket = queue.popleft()
+            if queue:
+                # 이번에 승인된 세션은 맨 뒤로
+                self.queues.move_to_end(session_id)
+            else:
+                del self.queues[session_id]
+
+            ticket.granted = True
+            self.waiting -= 1
+            self.active += 1
+            self.active_by_session[session_id] += 1
+            granted = True
+        if granted:
+            self.condition.notify_all()
+
+    @contextmanager
+    def admit(self, session_id: Optional[str] = None, timeout: Optional[float] = None):
+        """
+        실행 슬롯을 얻은 뒤 블록 실행
+
+        Args:
+            session_id: 요청한 세션 ID (없으면 공용 세션)
+            timeout: 최대 대기 시간 (기본값: queue_timeout)
+
+        Raises:
+            AdmissionRejected: 대기 시간 안에 슬롯을 얻지 못함
+        """
+        session_id = session_id or DEFAULT_SESSION
+        timeout = self.queue_timeout if timeout is None else timeout
+        ticket = _Ticket(session_id)
+
+        with self.condition:
+            self.queues.setdefault(session_id, deque()).append(ticket)
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+            self._dispatch()
+
+            deadline = ticket.enqueued_at + timeout
+            while not ticket.granted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.queues[session_id].remove(ticket)
+                    if not self.queues[session_id]:
+                        del self.queues[session_id]
+                    self.waiting -= 1
+                    self.rejected += 1
+                    raise AdmissionRejected(
+                        f"데이터베이스 요청이 많아 {timeout:g}초 안에 실행하지 못했습니다. "
+                        f"잠시 후 다시 시도하세요."
+                    )
+                self.condition.wait(remaining)
+
+            self.admitted += 1
+            self.wait_times.append((time.monotonic() - ticket.enqueued_at) * 1000)
+
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.active -= 1
+                self.active_by_session[session_id] -= 1
+                if not self.active_by_session[session_id]:
+                    del self.active_by_session[session_id]
+                self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        """대기열 깊이와 대기 시간 통계"""
+        with self.condition:
+            wait_times = sorted(self.wait_times)
+            stats = {
+                "active": self.active,
+                "waiting": self.waiting,
+                "max_waiting": self.max_waiting,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "sessions_waiting": len(self.queues)
+            }
+
+        def rounded(p):
+            value = percentile(wait_times, p)
+            return round(value, 1) if value is not None else None
+
+        stats["wait_p50_ms"] = rounded(0.50)
+        stats["wait_p95_ms"] = rounded(0.95)
+        return stats
+
+
+_default_controller: Optional[AdmissionController] = None
+_default_lock = threading.Lock()
+
+
+def get_default_controller() -> AdmissionController:
+    """프로세스 전체에서 공유하는 승인 제어기"""
+    global _default_controller
+    with _default_lock:
+        if _default_controller is None:
+            _default_controller = AdmissionController()
+        return _default_controller
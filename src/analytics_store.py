@@ -0,0 +1,307 @@
+"""
+로컬 분석용 혈당 데이터 저장소 (SQLite)
+tb_glucose_msrmt, tb_sensor_log를 reg_dt 기준으로 증분 동기화하고, 숫자 혈당 값을 미리 계산해 둡니다.
+집계 전용 쿼리는 운영 PostgreSQL 대신 이 저장소에서 실행하여 운영 조회와 경쟁하지 않도록 합니다.
+"""
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import config
+from src.db_router import DatabaseRouter, get_default_router
+from src.result_rows import ResultSet
+
+ANALYTICS_ENABLED = getattr(config, 'ANALYTICS_ENABLED', False)
+ANALYTICS_DB_PATH = getattr(
+    config, 'ANALYTICS_DB_PATH',
+    str(Path(__file__).parent.parent / 'data' / 'analytics.sqlite')
+)
+# 마지막 동기화 후 이 시간(초)이 지나면 분석 저장소로 보내지 않음
+ANALYTICS_MAX_STALENESS = getattr(config, 'ANALYTICS_MAX_STALENESS', 3600)
+ANALYTICS_SYNC_BATCH = getattr(config, 'ANALYTICS_SYNC_BATCH', 20000)
+
+GLUCOSE_EXPR = "CAST(SUBSTRING(bs_rslt_cn FROM 'Glucose Level: ([0-9]+)') AS INTEGER)"
+
+# 동기화 대상: 테이블 -> (SQLite DDL, PostgreSQL 조회 컬럼, SQLite 컬럼)
+TABLES = {
+    'tb_glucose_msrmt': (
+        """
+        CREATE TABLE IF NOT EXISTS tb_glucose_msrmt (
+            user_uuid TEXT NOT NULL,
+            sn_nm TEXT NOT NULL,
+            msrmt_ymd TEXT NOT NULL,
+            bs_rslt_cn TEXT,
+            glucose_value INTEGER,
+            reg_dt TEXT,
+            PRIMARY KEY (user_uuid, sn_nm, msrmt_ymd)
+        )
+        """,
+        f"user_uuid, sn_nm, msrmt_ymd, bs_rslt_cn, {GLUCOSE_EXPR}, reg_dt",
+        "user_uuid, sn_nm, msrmt_ymd, bs_rslt_cn, glucose_value, reg_dt"
+    ),
+    'tb_sensor_log': (
+        """
+        CREATE TABLE IF NOT EXISTS tb_sensor_log (
+            user_uuid TEXT NOT NULL,
+            sn_nm TEXT NOT NULL,
+            msrmt_dt TEXT NOT NULL,
+            analog_glucose TEXT,
+            glucose_value REAL,
+            rcd_indx_no TEXT,
+            reg_dt TEXT,
+            PRIMARY KEY (user_uuid, sn_nm, msrmt_dt)
+        )
+        """,
+        "user_uuid, sn_nm, msrmt_dt, analog_glucose, "
+        "CASE WHEN analog_glucose ~ '^[0-9]+(\\.[0-9]+)?$' THEN CAST(analog_glucose AS NUMERIC) END, "
+        "rcd_indx_no, reg_dt",
+        "user_uuid, sn_nm, msrmt_dt, analog_glucose, glucose_value, rcd_indx_no, reg_dt"
+    ),
+}
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_glucose_ymd ON tb_glucose_msrmt (msrmt_ymd)",
+    "CREATE INDEX IF NOT EXISTS ix_sensor_dt ON tb_sensor_log (msrmt_dt)",
+]
+
+# 집계 함수 호출
+AGGREGATE = re.compile(r'\b(count|avg|sum|min|max|stddev|stddev_samp|variance)\s*\(', re.IGNORECASE)
+# 테이블 참조
+TABLE_REF = re.compile(r'\b(?:from|join)\s+(?:agent\.)?(\w+)', re.IGNORECASE)
+# PostgreSQL 전용이거나 SQLite에서 의미가 달라지는 구문, 동기화하지 않는 컬럼
+# (timestamp는 시간대 오프셋이 붙은 텍스트로 저장되어 SQLite 날짜 함수가 UTC로 바꿔 버리고,
+#  SQLite의 LIKE는 대소문자를 구분하지 않으므로 날짜 함수와 LIKE가 있으면 PostgreSQL에서 실행)
+UNSUPPORTED = re.compile(
+    r'::|\binterval\b|\bilike\b|\blike\b|\bglob\b|~|\bcurrent_date\b|\bcurrent_timestamp\b|\bnow\s*\(|'
+    r'\bdate_trunc\b|\bto_char\b|\bto_date\b|\bextract\s*\(|\bpercentile_\w+\b|\brd_cn\b|'
+    r'\bdate\b|\bdatetime\b|\btime\s*\(|\bstrftime\b|\bjulianday\b|\bunixepoch\b',
+    re.IGNORECASE
+)
+# 혈당 값 추출식 -> 미리 계산된 glucose_value
+GLUCOSE_EXTRACT = re.compile(
+    r"CAST\s*\(\s*SUBSTRING\s*\(\s*(\w+\.)?bs_rslt_cn\s+FROM\s+'Glucose Level: \(\[0-9\]\+\)'\s*\)"
+    r"\s+AS\s+INTEGER\s*\)",
+    re.IGNORECASE
+)
+SENSOR_CAST = re.compile(
+    r"CAST\s*\(\s*(\w+\.)?analog_glucose\s+AS\s+(?:INTEGER|INT|NUMERIC|DECIMAL|FLOAT|REAL|DOUBLE PRECISION)\s*\)",
+    re.IGNORECASE
+)
+
+
+def _sqlite_value(value: Any) -> Any:
+    """PostgreSQL 값을 SQLite 저장 값으로 변환 (timestamp는 PostgreSQL 텍스트 형식, numeric은 REAL)"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return str(value)
+    return value
+
+
+def rewrite_for_analytics(sql_query: str) -> Optional[str]:
+    """
+    집계 전용 쿼리를 분석 저장소용 SQL로 변환
+
+    동기화된 테이블만 참조하고, 집계 함수를 사용하며, SQLite와 결과가 달라질 수 있는
+    구문이 없는 쿼리만 대상으로 합니다.
+
+    Returns:
+        변환된 SQL (대상이 아니면 None)
+    """
+    if not AGGREGATE.search(sql_query):
+        return None
+    # SELECT *는 분석 저장소의 컬럼 구성(glucose_value 추가, rd_cn 제외)이 그대로 드러나므로 제외
+    if re.search(r'\bselect\s+(?:distinct\s+)?(?:\w+\.)?\*', sql_query, re.IGNORECASE):
+        return None
+    tables = {name.lower() for name in TABLE_REF.findall(sql_query)}
+    # CTE 이름은 참조 테이블에서 제외
+    ctes = {name.lower() for name in re.findall(r'(\w+)\s+AS\s*\(', sql_query, re.IGNORECASE)}
+    tables -= ctes
+    if not tables or not tables <= set(TABLES):
+        return None
+
+    rewritten = GLUCOSE_EXTRACT.sub(lambda m: f"{m.group(1) or ''}glucose_value", sql_query)
+    rewritten = SENSOR_CAST.sub(lambda m: f"{m.group(1) or ''}glucose_value", rewritten)
+    if UNSUPPORTED.search(rewritten) or re.search(r'\bsubstring\b', rewritten, re.IGNORECASE):
+        return None
+    return rewritten.strip().rstrip(';')
+
+
+class AnalyticsStore:
+    """
+    SQLite 분석 저장소
+
+    조회 연결은 스레드마다 하나씩 열고, 파일을 'agent' 이름으로 ATTACH하여
+    agent.tb_glucose_msrmt 형태의 쿼리를 그대로 실행합니다.
+    """
+
+    def __init__(self, path: str = ANALYTICS_DB_PATH, max_staleness: float = ANALYTICS_MAX_STALENESS,
+                 router: Optional[DatabaseRouter] = None):
+        self.path = Path(path)
+        self.max_staleness = max_staleness
+        self.router = router
+        self.local = threading.local()
+        self.sync_lock = threading.Lock()
+        self.hits = 0
+        self.fallbacks = 0
+
+    def _connect_writer(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        # 동기화 중에도 조회 연결이 막히지 않도록 WAL 사용
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        for ddl, _, _ in TABLES.values():
+            conn.execute(ddl)
+        for ddl in INDEXES:
+            conn.execute(ddl)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sync_state (
+                table_name TEXT PRIMARY KEY,
+                watermark TEXT,
+                synced_at REAL,
+                row_count INTEGER
+            )
+        """)
+        conn.commit()
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(':memory:')
+            conn.execute("ATTACH DATABASE ? AS agent", (str(self.path),))
+            conn.execute("PRAGMA query_only = 1")
+            self.local.conn = conn
+        return conn
+
+    def sync(self, full: bool = False) -> Dict[str, int]:
+        """
+        PostgreSQL에서 reg_dt 워터마크 이후 행을 가져와 반영 (같은 키는 덮어씀)
+
+        워터마크와 같은 reg_dt의 행도 다시 가져오므로 동기화 도중 같은 시각에
+        추가된 행을 놓치지 않습니다.
+
+        Args:
+            full: 워터마크를 무시하고 전체 다시 동기화
+
+        Returns:
+            테이블별 반영 행 수
+        """
+        router = self.router or get_default_router()
+        synced = {}
+        with self.sync_lock:
+            writer = self._connect_writer()
+            try:
+                for table, (_, source_columns, target_columns) in TABLES.items():
+                    if full:
+                        writer.execute(f"DELETE FROM {table}")
+                        writer.execute("DELETE FROM sync_state WHERE table_name = ?", (table,))
+                    row = writer.execute(
+                        "SELECT watermark FROM sync_state WHERE table_name = ?", (table,)
+                    ).fetchone()
+                    watermark = row[0] if row else None
+                    synced[table], watermark = self._sync_table(
+                        router, writer, table, source_columns, target_columns, watermark
+                    )
+                    writer.execute(
+                        "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, "
+                        f"(SELECT COUNT(*) FROM {table}))",
+                        (table, watermark, time.time())
+                    )
+                    writer.commit()
+            finally:
+                writer.close()
+        return synced
+
+    def _sync_table(self, router, writer, table, source_columns, target_columns, watermark):
+        placeholders = ", ".join("?" for _ in target_columns.split(","))
+        insert = f"INSERT OR REPLACE INTO {table} ({target_columns}) VALUES ({placeholders})"
+        query = f"SELECT {source_columns} FROM agent.{table}"
+        params = ()
+        if watermark is not None:
+            query += " WHERE reg_dt >= %s"
+            params = (watermark,)
+        query += " ORDER BY reg_dt"
+
+        count = 0
+        with router.connection() as conn:
+            with conn.cursor(name=f'analytics_sync_{table}') as cur:
+                cur.itersize = ANALYTICS_SYNC_BATCH
+                cur.execute(query, params)
+                while True:
+                    rows = cur.fetchmany(ANALYTICS_SYNC_BATCH)
+                    if not rows:
+                        break
+                    writer.executemany(insert, [tuple(map(_sqlite_value, row)) for row in rows])
+                    count += len(rows)
+                    last_reg_dt = rows[-1][-1]
+                    if last_reg_dt is not None:
+                        watermark = str(last_reg_dt)
+        return count, watermark
+
+    def freshness(self) -> Optional[float]:
+        """가장 오래된 테이블의 마지막 동기화 후 경과 시간(초), 동기화 기록이 없으면 None"""
+        if not self.path.exists():
+            return None
+        try:
+            row = self._reader().execute(
+                "SELECT MIN(synced_at), COUNT(*) FROM agent.sync_state"
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if not row or row[1] < len(TABLES):
+            return None
+        return time.time() - row[0]
+
+    def try_execute(self, sql_query: str) -> Optional[Tuple[ResultSet, float]]:
+        """
+        집계 전용 쿼리를 분석 저장소에서 실행
+
+        Returns:
+            (결과 ResultSet, 마지막 동기화 후 경과 시간(초))
+            또는 None (대상이 아니거나, 동기화가 오래되었거나, 실행에 실패하면)
+        """
+        rewritten = rewrite_for_analytics(sql_query)
+        if rewritten is None:
+            return None
+        age = self.freshness()
+        if age is None or age > self.max_staleness:
+            return None
+        try:
+            cur = self._reader().execute(rewritten)
+            columns = [desc[0] for desc in cur.description]
+            result_set = ResultSet(columns, cur.fetchall())
+        except sqlite3.Error:
+            # SQLite 문법 차이 등으로 실패하면 PostgreSQL에서 실행
+            self.fallbacks += 1
+            return None
+        self.hits += 1
+        return result_set, age
+
+    def stats(self) -> Dict[str, Any]:
+        age = self.freshness()
+        return {
+            "path": str(self.path),
+            "age_seconds": round(age, 1) if age is not None else None,
+            "hits": self.hits,
+            "fallbacks": self.fallbacks
+        }
+
+
+_default_store: Optional[AnalyticsStore] = None
+_default_lock = threading.Lock()
+
+
+def get_default_store() -> AnalyticsStore:
+    """프로세스 전체에서 공유하는 분석 저장소"""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = AnalyticsStore()
+        return _default_store
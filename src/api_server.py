@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+건강 데이터 AI Agent - HTTP API 서버
+대화(일반/SSE 스트리밍), SQL 직접 실행, 스키마 조회, 메트릭(/metrics, 워커별) 엔드포인트를 제공합니다.
+
+실행:
+    python src/api_server.py --port 8000 --workers 4
+
+대화 저장소(config.py의 CONVERSATION_STORE)를 사용하면 매 턴 후 대화가 저장되어
+어느 워커든 같은 세션을 이어서 처리할 수 있고, 오래 사용하지 않은 세션은 메모리에서 내려놓습니다.
+저장소 없이 워커가 여러 개이면 로드 밸런서에서 session_id 기준 고정 라우팅(sticky session)을 사용하세요.
+같은 세션의 동시 요청은 워커 안에서만 막으므로 여러 워커가 한 세션을 동시에 처리하면 나중에 끝난 턴이 저장됩니다.
+
+API 자체에는 인증이 없고 /sql은 건강 데이터에 임의의 SELECT를 실행하므로 기본적으로 127.0.0.1에만 바인딩합니다.
+다른 호스트에서 접속해야 하면 인증을 거치는 리버스 프록시(API 게이트웨이 등) 뒤에 두세요.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import re
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Literal, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+
+import config
+from src.conversation_store import get_default_conversation_store
+from src.metrics import CONTENT_TYPE, get_default_registry
+from src.result_serializer import dumps, serialize_result
+from src.strands_health_agent import HealthChatAgent, model_router, sql_tool
+
+# 기본은 로컬에서만 접속 (API에는 인증이 없으므로 외부에 열 때는 인증 프록시 뒤에 둘 것)
+API_HOST = getattr(config, 'API_HOST', '127.0.0.1')
+API_PORT = getattr(config, 'API_PORT', 8000)
+API_WORKERS = getattr(config, 'API_WORKERS', 1)
+API_MAX_SESSIONS = getattr(config, 'API_MAX_SESSIONS', 1000)
+API_SESSION_TTL = getattr(config, 'API_SESSION_TTL', 1800)
+API_MAX_CONCURRENT_CHATS = getattr(config, 'API_MAX_CONCURRENT_CHATS', 32)
+API_QUEUE_TIMEOUT = getattr(config, 'API_QUEUE_TIMEOUT', 10)
+API_MAX_MESSAGE_CHARS = getattr(config, 'API_MAX_MESSAGE_CHARS', 4000)
+API_MAX_ROWS = getattr(config, 'API_MAX_ROWS', 10000)
+
+
+# 세션 ID는 대화 저장소의 파일 이름/키로도 사용
+SESSION_ID_PATTERN = r'^[A-Za-z0-9_-]{1,64}$'
+
+
+class ChatRequest(BaseModel):
+    message: str = Field(..., min_length=1, max_length=API_MAX_MESSAGE_CHARS)
+    session_id: Optional[str] = Field(default=None, pattern=SESSION_ID_PATTERN)
+
+
+class SQLRequest(BaseModel):
+    sql_query: str = Field(..., min_length=1)
+    result_format: Literal['records', 'columns'] = 'records'
+
+
+class Session:
+    """세션 하나의 Agent와 동시 요청 방지 잠금"""
+
+    def __init__(self, session_id: str):
+        # 승인 제어에서도 API 세션 ID를 그대로 사용, 저장된 대화가 있으면 첫 턴에서 불러옴
+        self.agent = HealthChatAgent(session_id=session_id, store=get_default_conversation_store())
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+
+class SessionManager:
+    """
+    프로세스 내 세션 관리
+
+    오래 사용하지 않은 세션은 새 세션을 만들 때 메모리에서 정리하며 (대화 저장소가 있으면 다시 불러올 수 있음),
+    세션 수가 한도를 넘으면 새 세션을 거절합니다.
+    """
+
+    def __init__(self, max_sessions: int = API_MAX_SESSIONS, ttl: float = API_SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.sessions: Dict[str, Session] = {}
+
+    def _evict_idle(self):
+        now = time.monotonic()
+        for session_id, session in list(self.sessions.items()):
+            if now - session.last_used > self.ttl and not session.lock.locked():
+                del self.sessions[session_id]
+
+    def get(self, session_id: Optional[str]) -> Session:
+        if session_id and session_id in self.sessions:
+            session = self.sessions[session_id]
+        else:
+            self._evict_idle()
+            if len(self.sessions) >= self.max_sessions:
+                raise HTTPException(status_code=503, detail="세션 수가 한도에 도달했습니다.")
+            session_id = session_id or uuid.uuid4().hex
+            session = self.sessions[session_id] = Session(session_id)
+        session.last_used = time.monotonic()
+        return session
+
+    def delete(self, session_id: str) -> bool:
+        deleted = self.sessions.pop(session_id, None) is not None
+        store = get_default_conversation_store()
+        if store:
+            deleted = store.delete(session_id) or deleted
+        return deleted
+
+
+app = FastAPI(title="건강 데이터 AI Agent API")
+sessions = SessionManager()
+_chat_slots: Optional[asyncio.Semaphore] = None
+
+
+def chat_slots() -> asyncio.Semaphore:
+    """워커 프로세스의 동시 대화 수 제한 (이벤트 루프 안에서 처음 사용할 때 생성)"""
+    global _chat_slots
+    if _chat_slots is None:
+        _chat_slots = asyncio.Semaphore(API_MAX_CONCURRENT_CHATS)
+    return _chat_slots
+
+
+async def acquire_chat_slot():
+    """동시 대화 슬롯 획득 (대기 시간 초과 시 429)"""
+    try:
+        await asyncio.wait_for(chat_slots().acquire(), timeout=API_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=429, detail="요청이 많습니다. 잠시 후 다시 시도해주세요.")
+
+
+def lock_session(session: Session):
+    """세션당 한 번에 한 요청만 처리 (대화 기록 순서 보장)"""
+    if session.lock.locked():
+        raise HTTPException(status_code=409, detail="이 세션의 이전 요청을 처리 중입니다.")
+
+
+def json_response(body: str, status_code: int = 200) -> Response:
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+
+@app.post("/chat")
+async def chat(request: ChatRequest):
+    """한 턴 대화 (응답 완료 후 반환)"""
+    session = sessions.get(request.session_id)
+    lock_session(session)
+    async with session.lock:
+        await acquire_chat_slot()
+        try:
+            result = await asyncio.to_thread(session.agent.ask, request.message)
+        finally:
+            chat_slots().release()
+    return json_response(dumps(dict(result, session_id=session.agent.session_id)))
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    한 턴 대화 (SSE 스트리밍)
+
+    이벤트: text (응답 조각), tool (도구 호출 시작), done (최종 응답과 실행 정보), error
+    """
+    session = sessions.get(request.session_id)
+    lock_session(session)
+    await session.lock.acquire()
+    try:
+        await acquire_chat_slot()
+    except HTTPException:
+        session.lock.release()
+        raise
+
+    async def events():
+        try:
+            yield f"event: session\ndata: {json.dumps({'session_id': session.agent.session_id})}\n\n"
+            # 클라이언트가 끊겨도 턴 마무리(기록 정리, 저장)가 잠금을 놓기 전에 끝나도록 명시적으로 닫음
+            async with contextlib.aclosing(session.agent.stream(request.message)) as stream:
+                async for event in stream:
+                    yield f"event: {event.pop('type')}\ndata: {dumps(event)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {dumps({'error': f'{type(e).__name__}: {e}'})}\n\n"
+        finally:
+            chat_slots().release()
+            session.lock.release()
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """세션(대화 기록) 삭제"""
+    if not re.match(SESSION_ID_PATTERN, session_id) or not await asyncio.to_thread(sessions.delete, session_id):
+        raise HTTPException(status_code=404, detail="세션을 찾을 수 없습니다.")
+    return {"deleted": session_id}
+
+
+@app.post("/sql")
+async def execute_sql(request: SQLRequest, x_session_id: Optional[str] = Header(default=None)):
+    """SQL 직접 실행 (SELECT/WITH만 허용, 비용 게이트와 승인 제어 적용)"""
+    # 최대 행 수는 서버 측 커서에서 적용 (결과 전체를 워커 메모리로 받지 않음)
+    result = await asyncio.to_thread(
+        sql_tool.execute_sql, request.sql_query, request.result_format, x_session_id,
+        max_rows=API_MAX_ROWS
+    )
+    return json_response(serialize_result(result), status_code=200 if result["success"] else 400)
+
+
+@app.get("/schema", response_class=PlainTextResponse)
+async def schema():
+    """데이터베이스 스키마 설명"""
+    return sql_tool.get_schema_description()
+
+
+@app.get("/health")
+async def health() -> Dict[str, Any]:
+    """상태 확인 (세션 수, DB 승인 제어, 모델 라우팅 통계)"""
+    return {
+        "status": "ok",
+        "sessions": len(sessions.sessions),
+        "admission": sql_tool.admission.stats(),
+        "routing": model_router.summary() if model_router.enabled else None
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus 텍스트 형식 메트릭 (이 워커의 값)"""
+    return Response(get_default_registry().render(), media_type=CONTENT_TYPE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='건강 데이터 AI Agent HTTP API 서버')
+    parser.add_argument('--host', default=API_HOST)
+    parser.add_argument('--port', type=int, default=API_PORT)
+    parser.add_argument('--workers', type=int, default=API_WORKERS,
+                        help='워커 프로세스 수 (세션은 워커별로 유지됨)')
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run("src.api_server:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
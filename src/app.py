@@ -4,18 +4,26 @@
 DB Search 최적화 버전
 """
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import sys
 from pathlib import Path
-sys.path.insert(0, str(Path(__file__).parent))
+# 프로젝트 루트 기준으로 import (Agent 모듈과 같은 모듈 인스턴스, 같은 연결 풀 공유)
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from strands_health_agent import HealthChatAgent
-from text_to_sql_tool import TextToSQLTool
+from src.strands_health_agent import HealthChatAgent, model_router, sql_tool as agent_sql_tool
+from src.text_to_sql_tool import TextToSQLTool
+from src.session_store import ExportFile, MessageStore
+from src.conversation_store import get_default_conversation_store
+from src.preflight import format_result, warm_up
+from src.metrics import get_default_registry
+from src.token_budget import SESSION_COST_BUDGET, total_usage
 from datetime import datetime
 import json
+import os
 import re
+import tempfile
+import time
 
 # 페이지 설정
 st.set_page_config(
@@ -88,13 +96,62 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# 내보내기 형식: 표시 이름 -> (확장자, MIME 타입)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/octet-stream")
+}
+
+# 한 번에 렌더링할 대화 기록 수
+HISTORY_PAGE_SIZE = 20
+
+# 렌더링 시간 측정 시작
+render_start = time.perf_counter()
+
+
+
+@st.cache_resource(show_spinner="연결 준비 중...")
+def warm_up_once():
+    """프로세스당 한 번: DB 연결 풀, 스키마/사용자 인덱스, Bedrock 클라이언트를 병렬로 준비"""
+    return warm_up(agent_sql_tool)
+
+
+@st.cache_resource
+def start_metrics_server():
+    """config.py의 METRICS_PORT가 설정되어 있으면 /metrics 엔드포인트를 프로세스당 한 번 시작"""
+    return get_default_registry().start_http_server()
+
+
+def metric_total(snapshot, name, **labels):
+    """카운터 값 합계 (지정한 레이블 값이 일치하는 항목만)"""
+    metric = snapshot.get(name)
+    if metric is None:
+        return 0
+    positions = {metric["labels"].index(key): value for key, value in labels.items()}
+    return sum(value for key, value in metric["values"].items()
+               if all(key[i] == v for i, v in positions.items()))
+
+
+warm_up_results = warm_up_once()
+start_metrics_server()
+
 # 세션 상태 초기화
 if 'agent' not in st.session_state:
-    st.session_state.agent = HealthChatAgent()
+    # 대화 저장소를 사용하면 URL의 session 파라미터로 새로고침 후에도 Agent 대화 맥락을 이어감
+    conversation_store = get_default_conversation_store()
+    resume_id = st.query_params.get("session") if conversation_store else None
+    if resume_id and not re.fullmatch(r'[A-Za-z0-9_-]{1,64}', resume_id):
+        resume_id = None
+    st.session_state.agent = HealthChatAgent(session_id=resume_id, store=conversation_store)
+    if conversation_store:
+        st.query_params["session"] = st.session_state.agent.session_id
 if 'sql_tool' not in st.session_state:
     st.session_state.sql_tool = TextToSQLTool()
 if 'messages' not in st.session_state:
-    st.session_state.messages = []
+    st.session_state.messages = MessageStore()
+if 'history_pages' not in st.session_state:
+    st.session_state.history_pages = 1
 if 'query_count' not in st.session_state:
     st.session_state.query_count = 0
 if 'last_query_result' not in st.session_state:
@@ -117,6 +174,49 @@ with st.sidebar:
     with col2:
         st.metric("대화 수", len(st.session_state.messages), delta=None)
     
+    # 이 대화의 누적 토큰/예상 비용 (세션 예산 대비, 유휴 세션의 대화를 복원하지 않도록 보관된 값 사용)
+    session_usage = total_usage(st.session_state.agent.session_usage)
+    if session_usage["model_calls"]:
+        st.caption(
+            f"💰 이 대화: 입력 {session_usage['input_tokens']:,} · 출력 {session_usage['output_tokens']:,} 토큰 · "
+            f"약 ${session_usage['cost_usd']:.4f}"
+            + (f" / 예산 ${SESSION_COST_BUDGET:g}" if SESSION_COST_BUDGET else "")
+        )
+    
+    if 'last_render_ms' in st.session_state:
+        st.caption(f"⏱️ 이전 화면 렌더링: {st.session_state.last_render_ms:.0f} ms")
+    
+    if model_router.enabled:
+        with st.expander("🧭 모델 라우팅", expanded=False):
+            for route, stats in model_router.summary().items():
+                st.caption(
+                    f"**{route}** `{stats['model_id']}` · {stats['count']}회 · "
+                    f"p50 {stats['p50_ms']}ms · p95 {stats['p95_ms']}ms · "
+                    f"승격 {stats['escalations']}회"
+                )
+    
+    with st.expander("📈 메트릭", expanded=False):
+        snapshot = get_default_registry().snapshot()
+        sql_latency = snapshot["sql_query_seconds"]["values"].get(("postgres",))
+        turn_tokens = snapshot["turn_tokens"]["values"]
+        st.caption(
+            f"**SQL** {metric_total(snapshot, 'sql_queries_total', status='ok'):.0f}건 · "
+            f"오류 {metric_total(snapshot, 'sql_queries_total', status='error'):.0f} · "
+            f"거절 {metric_total(snapshot, 'sql_rejections_total'):.0f} · "
+            f"자동 수정 {metric_total(snapshot, 'sql_repairs_total'):.0f}"
+            + (f" · p95 ≤ {sql_latency['p95']:g}초" if sql_latency else "")
+        )
+        st.caption(
+            f"**도구** {metric_total(snapshot, 'tool_calls_total'):.0f}회 · "
+            f"재사용 {metric_total(snapshot, 'tool_calls_total', status='cached'):.0f}회"
+        )
+        st.caption(
+            f"**모델** 호출 {metric_total(snapshot, 'model_calls_total'):.0f}회 · "
+            f"입력 {metric_total(snapshot, 'model_tokens_total', direction='input'):,.0f} / "
+            f"출력 {metric_total(snapshot, 'model_tokens_total', direction='output'):,.0f} 토큰"
+            + (f" · 턴당 평균 입력 {turn_tokens[('input',)]['mean']:,.0f}" if ('input',) in turn_tokens else "")
+        )
+    
     st.markdown("---")
     
     # 빠른 검색
@@ -154,20 +254,39 @@ with st.sidebar:
     if st.button("📋 스키마 보기", use_container_width=True):
         st.session_state.show_schema = True
     
+    with st.expander("🔀 연결 상태", expanded=False):
+        for result in warm_up_results.values():
+            st.caption(format_result(result))
+        admission = st.session_state.sql_tool.admission.stats()
+        st.caption(
+            f"**대기열** 실행 {admission['active']} · 대기 {admission['waiting']} "
+            f"(최대 {admission['max_waiting']}) · 거절 {admission['rejected']} · "
+            f"대기 p50 {admission['wait_p50_ms']}ms · p95 {admission['wait_p95_ms']}ms"
+        )
+        for endpoint in st.session_state.sql_tool.router.stats():
+            lag = endpoint['lag_seconds']
+            st.caption(
+                f"**{endpoint['name']}** ({endpoint['host']}) · "
+                f"{'정상' if endpoint['available'] else '제외됨'} · "
+                f"진행 {endpoint['outstanding']} · {endpoint['queries']}건 · "
+                f"p50 {endpoint['p50_ms']}ms · p95 {endpoint['p95_ms']}ms"
+                + (f" · 지연 {lag:.1f}초" if lag is not None else "")
+            )
+    
     st.markdown("---")
     
     # 설정
     st.markdown("### ⚙️ 설정")
     
     show_sql = st.checkbox("SQL 쿼리 표시", value=False)
-    show_raw_data = st.checkbox("원본 데이터 표시", value=False)
     
     st.markdown("---")
     
     # 초기화
     if st.button("🔄 대화 초기화", type="secondary", use_container_width=True):
         st.session_state.agent.reset()
-        st.session_state.messages = []
+        st.session_state.messages.clear()
+        st.session_state.history_pages = 1
         st.session_state.query_count = 0
         st.session_state.last_query_result = None
         st.rerun()
@@ -197,8 +316,15 @@ with tab1:
                 if st.button(f"{title}\n\n{desc}", key=f"card_{title}", use_container_width=True):
                     st.session_state.quick_query = query
     
-    # 대화 기록 표시
-    for i, message in enumerate(st.session_state.messages):
+    # 대화 기록 표시 (최근 페이지만 렌더링, 오래된 기록은 디스크에서 필요할 때 읽음)
+    visible_count = st.session_state.history_pages * HISTORY_PAGE_SIZE
+    hidden_count = len(st.session_state.messages) - visible_count
+    if hidden_count > 0:
+        if st.button(f"⬆️ 이전 대화 더 보기 ({hidden_count}개)", key="load_older"):
+            st.session_state.history_pages += 1
+            st.rerun()
+    
+    for i, message in enumerate(st.session_state.messages.tail(visible_count)):
         if message["role"] == "user":
             st.markdown(f"""
             <div class="chat-message user-message">
@@ -218,12 +344,6 @@ with tab1:
             if show_sql and 'sql' in message:
                 with st.expander("🔍 실행된 SQL 쿼리"):
                     st.code(message['sql'], language='sql')
-            
-            # 원본 데이터 표시 (옵션)
-            if show_raw_data and 'data' in message and message['data']:
-                with st.expander("📋 원본 데이터"):
-                    df = pd.DataFrame(message['data'])
-                    st.dataframe(df, use_container_width=True)
     
     # 입력 영역
     st.markdown("---")
@@ -263,12 +383,16 @@ with tab1:
             try:
                 response = st.session_state.agent.chat(query)
                 
-                # Agent 응답 추가
-                st.session_state.messages.append({
+                # Agent 응답 추가 (디스크로 내보낼 수 있도록 문자열로 저장)
+                agent_message = {
                     "role": "agent",
-                    "content": response,
+                    "content": str(response),
                     "timestamp": datetime.now()
-                })
+                }
+                executed_sql = st.session_state.agent.last_turn.get("sql")
+                if executed_sql:
+                    agent_message["sql"] = ";\n\n".join(executed_sql)
+                st.session_state.messages.append(agent_message)
                 
                 st.session_state.query_count += 1
                 
@@ -280,7 +404,7 @@ with tab1:
 with tab2:
     st.markdown("### 📊 데이터 분석 도구")
     
-    st.info("💡 왼쪽 사이드바에서 '원본 데이터 표시'를 활성화하면 대화 탭에서 데이터를 볼 수 있습니다.")
+    st.info("💡 왼쪽 사이드바에서 'SQL 쿼리 표시'를 활성화하면 대화에서 실행된 쿼리를 볼 수 있습니다.")
     
     # 직접 SQL 실행
     st.markdown("#### 🔧 직접 SQL 쿼리 실행")
@@ -292,29 +416,81 @@ with tab2:
             height=100
         )
         
-        if st.button("실행", type="primary"):
+        col_run, col_format, col_export = st.columns([1, 1, 1])
+        with col_run:
+            run_clicked = st.button("실행", type="primary")
+        with col_format:
+            export_format = st.selectbox(
+                "내보내기 형식",
+                list(EXPORT_FORMATS.keys()),
+                label_visibility="collapsed"
+            )
+        with col_export:
+            export_clicked = st.button("📦 파일로 내보내기")
+        
+        if run_clicked:
             if sql_query:
                 with st.spinner("쿼리 실행 중..."):
-                    result = st.session_state.sql_tool.execute_sql(sql_query)
+                    # 행 딕셔너리 없이 컬럼 단위로 DataFrame 생성 (커서 경로: DB 타입 유지)
+                    result = st.session_state.sql_tool.fetch_dataframe(
+                        sql_query, method='cursor', session_id=st.session_state.agent.session_id
+                    )
                     
                     if result['success']:
                         st.success(f"✅ {result['row_count']}건의 데이터를 조회했습니다.")
                         
-                        if result['data']:
-                            df = pd.DataFrame(result['data'])
+                        if result['row_count']:
+                            df = result['dataframe']
                             st.dataframe(df, use_container_width=True)
-                            
-                            # 다운로드 버튼
-                            csv = df.to_csv(index=False).encode('utf-8')
-                            st.download_button(
-                                "📥 CSV 다운로드",
-                                csv,
-                                "query_result.csv",
-                                "text/csv",
-                                key='download-csv'
-                            )
                     else:
                         st.error(f"❌ 오류: {result['error']}")
+        
+        if export_clicked and sql_query:
+            # 이전 내보내기 결과 파일은 지움
+            previous = st.session_state.pop('export_file', None)
+            if previous is not None:
+                previous.remove()
+            
+            extension, mime = EXPORT_FORMATS[export_format]
+            fd, path = tempfile.mkstemp(prefix="query_result_", suffix=f".{extension}")
+            os.close(fd)
+            # 세션 상태에는 경로만 두고 파일은 다운로드하거나 세션이 정리될 때 삭제
+            export_file = ExportFile(path, f"query_result.{extension}", mime, 0, 0)
+            
+            with st.spinner("결과를 파일로 내보내는 중..."):
+                # DataFrame/CSV 문자열 없이 서버 측 커서(COPY)에서 파일로 바로 기록
+                result = st.session_state.sql_tool.export_query(
+                    sql_query, path, file_format=extension,
+                    session_id=st.session_state.agent.session_id
+                )
+            if result['success']:
+                export_file.row_count = result['row_count']
+                export_file.size_bytes = result['bytes']
+                st.session_state.export_file = export_file
+            else:
+                export_file.remove()
+                st.error(f"❌ 오류: {result['error']}")
+        
+        export_file = st.session_state.get('export_file')
+        if export_file:
+            st.caption(
+                f"{export_file.row_count:,}건 · {export_file.size_bytes / 1024 / 1024:.1f} MB"
+            )
+            
+            def finish_download(export_file=export_file):
+                # 받은 뒤에는 파일과 세션 상태를 정리
+                export_file.remove()
+                st.session_state.pop('export_file', None)
+            
+            with export_file.open() as f:
+                st.download_button(
+                    "📥 다운로드",
+                    f,
+                    export_file.name,
+                    export_file.mime,
+                    key='download-export',
+                    on_click=finish_download
+                )
 
 with tab3:
     st.markdown("### 📖 사용 가이드")
@@ -336,7 +512,7 @@ with tab3:
         
         3. **결과 확인**
            - 이해하기 쉬운 설명
-           - 필요시 원본 데이터 확인
+           - 필요시 SQL 실행기로 원본 데이터 확인
            - SQL 쿼리 확인 가능
         
         #### 💡 팁
@@ -382,6 +558,9 @@ if st.session_state.get('show_schema', False):
             st.session_state.show_schema = False
             st.rerun()
 
+# 렌더링 시간 기록 (대화가 길어져도 일정하게 유지되는지 확인용)
+st.session_state.last_render_ms = (time.perf_counter() - render_start) * 1000
+
 # 푸터
 st.markdown("---")
 st.markdown("""
@@ -0,0 +1,166 @@
+"""
+Bedrock 모델 클라이언트 공유 관리
+커넥션 풀링, adaptive retry, 토큰 버킷 기반 호출 속도 제한
+"""
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+
+import boto3
+from botocore.config import Config as BotocoreConfig
+from strands.models import BedrockModel
+
+import config
+from config import MODEL_ID
+
+# config.py에 값이 없으면 기본값 사용 (기존 설정 파일 호환)
+AWS_REGION = getattr(config, 'AWS_REGION', None)
+BEDROCK_MAX_POOL_CONNECTIONS = getattr(config, 'BEDROCK_MAX_POOL_CONNECTIONS', 50)
+BEDROCK_MAX_ATTEMPTS = getattr(config, 'BEDROCK_MAX_ATTEMPTS', 8)
+BEDROCK_CONNECT_TIMEOUT = getattr(config, 'BEDROCK_CONNECT_TIMEOUT', 5)
+BEDROCK_READ_TIMEOUT = getattr(config, 'BEDROCK_READ_TIMEOUT', 120)
+BEDROCK_REQUESTS_PER_MINUTE = getattr(config, 'BEDROCK_REQUESTS_PER_MINUTE', 0)
+BEDROCK_BURST = getattr(config, 'BEDROCK_BURST', 5)
+BEDROCK_MAX_CONCURRENCY = getattr(config, 'BEDROCK_MAX_CONCURRENCY', 0)
+
+
+class TokenBucket:
+    """
+    스레드 안전한 토큰 버킷
+
+    rate_per_minute 만큼 분당 토큰이 채워지며 최대 burst 개까지 쌓입니다.
+    reserve()는 토큰을 예약하고 기다려야 할 시간(초)을 반환하므로
+    동기/비동기 코드 모두에서 사용할 수 있습니다.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """토큰 1개를 예약하고 대기 시간(초)을 반환"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        """토큰을 얻을 때까지 블로킹 대기"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        """토큰을 얻을 때까지 비동기 대기"""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class ThrottledBedrockModel(BedrockModel):
+    """
+    호출 전에 토큰 버킷과 동시 호출 수 제한을 적용하는 BedrockModel
+
+    Bedrock 계정 쿼터(RPM)를 넘지 않도록 클라이언트 측에서 먼저 속도를 조절하여
+    ThrottlingException 발생 자체를 줄입니다.
+    """
+
+    def __init__(self, *, limiter: Optional[TokenBucket] = None,
+                 concurrency: Optional[threading.BoundedSemaphore] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.limiter = limiter
+        self.concurrency = concurrency
+
+    async def _acquire_slot(self):
+        """
+        동시 호출 슬롯을 얻을 때까지 비동기 대기
+
+        Agent마다 이벤트 루프가 달라 asyncio.Semaphore를 공유할 수 없으므로 스레드 세마포어를
+        블로킹 없이 시도하며 기다립니다. to_thread로 기다리면 태스크가 취소되어도 스레드가
+        나중에 슬롯을 얻어 반환되지 않으므로, 슬롯은 이 코루틴 안에서만 얻습니다.
+        """
+        delay = 0.005
+        while not self.concurrency.acquire(blocking=False):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.1)
+
+    async def stream(self, *args, **kwargs):
+        acquired = False
+        try:
+            if self.concurrency is not None:
+                await self._acquire_slot()
+                acquired = True
+            if self.limiter is not None:
+                await self.limiter.acquire_async()
+            async for event in super().stream(*args, **kwargs):
+                yield event
+        finally:
+            if acquired:
+                self.concurrency.release()
+
+
+_session: Optional[boto3.Session] = None
+_limiter: Optional[TokenBucket] = None
+_concurrency: Optional[threading.BoundedSemaphore] = None
+_models: Dict[str, BedrockModel] = {}
+_lock = threading.Lock()
+
+
+def get_client_config() -> BotocoreConfig:
+    """커넥션 풀과 adaptive retry가 설정된 botocore 설정"""
+    return BotocoreConfig(
+        max_pool_connections=BEDROCK_MAX_POOL_CONNECTIONS,
+        connect_timeout=BEDROCK_CONNECT_TIMEOUT,
+        read_timeout=BEDROCK_READ_TIMEOUT,
+        retries={
+            'mode': 'adaptive',
+            'max_attempts': BEDROCK_MAX_ATTEMPTS
+        },
+        tcp_keepalive=True
+    )
+
+
+def get_bedrock_model(model_id: Optional[str] = None) -> BedrockModel:
+    """
+    모델 ID별로 공유되는 BedrockModel 반환
+
+    같은 프로세스의 모든 HealthChatAgent가 하나의 boto3 세션, HTTP 커넥션 풀,
+    토큰 버킷을 공유합니다.
+
+    Args:
+        model_id: Bedrock 모델 ID (기본값: config.MODEL_ID)
+
+    Returns:
+        공유 BedrockModel 인스턴스
+    """
+    global _session, _limiter, _concurrency
+
+    model_id = model_id or MODEL_ID
+    with _lock:
+        if model_id in _models:
+            return _models[model_id]
+
+        if _session is None:
+            _session = boto3.Session(region_name=AWS_REGION)
+            if BEDROCK_REQUESTS_PER_MINUTE > 0:
+                _limiter = TokenBucket(BEDROCK_REQUESTS_PER_MINUTE, BEDROCK_BURST)
+            if BEDROCK_MAX_CONCURRENCY > 0:
+                _concurrency = threading.BoundedSemaphore(BEDROCK_MAX_CONCURRENCY)
+
+        model = ThrottledBedrockModel(
+            model_id=model_id,
+            boto_session=_session,
+            boto_client_config=get_client_config(),
+            limiter=_limiter,
+            concurrency=_concurrency
+        )
+        _models[model_id] = model
+        return model
@@ -4,20 +4,59 @@
 """
 import sys
 import argparse
-import sys
+import json
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from strands_health_agent import HealthChatAgent
+from src.conversation_store import get_default_conversation_store
+
+
+def build_model(args):
+    """
+    --record / --replay 옵션에 맞는 모델 생성
+    
+    Returns:
+        HealthChatAgent에 넘길 모델 (옵션이 없으면 None: 기본 Bedrock 모델과 라우팅 사용)
+    """
+    if args.replay:
+        from src.model_stubs import ReplayModel
+        return ReplayModel(args.replay, latency_scale=args.replay_latency_scale)
+    if args.record:
+        from src.bedrock_client import get_bedrock_model
+        from src.model_stubs import RecordingModel
+        return RecordingModel(get_bedrock_model(), args.record)
+    return None
+
+
+def build_agent(model=None, session_id=None):
+    """
+    대화 모드용 Agent 생성
+    
+    대화 저장소(config.py의 CONVERSATION_STORE)를 사용하면 매 턴 후 대화를 저장하고,
+    session_id를 지정하면 저장된 대화를 이어서 진행합니다.
+    """
+    store = get_default_conversation_store()
+    if session_id and store is None:
+        print("⚠️  대화 저장소가 설정되지 않아 --session을 무시합니다 (config.py의 CONVERSATION_STORE).")
+        session_id = None
+    agent = HealthChatAgent(model=model, session_id=session_id, store=store)
+    if store:
+        print(f"세션 ID: {agent.session_id} (--session {agent.session_id}로 이어서 대화)\n")
+    return agent
 
 
-def simple_mode():
+def simple_mode(model=None, session_id=None):
     """간단한 대화 모드"""
     print("\n🏥 건강 데이터 AI Agent")
     print("=" * 60)
     print("자연어로 질문하세요. 종료: 'quit'\n")
     
-    agent = HealthChatAgent()
+    agent = build_agent(model, session_id)
     
     while True:
         try:
@@ -41,7 +80,7 @@ def simple_mode():
             print(f"\n오류: {e}\n")
 
 
-def interactive_mode():
+def interactive_mode(model=None, session_id=None):
     """풍부한 대화 모드"""
     print("\n" + "=" * 70)
     print("🏥 건강 데이터 AI 어시스턴트")
@@ -53,7 +92,7 @@ def interactive_mode():
     print("  - 'help': 예제 질문 보기")
     print("=" * 70 + "\n")
     
-    agent = HealthChatAgent()
+    agent = build_agent(model, session_id)
     
     examples = [
         ("👤 사용자 검색", [
@@ -117,6 +156,103 @@ def interactive_mode():
             print("다시 시도해주세요.\n")
 
 
+def read_questions(source):
+    """
+    배치 질문 읽기
+    
+    한 줄에 질문 하나 (텍스트) 또는 {"id": ..., "question": ...} JSON 객체.
+    빈 줄과 '#'으로 시작하는 줄은 건너뛰며, id가 없으면 줄 번호를 사용합니다.
+    
+    Args:
+        source: 파일 경로 또는 '-' (표준 입력)
+    """
+    f = sys.stdin if source == '-' else open(source, encoding='utf-8')
+    try:
+        questions = []
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('{'):
+                item = json.loads(line)
+                questions.append((str(item.get('id', line_no)), item['question']))
+            else:
+                questions.append((str(line_no), line))
+        return questions
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def completed_ids(output_path):
+    """이전 실행 결과 파일에서 성공한 질문 id 목록 (재개용)"""
+    done = set()
+    if not output_path or not Path(output_path).exists():
+        return done
+    with open(output_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # 중단 시 마지막 줄이 잘렸을 수 있음
+                continue
+            if record.get("success"):
+                done.add(str(record.get("id")))
+    return done
+
+
+def batch_mode(args, model=None):
+    """
+    배치 모드: 질문을 Agent 풀에서 동시에 실행하고 질문마다 JSONL 한 줄 기록
+    
+    Agent마다 대화 기록이 독립적이며, 질문 하나를 처리할 때마다 기록을 초기화합니다.
+    --output 파일이 이미 있으면 성공한 질문은 건너뛰고 이어서 기록합니다.
+    """
+    questions = read_questions(args.batch)
+    done = completed_ids(args.output)
+    pending = [(qid, question) for qid, question in questions if qid not in done]
+    print(f"배치 실행: 전체 {len(questions)}개, 완료 {len(questions) - len(pending)}개 건너뜀, "
+          f"실행 {len(pending)}개 (Agent {args.workers}개)", file=sys.stderr)
+    if not pending:
+        return 0
+    
+    agents = queue.Queue()
+    for _ in range(min(args.workers, len(pending))):
+        agents.put(HealthChatAgent(model=model))
+    
+    def run(qid, question):
+        agent = agents.get()
+        try:
+            agent.reset()
+            started_at = datetime.now().isoformat(timespec='seconds')
+            start_time = time.perf_counter()
+            result = agent.ask(question)
+            result["total_ms"] = round((time.perf_counter() - start_time) * 1000, 1)
+            return dict({"id": qid, "question": question, "started_at": started_at}, **result)
+        finally:
+            agents.put(agent)
+    
+    out = open(args.output, 'a', encoding='utf-8') if args.output else sys.stdout
+    failures = 0
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            futures = [executor.submit(run, qid, question) for qid, question in pending]
+            for count, future in enumerate(as_completed(futures), 1):
+                record = future.result()
+                failures += 0 if record["success"] else 1
+                out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                out.flush()
+                print(f"  [{count}/{len(pending)}] {record['id']} "
+                      f"{'✓' if record['success'] else '✗'} {record['total_ms']:,.0f}ms "
+                      f"tokens {record.get('usage', {}).get('totalTokens', '-')}", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    
+    print(f"완료: 성공 {len(pending) - failures}개, 실패 {failures}개", file=sys.stderr)
+    return 1 if failures else 0
+
+
 def main():
     """메인 함수"""
     parser = argparse.ArgumentParser(
@@ -127,6 +263,11 @@ def main():
   %(prog)s                # 간단한 모드 (기본)
   %(prog)s --interactive  # 풍부한 모드
   %(prog)s -i             # 풍부한 모드 (축약)
+  %(prog)s --session ID   # 저장된 대화 이어서 진행
+  %(prog)s --record c.jsonl   # 모델 응답 기록
+  %(prog)s --replay c.jsonl   # 기록된 응답 재생 (네트워크 불필요)
+  %(prog)s --batch questions.txt --output results.jsonl --workers 8
+  cat questions.txt | %(prog)s --batch - > results.jsonl
         """
     )
     
@@ -136,13 +277,60 @@ def main():
         help='풍부한 대화 모드 (예제, 도움말 포함)'
     )
     
+    parser.add_argument(
+        '--session',
+        metavar='ID',
+        help='저장된 대화를 이어서 진행 (config.py의 CONVERSATION_STORE 필요)'
+    )
+    
+    parser.add_argument(
+        '--record',
+        metavar='CASSETTE',
+        help='모델 요청/응답을 카세트 파일(JSONL)에 기록'
+    )
+    
+    parser.add_argument(
+        '--replay',
+        metavar='CASSETTE',
+        help='Bedrock 대신 카세트 파일의 응답을 재생 (오프라인 성능 측정용)'
+    )
+    
+    parser.add_argument(
+        '--replay-latency-scale',
+        type=float,
+        default=1.0,
+        help='재생 시 기록된 모델 지연 시간에 곱할 배율 (0: 지연 없음)'
+    )
+    
+    parser.add_argument(
+        '--batch',
+        metavar='FILE',
+        help="배치 모드: 질문 파일 ('-': 표준 입력, 한 줄에 질문 하나 또는 JSON 객체)"
+    )
+    
+    parser.add_argument(
+        '--output',
+        metavar='JSONL',
+        help='배치 결과 파일 (기존 파일이 있으면 성공한 질문을 건너뛰고 이어서 실행, 기본: 표준 출력)'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=4,
+        help='배치 모드에서 동시에 실행할 Agent 수 (기본: 4)'
+    )
+    
     args = parser.parse_args()
     
     try:
+        model = build_model(args)
+        if args.batch:
+            sys.exit(batch_mode(args, model))
         if args.interactive:
-            interactive_mode()
+            interactive_mode(model, args.session)
         else:
-            simple_mode()
+            simple_mode(model, args.session)
     except Exception as e:
         print(f"\n오류: {e}")
         sys.exit(1)
@@ -0,0 +1,230 @@
+"""
+Agent 대화 상태 저장소
+Strands Agent의 메시지와 상태를 압축 JSON으로 직렬화하여 파일 또는 SQLite에 저장합니다.
+프로세스를 재시작하거나 다른 워커가 요청을 받아도 세션을 이어서 처리할 수 있습니다.
+
+공유 저장소(Redis, DynamoDB 등)가 필요하면 같은 메서드(load, save, version, delete, purge)를
+구현한 클래스를 만들어 HealthChatAgent에 넘기면 됩니다. 여러 서버가 같은 SQLite 파일을
+공유 디스크로 사용하는 구성이 그 로컬 대체 역할을 합니다.
+"""
+import base64
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 'none': 저장하지 않음, 'file': 세션별 파일, 'sqlite': SQLite 파일 하나
+CONVERSATION_STORE = getattr(config, 'CONVERSATION_STORE', 'none')
+CONVERSATION_STORE_PATH = getattr(config, 'CONVERSATION_STORE_PATH', None)
+# 이 시간(초) 동안 갱신되지 않은 대화는 저장소를 열 때 삭제 (0: 삭제하지 않음)
+CONVERSATION_TTL = getattr(config, 'CONVERSATION_TTL', 7 * 24 * 3600)
+COMPRESS_LEVEL = 6
+
+
+def _encode_default(obj: Any) -> Any:
+    # 메시지의 bytes(이미지, 추론 서명 등)는 원래 값으로 복원할 수 있도록 표시해서 저장
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return {"__bytes__": base64.b64encode(bytes(obj)).decode('ascii')}
+    return str(obj)
+
+
+def _decode_hook(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1 and "__bytes__" in obj:
+        return base64.b64decode(obj["__bytes__"])
+    return obj
+
+
+def encode_conversation(payload: Dict[str, Any]) -> bytes:
+    """대화 상태 -> 압축 JSON"""
+    if orjson is not None:
+        raw = orjson.dumps(payload, default=_encode_default)
+    else:
+        raw = json.dumps(payload, ensure_ascii=False, separators=(',', ':'),
+                         default=_encode_default).encode('utf-8')
+    return zlib.compress(raw, COMPRESS_LEVEL)
+
+
+def decode_conversation(blob: bytes) -> Dict[str, Any]:
+    """압축 JSON -> 대화 상태"""
+    return json.loads(zlib.decompress(blob), object_hook=_decode_hook)
+
+
+class FileConversationStore:
+    """
+    세션별 파일 저장소
+
+    파일 하나에 대화 하나를 저장하며, 임시 파일에 쓴 뒤 교체하므로 읽는 쪽이 쓰다 만 파일을 보지 않습니다.
+    버전은 (수정 시각 ns, inode)입니다. 저장할 때마다 새 파일로 교체되므로 수정 시각 해상도가
+    낮은 파일 시스템에서도 inode로 구분됩니다.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.dir = Path(path or Path(tempfile.gettempdir()) / 'health_agent_conversations')
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, session_id: str) -> Path:
+        # 세션 ID를 파일 이름으로 쓰므로 경로 구분자 등은 허용하지 않음
+        if not session_id.replace('-', '').replace('_', '').isalnum():
+            raise ValueError(f"사용할 수 없는 세션 ID입니다: {session_id!r}")
+        return self.dir / f"{session_id}.json.z"
+
+    @staticmethod
+    def _version(stat: os.stat_result) -> Tuple[int, int]:
+        return stat.st_mtime_ns, stat.st_ino
+
+    def version(self, session_id: str) -> Optional[Tuple[int, int]]:
+        try:
+            return self._version(self._path(session_id).stat())
+        except FileNotFoundError:
+            return None
+
+    def load(self, session_id: str) -> Optional[Tuple[Tuple[int, int], Dict[str, Any]]]:
+        path = self._path(session_id)
+        try:
+            with open(path, 'rb') as f:
+                version = self._version(os.fstat(f.fileno()))
+                return version, decode_conversation(f.read())
+        except FileNotFoundError:
+            return None
+
+    def save(self, session_id: str, payload: Dict[str, Any]) -> Tuple[int, int]:
+        path = self._path(session_id)
+        fd, tmp_path = tempfile.mkstemp(dir=self.dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(encode_conversation(payload))
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        return self._version(path.stat())
+
+    def delete(self, session_id: str) -> bool:
+        try:
+            self._path(session_id).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def purge(self, max_age: float) -> int:
+        """max_age초 동안 갱신되지 않은 대화 삭제"""
+        cutoff = time.time() - max_age
+        removed = 0
+        for path in self.dir.glob('*.json.z'):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+
+class SQLiteConversationStore:
+    """
+    SQLite 저장소
+
+    대화 하나가 한 행이며, 저장할 때마다 version이 1씩 증가합니다.
+    WAL 모드라 여러 프로세스가 같은 파일을 동시에 읽고 쓸 수 있습니다.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or Path(__file__).parent.parent / 'data' / 'conversations.sqlite')
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS conversations (
+                    session_id TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL,
+                    updated_at REAL NOT NULL,
+                    data BLOB NOT NULL
+                )
+            """)
+            conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10)
+
+    def version(self, session_id: str) -> Optional[int]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT version FROM conversations WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def load(self, session_id: str) -> Optional[Tuple[int, Dict[str, Any]]]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT version, data FROM conversations WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return (row[0], decode_conversation(row[1])) if row else None
+
+    def save(self, session_id: str, payload: Dict[str, Any]) -> int:
+        blob = encode_conversation(payload)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """
+                INSERT INTO conversations (session_id, version, updated_at, data)
+                VALUES (?, 1, ?, ?)
+                ON CONFLICT (session_id) DO UPDATE SET
+                    version = version + 1, updated_at = excluded.updated_at, data = excluded.data
+                """,
+                (session_id, time.time(), blob)
+            )
+            return conn.execute(
+                "SELECT version FROM conversations WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+
+    def delete(self, session_id: str) -> bool:
+        with closing(self._connect()) as conn, conn:
+            return conn.execute(
+                "DELETE FROM conversations WHERE session_id = ?", (session_id,)
+            ).rowcount > 0
+
+    def purge(self, max_age: float) -> int:
+        """max_age초 동안 갱신되지 않은 대화 삭제"""
+        with closing(self._connect()) as conn, conn:
+            return conn.execute(
+                "DELETE FROM conversations WHERE updated_at < ?", (time.time() - max_age,)
+            ).rowcount
+
+
+STORES = {
+    'file': FileConversationStore,
+    'sqlite': SQLiteConversationStore,
+}
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def get_default_conversation_store():
+    """
+    설정(CONVERSATION_STORE)에 따른 프로세스 공유 대화 저장소
+
+    Returns:
+        저장소 또는 None ('none'이면 대화를 저장하지 않음)
+    """
+    global _default_store
+    if CONVERSATION_STORE not in STORES:
+        return None
+    with _default_lock:
+        if _default_store is None:
+            _default_store = STORES[CONVERSATION_STORE](CONVERSATION_STORE_PATH)
+            if CONVERSATION_TTL:
+                _default_store.purge(CONVERSATION_TTL)
+        return _default_store
@@ -0,0 +1,155 @@
+"""
+EXPLAIN 기반 쿼리 비용 게이트
+실행 전에 예상 비용과 행 수를 확인하여 과도한 쿼리를 거절하거나 LIMIT을 붙입니다.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+
+import config
+from src.sql_shape import normalize_query
+
+COST_GATE_ENABLED = getattr(config, 'COST_GATE_ENABLED', False)
+COST_GATE_MAX_COST = getattr(config, 'COST_GATE_MAX_COST', 500000)
+COST_GATE_MAX_ROWS = getattr(config, 'COST_GATE_MAX_ROWS', 100000)
+# 'reject': 거절, 'limit': 가능하면 LIMIT을 붙여 실행
+COST_GATE_ACTION = getattr(config, 'COST_GATE_ACTION', 'limit')
+COST_GATE_LIMIT_ROWS = getattr(config, 'COST_GATE_LIMIT_ROWS', 1000)
+COST_GATE_CACHE_SIZE = getattr(config, 'COST_GATE_CACHE_SIZE', 1024)
+COST_GATE_CACHE_TTL = getattr(config, 'COST_GATE_CACHE_TTL', 600)
+
+
+def summarize_plan(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    EXPLAIN (FORMAT JSON) 결과를 간단한 요약으로 변환
+
+    Returns:
+        총 비용, 예상 행 수, 최상위 노드, 테이블 스캔 목록
+    """
+    scans: List[str] = []
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if 'Relation Name' in node:
+            index = f" using {node['Index Name']}" if node.get('Index Name') else ""
+            scans.append(f"{node['Node Type']} on {node['Relation Name']}{index}")
+        stack.extend(node.get('Plans', []))
+    return {
+        "total_cost": plan.get('Total Cost', 0.0),
+        "plan_rows": plan.get('Plan Rows', 0),
+        "node": plan.get('Node Type'),
+        "scans": scans
+    }
+
+
+class CostGate:
+    """쿼리 형태별로 캐시된 EXPLAIN 추정치로 실행 여부를 결정"""
+
+    def __init__(self, max_cost: float = COST_GATE_MAX_COST, max_rows: int = COST_GATE_MAX_ROWS,
+                 action: str = COST_GATE_ACTION, limit_rows: int = COST_GATE_LIMIT_ROWS,
+                 cache_size: int = COST_GATE_CACHE_SIZE, cache_ttl: float = COST_GATE_CACHE_TTL):
+        self.max_cost = max_cost
+        self.max_rows = max_rows
+        self.action = action
+        self.limit_rows = limit_rows
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def estimate(self, conn, sql_query: str) -> Dict[str, Any]:
+        """
+        쿼리의 계획 요약 반환 (같은 형태는 캐시 사용)
+
+        Args:
+            conn: EXPLAIN을 실행할 연결
+            sql_query: 대상 쿼리
+        """
+        shape = normalize_query(sql_query)
+        now = time.monotonic()
+        with self.lock:
+            cached = self.cache.get(shape)
+            if cached and now - cached[0] < self.cache_ttl:
+                self.cache.move_to_end(shape)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        with conn.cursor() as cur:
+            cur.execute(f"EXPLAIN (FORMAT JSON) {sql_query.strip().rstrip(';')}")
+            raw = cur.fetchone()[0]
+        summary = summarize_plan(raw[0]['Plan'])
+
+        with self.lock:
+            self.cache[shape] = (now, summary)
+            self.cache.move_to_end(shape)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return summary
+
+    def _over_limit(self, plan: Dict[str, Any]) -> bool:
+        return plan['total_cost'] > self.max_cost or plan['plan_rows'] > self.max_rows
+
+    def _reason(self, plan: Dict[str, Any]) -> str:
+        scans = ", ".join(s for s in plan['scans'] if s.startswith('Seq Scan')) or "없음"
+        return (
+            f"예상 비용 {plan['total_cost']:,.0f} (한도 {self.max_cost:,.0f}), "
+            f"예상 행 수 {plan['plan_rows']:,} (한도 {self.max_rows:,}), 전체 스캔: {scans}. "
+            f"user_uuid 또는 msrmt_ymd/msrmt_dt 범위 조건을 추가하거나, 필요한 컬럼만 "
+            f"집계하고 LIMIT을 사용하는 더 가벼운 쿼리로 다시 작성하세요."
+        )
+
+    def check(self, conn, sql_query: str, can_wrap: bool) -> Dict[str, Any]:
+        """
+        실행 여부 결정
+
+        Args:
+            conn: EXPLAIN을 실행할 연결
+            sql_query: 대상 쿼리
+            can_wrap: 쿼리를 서브쿼리로 감싸 LIMIT을 붙여도 안전한지 여부
+
+        Returns:
+            action('allow' | 'limit' | 'reject'), 실행할 sql, plan, reason
+        """
+        plan = self.estimate(conn, sql_query)
+        if not self._over_limit(plan):
+            return {"action": "allow", "sql": sql_query, "plan": plan, "reason": None}
+
+        if self.action == 'limit' and can_wrap:
+            limited_sql = (
+                f"SELECT * FROM ({sql_query.strip().rstrip(';')}) AS limited_result "
+                f"LIMIT {int(self.limit_rows)}"
+            )
+            limited_plan = self.estimate(conn, limited_sql)
+            if limited_plan['total_cost'] <= self.max_cost:
+                return {
+                    "action": "limit",
+                    "sql": limited_sql,
+                    "plan": limited_plan,
+                    "reason": (
+                        f"예상 행 수 {plan['plan_rows']:,}건이 한도를 넘어 "
+                        f"상위 {self.limit_rows}건만 조회했습니다."
+                    )
+                }
+
+        return {"action": "reject", "sql": None, "plan": plan, "reason": self._reason(plan)}
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {"cached_shapes": len(self.cache), "hits": self.hits, "misses": self.misses}
+
+
+_default_gate: Optional[CostGate] = None
+_default_lock = threading.Lock()
+
+
+def get_default_gate() -> CostGate:
+    """프로세스 전체에서 공유하는 비용 게이트 (계획 캐시 공유)"""
+    global _default_gate
+    with _default_lock:
+        if _default_gate is None:
+            _default_gate = CostGate()
+        return _default_gate
@@ -0,0 +1,251 @@
+"""
+데이터베이스 연결 풀 및 읽기 복제본 라우팅
+SELECT 전용 쿼리를 복제본으로 분산하고, 복제 지연이 크거나 장애가 있으면 primary로 보냅니다.
+"""
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional
+
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+
+import config
+from config import DB_CONFIG
+from src.metrics import percentile
+
+# 복제본 목록: DB_CONFIG와 다른 항목만 적어도 됨 (예: [{'host': 'replica-1...'}])
+DB_REPLICAS = getattr(config, 'DB_REPLICAS', [])
+# 'least_outstanding' 또는 'round_robin'
+DB_ROUTING_STRATEGY = getattr(config, 'DB_ROUTING_STRATEGY', 'least_outstanding')
+DB_MAX_REPLICATION_LAG = getattr(config, 'DB_MAX_REPLICATION_LAG', 30)
+DB_LAG_CHECK_INTERVAL = getattr(config, 'DB_LAG_CHECK_INTERVAL', 10)
+DB_POOL_MIN = getattr(config, 'DB_POOL_MIN', 1)
+DB_POOL_MAX = getattr(config, 'DB_POOL_MAX', 10)
+DB_POOL_TIMEOUT = getattr(config, 'DB_POOL_TIMEOUT', 10)
+# 연결 실패한 복제본을 제외하는 시간 (초)
+DB_REPLICA_COOLDOWN = getattr(config, 'DB_REPLICA_COOLDOWN', 30)
+
+# 복제 지연 (초). primary이거나 WAL을 모두 반영했으면 0
+REPLICATION_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """연결 풀이 가득 차 제한 시간 안에 연결을 얻지 못함 (서버 장애가 아니므로 복제본을 제외하지 않음)"""
+
+
+class Endpoint:
+    """연결 풀과 지연 시간 통계를 가진 데이터베이스 엔드포인트"""
+
+    def __init__(self, name: str, db_config: Dict[str, Any], is_primary: bool,
+                 pool_min: int = DB_POOL_MIN, pool_max: int = DB_POOL_MAX):
+        self.name = name
+        self.config = db_config
+        self.is_primary = is_primary
+        self.pool_min = pool_min
+        self.pool_max = pool_max
+        self.pool: Optional[ThreadedConnectionPool] = None
+        # ThreadedConnectionPool은 고갈 시 예외를 내므로 세마포어로 대기시킴
+        self.slots = threading.BoundedSemaphore(pool_max)
+        self.lock = threading.Lock()
+        self.outstanding = 0
+        self.queries = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=500)
+        self.lag_seconds: Optional[float] = None
+        self.lag_checked_at = 0.0
+        self.down_until = 0.0
+
+    def _get_pool(self) -> ThreadedConnectionPool:
+        with self.lock:
+            if self.pool is None:
+                self.pool = ThreadedConnectionPool(self.pool_min, self.pool_max, **self.config)
+            return self.pool
+
+    def acquire(self, timeout: float = DB_POOL_TIMEOUT):
+        """풀에서 읽기 전용 연결을 가져옴 (풀이 가득 차면 timeout초까지 대기, 0이면 대기하지 않음)"""
+        if not self.slots.acquire(timeout=timeout):
+            raise PoolTimeout(f"'{self.name}' 연결 풀 대기 시간 초과 ({timeout}초)")
+        conn = None
+        try:
+            pool = self._get_pool()
+            conn = pool.getconn()
+            if conn.readonly is not True:
+                conn.set_session(readonly=True)
+        except Exception:
+            try:
+                # 끊어진 연결은 닫아서 반환 (반환하지 않으면 풀 자리가 영구히 줄어듦)
+                if conn is not None:
+                    pool.putconn(conn, close=True)
+            finally:
+                self.slots.release()
+            raise
+        with self.lock:
+            self.outstanding += 1
+        return conn
+
+    def release(self, conn, latency_ms: Optional[float] = None, failed: bool = False):
+        """연결을 풀에 반환하고 통계 기록"""
+        broken = conn.closed != 0
+        if not broken:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
+        try:
+            self.pool.putconn(conn, close=broken)
+        finally:
+            self.slots.release()
+            with self.lock:
+                self.outstanding -= 1
+                if latency_ms is not None:
+                    self.queries += 1
+                    self.latencies.append(latency_ms)
+                if failed:
+                    self.errors += 1
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def mark_down(self, cooldown: float = DB_REPLICA_COOLDOWN):
+        self.down_until = time.monotonic() + cooldown
+
+    def lag_is_stale(self, interval: float = DB_LAG_CHECK_INTERVAL) -> bool:
+        return time.monotonic() - self.lag_checked_at >= interval
+
+    def check_lag(self, conn) -> float:
+        """주어진 연결로 복제 지연을 측정하여 기록"""
+        with conn.cursor() as cur:
+            cur.execute(REPLICATION_LAG_SQL)
+            self.lag_seconds = float(cur.fetchone()[0] or 0)
+        conn.rollback()
+        self.lag_checked_at = time.monotonic()
+        return self.lag_seconds
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            latencies = sorted(self.latencies)
+            outstanding, queries, errors = self.outstanding, self.queries, self.errors
+
+        def rounded(p):
+            value = percentile(latencies, p)
+            return round(value, 1) if value is not None else None
+
+        return {
+            "name": self.name,
+            "role": "primary" if self.is_primary else "replica",
+            "host": self.config.get('host'),
+            "available": self.available,
+            "outstanding": outstanding,
+            "pool_max": self.pool_max,
+            "queries": queries,
+            "errors": errors,
+            "lag_seconds": self.lag_seconds,
+            "p50_ms": rounded(0.50),
+            "p95_ms": rounded(0.95)
+        }
+
+
+class DatabaseRouter:
+    """읽기 쿼리를 복제본에 분산하고 필요 시 primary로 대체"""
+
+    def __init__(self, primary_config: Dict[str, Any] = DB_CONFIG,
+                 replica_configs: List[Dict[str, Any]] = DB_REPLICAS,
+                 strategy: str = DB_ROUTING_STRATEGY,
+                 max_lag_seconds: float = DB_MAX_REPLICATION_LAG):
+        self.primary = Endpoint('primary', primary_config, is_primary=True)
+        self.replicas = [
+            Endpoint(f'replica-{i}', dict(primary_config, **replica), is_primary=False)
+            for i, replica in enumerate(replica_configs, 1)
+        ]
+        self.strategy = strategy
+        self.max_lag_seconds = max_lag_seconds
+        self._round_robin = itertools.count()
+
+    def _candidates(self) -> List[Endpoint]:
+        """사용 가능한 복제본을 우선순위 순서로 반환"""
+        replicas = [
+            r for r in self.replicas
+            if r.available and (r.lag_seconds is None or r.lag_is_stale()
+                                or r.lag_seconds <= self.max_lag_seconds)
+        ]
+        if not replicas:
+            return []
+        offset = next(self._round_robin) % len(replicas)
+        replicas = replicas[offset:] + replicas[:offset]
+        if self.strategy == 'least_outstanding':
+            # 정렬은 안정적이므로 같은 부하에서는 라운드 로빈 순서 유지
+            replicas.sort(key=lambda r: r.outstanding)
+        return replicas
+
+    def _acquire(self):
+        """
+        (엔드포인트, 연결) 반환. 복제본이 모두 부적합하면 primary 사용
+
+        복제본은 기다리지 않고 빈 자리만 확인하며, 제한 시간까지 기다리는 것은 마지막 primary뿐입니다.
+        """
+        for replica in self._candidates():
+            try:
+                conn = replica.acquire(timeout=0)
+            except PoolTimeout:
+                # 바쁜 복제본은 건너뛰기만 함 (연결 실패일 때만 일정 시간 제외)
+                continue
+            except psycopg2.Error:
+                replica.mark_down()
+                continue
+            try:
+                if replica.lag_is_stale() and replica.check_lag(conn) > self.max_lag_seconds:
+                    replica.release(conn)
+                    continue
+            except psycopg2.Error:
+                replica.mark_down()
+                replica.release(conn, failed=True)
+                continue
+            return replica, conn
+        return self.primary, self.primary.acquire()
+
+    @contextmanager
+    def connection(self):
+        """
+        읽기 전용 풀 연결 제공
+
+        블록이 끝나면 트랜잭션을 롤백하고 연결을 풀에 반환하며,
+        블록 실행 시간을 엔드포인트별 지연 시간으로 기록합니다.
+        """
+        endpoint, conn = self._acquire()
+        start_time = time.perf_counter()
+        failed = False
+        try:
+            yield conn
+        except Exception:
+            failed = True
+            raise
+        finally:
+            latency_ms = (time.perf_counter() - start_time) * 1000
+            endpoint.release(conn, latency_ms, failed)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """엔드포인트별 통계"""
+        return [endpoint.stats() for endpoint in [self.primary] + self.replicas]
+
+
+_default_router: Optional[DatabaseRouter] = None
+_default_lock = threading.Lock()
+
+
+def get_default_router() -> DatabaseRouter:
+    """프로세스 전체에서 공유하는 라우터 (연결 풀 공유)"""
+    global _default_router
+    with _default_lock:
+        if _default_router is None:
+            _default_router = DatabaseRouter()
+        return _default_router
@@ -0,0 +1,224 @@
+"""
+혈당 예측
+사용자의 전체 혈당/센서 기록을 NumPy로 구간 평균한 뒤 이동 평균, 지수 평활, 시간대별 계절 프로필로
+예측값과 예측 구간을 계산합니다. 결과는 사용자별로 캐시하고 새 측정값이 들어오면 다시 계산합니다.
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+import config
+
+FORECAST_TIMEZONE = getattr(config, 'FORECAST_TIMEZONE', 'Asia/Seoul')
+FORECAST_CACHE_SIZE = getattr(config, 'FORECAST_CACHE_SIZE', 256)
+FORECAST_MAX_HORIZON_HOURS = getattr(config, 'FORECAST_MAX_HORIZON_HOURS', 72)
+
+HOUR = 3600
+DAY = 24 * HOUR
+# 이동 평균 구간 수, 지수 평활 alpha 후보
+MOVING_AVERAGE_WINDOW = 6
+ALPHAS = np.linspace(0.05, 0.95, 19)
+Z80 = 1.2816
+Z95 = 1.96
+
+# 시각은 FORECAST_TIMEZONE 현지 시각을 UTC처럼 취급한 epoch (시간대별 프로필과 출력 시각이 현지 기준)
+# 센서 로그(연속 측정): 시간 단위로 묶고 하루 24시간 주기 사용
+SENSOR_SERIES_SQL = """
+    SELECT EXTRACT(EPOCH FROM msrmt_dt AT TIME ZONE %s), CAST(analog_glucose AS DOUBLE PRECISION)
+    FROM agent.tb_sensor_log
+    WHERE user_uuid = %s AND analog_glucose ~ '^[0-9]+(\\.[0-9]+)?$'
+"""
+# 혈당 측정 기록(일 단위): 하루 단위로 묶고 7일 주기 사용
+GLUCOSE_SERIES_SQL = """
+    SELECT EXTRACT(EPOCH FROM TO_DATE(msrmt_ymd, 'YYYYMMDD')::timestamp),
+           CAST(SUBSTRING(bs_rslt_cn FROM 'Glucose Level: ([0-9]+)') AS DOUBLE PRECISION)
+    FROM agent.tb_glucose_msrmt
+    WHERE user_uuid = %s AND bs_rslt_cn ~ 'Glucose Level: [0-9]+'
+"""
+# 캐시 무효화 기준: 테이블별 (최근 reg_dt, 행 수)
+VERSION_SQL = """
+    SELECT
+        (SELECT MAX(reg_dt)::text || '/' || COUNT(*) FROM agent.tb_sensor_log WHERE user_uuid = %s),
+        (SELECT MAX(reg_dt)::text || '/' || COUNT(*) FROM agent.tb_glucose_msrmt WHERE user_uuid = %s)
+"""
+
+
+def resample(epochs: np.ndarray, values: np.ndarray, step: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    측정값을 step초 구간 평균으로 변환 (측정이 없는 구간은 제외)
+
+    Returns:
+        (구간 시작 시각, 구간 평균) - 시각 순 정렬
+    """
+    buckets = np.floor(epochs / step).astype(np.int64)
+    unique, inverse = np.unique(buckets, return_inverse=True)
+    sums = np.bincount(inverse, weights=values)
+    counts = np.bincount(inverse)
+    return unique * step, sums / counts
+
+
+def seasonal_profile(starts: np.ndarray, means: np.ndarray, step: int, period: int) -> np.ndarray:
+    """
+    주기 내 위치(시간대, 요일)별 평균 편차
+
+    주기가 두 번 이상 관측되지 않았으면 0 프로필을 반환합니다.
+    """
+    if starts.size == 0 or (starts[-1] - starts[0]) < 2 * period * step:
+        return np.zeros(period)
+    phase = (starts // step) % period
+    deviation = means - means.mean()
+    sums = np.bincount(phase, weights=deviation, minlength=period)
+    counts = np.bincount(phase, minlength=period)
+    return np.divide(sums, counts, out=np.zeros(period), where=counts > 0)
+
+
+def fit_exponential_smoothing(series: np.ndarray) -> Tuple[float, float, float]:
+    """
+    단순 지수 평활 - alpha 후보 전체를 한 번에 갱신하며 한 단계 예측 오차가 가장 작은 값 선택
+
+    Returns:
+        (alpha, 마지막 수준, 한 단계 예측 오차 표준편차)
+    """
+    level = np.full(ALPHAS.shape, series[0])
+    sse = np.zeros(ALPHAS.shape)
+    for value in series[1:]:
+        error = value - level
+        sse += error * error
+        level += ALPHAS * error
+    best = int(np.argmin(sse))
+    sigma = float(np.sqrt(sse[best] / max(1, series.size - 1)))
+    return float(ALPHAS[best]), float(level[best]), sigma
+
+
+def forecast_series(starts: np.ndarray, means: np.ndarray, step: int, period: int,
+                    horizon: int) -> Dict[str, Any]:
+    """
+    구간 평균 시계열 예측
+
+    계절 프로필을 뺀 시계열에 지수 평활을 적용하고, 미래 구간의 프로필을 더해 예측합니다.
+    h 단계 예측 구간은 sigma * sqrt(1 + (h - 1) * alpha^2)로 넓어집니다.
+    """
+    profile = seasonal_profile(starts, means, step, period)
+    phase = (starts // step) % period
+    adjusted = means - profile[phase]
+    alpha, level, sigma = fit_exponential_smoothing(adjusted)
+
+    future = starts[-1] + step * np.arange(1, horizon + 1)
+    steps_ahead = np.arange(1, horizon + 1)
+    point = level + profile[(future // step) % period]
+    spread = sigma * np.sqrt(1 + (steps_ahead - 1) * alpha ** 2)
+
+    window = means[-MOVING_AVERAGE_WINDOW:]
+    return {
+        "models": {
+            "moving_average": round(float(window.mean()), 1),
+            "moving_average_window": int(window.size),
+            "exp_smoothing_alpha": round(alpha, 2),
+            "exp_smoothing_level": round(level, 1),
+            "seasonal_amplitude": round(float(profile.max() - profile.min()), 1),
+            "residual_std": round(sigma, 1)
+        },
+        "forecast": [
+            {
+                "time": datetime.fromtimestamp(int(t), tz=timezone.utc).strftime('%Y-%m-%d %H:%M'),
+                "value": round(float(p), 1),
+                "lower_80": round(float(p - Z80 * s), 1),
+                "upper_80": round(float(p + Z80 * s), 1),
+                "lower_95": round(float(p - Z95 * s), 1),
+                "upper_95": round(float(p + Z95 * s), 1)
+            }
+            for t, p, s in zip(future, point, spread)
+        ]
+    }
+
+
+class GlucoseForecaster:
+    """
+    사용자별 혈당 예측 (결과 캐시)
+
+    센서 로그가 있으면 시간 단위, 없으면 혈당 측정 기록으로 일 단위 예측을 합니다.
+    캐시는 (사용자, 예측 길이)별로 보관하고, 테이블별 최근 reg_dt와 행 수가 바뀌면 무효화합니다.
+    """
+
+    def __init__(self, tool, cache_size: int = FORECAST_CACHE_SIZE):
+        """
+        Args:
+            tool: 연결을 제공할 TextToSQLTool (승인 제어, 연결 풀 공유)
+            cache_size: 캐시할 최대 (사용자, 예측 길이) 수
+        """
+        self.tool = tool
+        self.cache_size = cache_size
+        self.cache: "OrderedDict[Tuple[str, int], Tuple[tuple, Dict[str, Any]]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _load_series(self, cur, user_uuid: str) -> Tuple[str, np.ndarray, np.ndarray]:
+        cur.execute(SENSOR_SERIES_SQL, (FORECAST_TIMEZONE, user_uuid))
+        rows = cur.fetchall()
+        source = 'tb_sensor_log'
+        if not rows:
+            cur.execute(GLUCOSE_SERIES_SQL, (user_uuid,))
+            rows = cur.fetchall()
+            source = 'tb_glucose_msrmt'
+        data = np.array(rows, dtype=np.float64).reshape(-1, 2)
+        return source, data[:, 0], data[:, 1]
+
+    def forecast(self, user_uuid: str, horizon_hours: int = 24,
+                 session_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        사용자 혈당 예측
+
+        Args:
+            user_uuid: 사용자 UUID
+            horizon_hours: 예측 기간 (시간, 최대 FORECAST_MAX_HORIZON_HOURS)
+            session_id: 요청한 세션 ID (승인 제어용)
+
+        Returns:
+            success, source, observations, models, forecast (시각별 예측값과 80/95% 구간)
+        """
+        horizon_hours = max(1, min(int(horizon_hours), FORECAST_MAX_HORIZON_HOURS))
+        key = (user_uuid, horizon_hours)
+        with self.tool.get_connection(session_id) as conn:
+            with conn.cursor() as cur:
+                cur.execute(VERSION_SQL, (user_uuid, user_uuid))
+                version = cur.fetchone()
+                with self.lock:
+                    cached = self.cache.get(key)
+                    if cached and cached[0] == version:
+                        self.cache.move_to_end(key)
+                        return dict(cached[1], cached=True)
+                source, epochs, values = self._load_series(cur, user_uuid)
+
+        if values.size < 3:
+            return {
+                "success": False,
+                "error": f"예측에 필요한 측정값이 부족합니다 ({values.size}건).",
+                "user_uuid": user_uuid
+            }
+
+        if source == 'tb_sensor_log':
+            step, period, horizon, unit = HOUR, 24, horizon_hours, 'hour'
+        else:
+            step, period, horizon, unit = DAY, 7, max(1, -(-horizon_hours // 24)), 'day'
+        starts, means = resample(epochs, values, step)
+        result = {
+            "success": True,
+            "user_uuid": user_uuid,
+            "source": source,
+            "unit": unit,
+            "observations": int(values.size),
+            "last_observed": datetime.fromtimestamp(int(epochs.max()), tz=timezone.utc)
+                                     .strftime('%Y-%m-%d %H:%M'),
+            "recent_mean": round(float(means[-MOVING_AVERAGE_WINDOW:].mean()), 1),
+            "cached": False
+        }
+        result.update(forecast_series(starts, means, step, period, horizon))
+
+        with self.lock:
+            self.cache[key] = (version, result)
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return result
@@ -0,0 +1,298 @@
+"""
+운영 메트릭
+쿼리 수, 지연 시간, 행 수, 직렬화 크기, 거절, 캐시 적중, 연결 풀, 모델 호출, 턴당 토큰을
+카운터와 히스토그램으로 집계하고 Prometheus 텍스트 형식으로 내보냅니다.
+기록은 잠금 한 번과 정수 덧셈뿐이며, 연결 풀처럼 상태를 읽으면 되는 값은 내보낼 때 계산합니다.
+"""
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import config
+
+METRICS_ENABLED = getattr(config, 'METRICS_ENABLED', True)
+# 0이면 HTTP 엔드포인트를 열지 않음 (API 서버는 /metrics로 제공)
+METRICS_PORT = getattr(config, 'METRICS_PORT', 0)
+METRICS_HOST = getattr(config, 'METRICS_HOST', '127.0.0.1')
+METRICS_PREFIX = 'health_agent_'
+
+# 기본 버킷: 초 단위 지연 시간
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+COUNT_BUCKETS = (0, 1, 5, 10, 20, 50, 100, 1000, 10000, 100000)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+TOKEN_BUCKETS = (100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 200000)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def percentile(sorted_values: Sequence[float], p: float) -> Optional[float]:
+    """
+    정렬된 값의 p 분위수 (최근접 순위, 값이 없으면 None)
+
+    Args:
+        sorted_values: 오름차순 정렬된 값
+        p: 0~1 사이 분위 (0.95 -> p95)
+    """
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: str = '') -> str:
+    pairs = [
+        f'{name}="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """레이블별 누적 카운터"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), enabled: bool = True):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.enabled = enabled
+        self.values: Dict[Tuple, float] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, labels: Tuple = (), value: float = 1):
+        """
+        Args:
+            labels: 레이블 값 (선언한 labels 순서)
+            value: 증가량
+        """
+        if not self.enabled:
+            return
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + value
+
+    def samples(self) -> List[Tuple[str, Tuple, float]]:
+        with self.lock:
+            return [('', labels, value) for labels, value in sorted(self.values.items())]
+
+    def summary(self) -> Dict[Tuple, float]:
+        with self.lock:
+            return dict(self.values)
+
+
+class Histogram:
+    """레이블별 버킷 히스토그램 (관측값 합계와 개수 포함)"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS, enabled: bool = True):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self.enabled = enabled
+        # 레이블 -> [버킷별 개수(+Inf 포함, 누적 아님), 합계, 개수]
+        self.values: Dict[Tuple, list] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, labels: Tuple = ()):
+        if not self.enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            entry = self.values.get(labels)
+            if entry is None:
+                entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self) -> List[Tuple[str, Tuple, float]]:
+        with self.lock:
+            values = {labels: (list(counts), total, count)
+                      for labels, (counts, total, count) in self.values.items()}
+        samples = []
+        for labels, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                samples.append(('_bucket', labels + (bound,), cumulative))
+            samples.append(('_sum', labels, total))
+            samples.append(('_count', labels, count))
+        return samples
+
+    def summary(self) -> Dict[Tuple, Dict[str, Any]]:
+        """레이블별 개수, 평균, 버킷 기준 p50/p95 (해당 버킷의 상한)"""
+        with self.lock:
+            values = {labels: (list(counts), total, count)
+                      for labels, (counts, total, count) in self.values.items()}
+
+        def quantile(counts, count, q):
+            target = q * count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                if cumulative >= target:
+                    return bound
+            return float('inf')
+
+        return {
+            labels: {
+                "count": count,
+                "mean": total / count if count else None,
+                "p50": quantile(counts, count, 0.50) if count else None,
+                "p95": quantile(counts, count, 0.95) if count else None
+            }
+            for labels, (counts, total, count) in values.items()
+        }
+
+
+class Gauge:
+    """내보낼 때 함수를 호출해 읽는 현재 값 (func는 {레이블 값 튜플: 값} 반환)"""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str],
+                 func: Callable[[], Dict[Tuple, float]]):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.func = func
+
+    def samples(self) -> List[Tuple[str, Tuple, float]]:
+        try:
+            values = self.func()
+        except Exception:
+            # 상태를 읽지 못해도 나머지 메트릭은 내보냄
+            return []
+        return [('', labels, value) for labels, value in sorted(values.items())]
+
+    def summary(self) -> Dict[Tuple, float]:
+        return {labels: value for _, labels, value in self.samples()}
+
+
+class MetricsRegistry:
+    """
+    메트릭 등록과 내보내기
+
+    같은 이름으로 다시 등록하면 기존 메트릭을 반환하므로 모듈마다 필요한 메트릭을 선언해도 됩니다.
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED, prefix: str = METRICS_PREFIX):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.metrics: Dict[str, Any] = {}
+        self.lock = threading.Lock()
+        self.server: Optional[ThreadingHTTPServer] = None
+
+    def _register(self, name: str, factory: Callable[[str], Any]):
+        full_name = self.prefix + name
+        with self.lock:
+            metric = self.metrics.get(full_name)
+            if metric is None:
+                metric = self.metrics[full_name] = factory(full_name)
+            return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(name, lambda full_name: Counter(full_name, help_text, labels, self.enabled))
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(
+            name, lambda full_name: Histogram(full_name, help_text, labels, buckets, self.enabled)
+        )
+
+    def gauge(self, name: str, help_text: str, labels: Sequence[str],
+              func: Callable[[], Dict[Tuple, float]]) -> Gauge:
+        return self._register(name, lambda full_name: Gauge(full_name, help_text, labels, func))
+
+    def render(self) -> str:
+        """Prometheus 텍스트 형식 (version 0.0.4)"""
+        with self.lock:
+            metrics = sorted(self.metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                if suffix == '_bucket':
+                    label_text = _format_labels(metric.labels, labels[:-1],
+                                                f'le="{_format_value(labels[-1])}"')
+                else:
+                    label_text = _format_labels(metric.labels, labels)
+                lines.append(f"{metric.name}{suffix}{label_text} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        화면 표시용 요약
+
+        Returns:
+            접두어를 뺀 메트릭 이름 -> {"kind", "labels", "values": {레이블 값 튜플: 값 또는 히스토그램 요약}}
+        """
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return {
+            metric.name[len(self.prefix):]: {
+                "kind": metric.kind,
+                "labels": metric.labels,
+                "values": metric.summary()
+            }
+            for metric in metrics
+        }
+
+    def start_http_server(self, port: int = METRICS_PORT, host: str = METRICS_HOST) -> Optional[ThreadingHTTPServer]:
+        """
+        /metrics HTTP 엔드포인트를 백그라운드 스레드로 시작 (프로세스당 한 번)
+
+        Returns:
+            시작한 서버 (port가 0이거나 메트릭이 꺼져 있으면 None)
+        """
+        if not port or not self.enabled:
+            return None
+        with self.lock:
+            if self.server is not None:
+                return self.server
+            registry = self
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split('?')[0] != '/metrics':
+                        self.send_error(404)
+                        return
+                    body = registry.render().encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', CONTENT_TYPE)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass
+
+            self.server = ThreadingHTTPServer((host, port), Handler)
+            self.server.daemon_threads = True
+            threading.Thread(target=self.server.serve_forever, name='metrics-http', daemon=True).start()
+            return self.server
+
+
+_default_registry: Optional[MetricsRegistry] = None
+_default_lock = threading.Lock()
+
+
+def get_default_registry() -> MetricsRegistry:
+    """프로세스 전체에서 공유하는 메트릭 레지스트리"""
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = MetricsRegistry()
+        return _default_registry
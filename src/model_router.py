@@ -0,0 +1,151 @@
+"""
+질문 유형에 따른 모델 라우팅
+단순 조회/집계 질문은 빠른 모델로, 추세/예측 분석은 대형 모델로 보냅니다.
+"""
+import re
+import threading
+from collections import deque
+from typing import Dict, Any
+
+import config
+from config import MODEL_ID
+from src.bedrock_client import get_bedrock_model
+from src.metrics import percentile
+
+# 'off': 항상 MODEL_ID 사용, 'rules': 키워드 규칙, 'model': 소형 모델 분류기
+MODEL_ROUTING = getattr(config, 'MODEL_ROUTING', 'off')
+FAST_MODEL_ID = getattr(config, 'FAST_MODEL_ID', 'anthropic.claude-3-haiku-20240307-v1:0')
+
+FAST = 'fast'
+LARGE = 'large'
+
+# 분석/추론이 필요한 질문 (대형 모델)
+ANALYSIS_PATTERN = re.compile(
+    r'분석|추세|경향|예측|전망|비교|패턴|상관|원인|이유|왜|평가|위험|권장|조언|이상이 있는지|'
+    r'analy|trend|predict|forecast|compare|pattern|why',
+    re.IGNORECASE
+)
+
+# 단순 조회/집계 질문 (빠른 모델)
+LOOKUP_PATTERN = re.compile(
+    r'찾아|검색|보여|알려|조회|세어|몇|개수|횟수|목록|평균|최대|최소|합계|'
+    r'find|show|list|count|lookup|average',
+    re.IGNORECASE
+)
+
+CLASSIFIER_PROMPT = """다음 질문을 분류하세요.
+- 사용자/데이터 조회, 개수, 평균 같은 단순 집계: LOOKUP
+- 추세 분석, 예측, 비교, 건강 상태 평가: ANALYSIS
+LOOKUP 또는 ANALYSIS 한 단어로만 답하세요.
+
+질문: {question}"""
+
+
+class RouteStats:
+    """경로별 지연 시간 및 결과 통계"""
+
+    def __init__(self, window: int = 500):
+        self.count = 0
+        self.errors = 0
+        self.escalations = 0
+        self.latencies = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, latency_ms: float, success: bool, escalated: bool = False):
+        with self.lock:
+            self.count += 1
+            self.latencies.append(latency_ms)
+            if not success:
+                self.errors += 1
+            if escalated:
+                self.escalations += 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self.lock:
+            latencies = sorted(self.latencies)
+            count, errors, escalations = self.count, self.errors, self.escalations
+
+        def rounded(p):
+            value = percentile(latencies, p)
+            return round(value, 1) if value is not None else None
+
+        return {
+            "count": count,
+            "errors": errors,
+            "escalations": escalations,
+            "p50_ms": rounded(0.50),
+            "p95_ms": rounded(0.95),
+            "max_ms": round(latencies[-1], 1) if latencies else None
+        }
+
+
+class ModelRouter:
+    """질문을 빠른 모델 또는 대형 모델로 라우팅"""
+
+    def __init__(self, mode: str = MODEL_ROUTING, fast_model_id: str = FAST_MODEL_ID,
+                 large_model_id: str = MODEL_ID):
+        self.mode = mode
+        self.model_ids = {FAST: fast_model_id, LARGE: large_model_id}
+        self.stats = {FAST: RouteStats(), LARGE: RouteStats()}
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode in ('rules', 'model')
+
+    def get_model(self, route: str):
+        """경로에 해당하는 공유 모델 반환"""
+        return get_bedrock_model(self.model_ids[route])
+
+    def classify(self, question: str) -> str:
+        """
+        질문을 분류하여 경로 반환
+
+        Args:
+            question: 사용자 질문
+
+        Returns:
+            'fast' 또는 'large'
+        """
+        if not self.enabled:
+            return LARGE
+        if self.mode == 'model':
+            try:
+                return self._classify_with_model(question)
+            except Exception:
+                # 분류기 실패 시 규칙 기반으로 대체
+                pass
+        return self._classify_with_rules(question)
+
+    def _classify_with_rules(self, question: str) -> str:
+        if ANALYSIS_PATTERN.search(question):
+            return LARGE
+        if LOOKUP_PATTERN.search(question):
+            return FAST
+        # 판단이 어려우면 대형 모델 사용
+        return LARGE
+
+    def _classify_with_model(self, question: str) -> str:
+        model = self.get_model(FAST)
+        if getattr(model, 'limiter', None) is not None:
+            model.limiter.acquire()
+        response = model.client.converse(
+            modelId=self.model_ids[FAST],
+            messages=[{
+                "role": "user",
+                "content": [{"text": CLASSIFIER_PROMPT.format(question=question)}]
+            }],
+            inferenceConfig={"maxTokens": 5, "temperature": 0}
+        )
+        answer = response["output"]["message"]["content"][0]["text"].strip().upper()
+        return FAST if answer.startswith('LOOKUP') else LARGE
+
+    def record(self, route: str, latency_ms: float, success: bool, escalated: bool = False):
+        """경로별 지연 시간 기록"""
+        self.stats[route].record(latency_ms, success, escalated)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """경로별 통계 요약"""
+        return {
+            route: dict(model_id=self.model_ids[route], **stats.summary())
+            for route, stats in self.stats.items()
+        }
@@ -0,0 +1,335 @@
+"""
+성능 테스트용 모델 스텁
+Bedrock을 호출하지 않고 정해진 도구 호출과 응답을 지연 시간과 함께 흉내내거나,
+실제 모델 응답을 카세트 파일에 기록해 두었다가 재생합니다.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional
+
+from strands.event_loop.streaming import process_stream
+from strands.models import Model
+from strands.tools.structured_output import convert_pydantic_to_tool_spec
+
+# 토큰 수 추정 시 글자 수 환산 비율
+CHARS_PER_TOKEN = 4
+
+
+def _message_text(message: Dict[str, Any]) -> str:
+    return "".join(block.get("text", "") for block in message.get("content", []))
+
+
+def _estimate_tokens(messages: List[Dict[str, Any]], system_prompt: Optional[str]) -> int:
+    size = len(system_prompt or "")
+    for message in messages:
+        size += len(json.dumps(message.get("content", []), ensure_ascii=False, default=str))
+    return max(1, size // CHARS_PER_TOKEN)
+
+
+def _metadata_event(input_tokens: int, output_tokens: int, latency_ms: int) -> Dict[str, Any]:
+    return {
+        "metadata": {
+            "usage": {
+                "inputTokens": input_tokens,
+                "outputTokens": output_tokens,
+                "totalTokens": input_tokens + output_tokens
+            },
+            "metrics": {"latencyMs": latency_ms}
+        }
+    }
+
+
+async def _structured_output_from_stream(model: Model, output_model, prompt, system_prompt=None, **kwargs):
+    """
+    output_model을 도구로 주고 model.stream()을 실행해 그 도구 입력으로 결과를 만듦
+
+    BedrockModel.structured_output과 같은 방식이므로 RecordingModel이 기록한 요청을
+    ReplayModel이 같은 요청 키로 재생할 수 있습니다.
+    """
+    tool_spec = convert_pydantic_to_tool_spec(output_model)
+    event = None
+    async for event in process_stream(model.stream(prompt, [tool_spec], system_prompt,
+                                                   tool_choice={"any": {}}, **kwargs)):
+        yield event
+    if event is None or "stop" not in event:
+        raise ValueError("모델 응답이 끝나지 않았습니다.")
+    _, message, _, _ = event["stop"]
+    for block in message["content"]:
+        tool_use = block.get("toolUse")
+        if tool_use and tool_use["name"] == tool_spec["name"]:
+            yield {"output": output_model(**tool_use["input"])}
+            return
+    raise ValueError(f"모델이 '{tool_spec['name']}' 도구를 호출하지 않았습니다.")
+
+
+def _forced_tool(tool_specs: Optional[List[Dict[str, Any]]],
+                 tool_choice: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """tool_choice가 도구 호출을 강제하면 그 도구 명세 (structured_output 요청)"""
+    if not tool_specs or not tool_choice:
+        return None
+    if "tool" in tool_choice:
+        return next((spec for spec in tool_specs if spec["name"] == tool_choice["tool"].get("name")), None)
+    if "any" in tool_choice:
+        return tool_specs[0]
+    return None
+
+
+def _placeholder_input(tool_spec: Dict[str, Any]) -> Dict[str, Any]:
+    """도구 입력 스키마의 필수 항목을 기본값, 열거형 첫 값 또는 타입별 빈 값으로 채움"""
+    schema = tool_spec.get("inputSchema", {}).get("json", {})
+    empty = {"string": "", "integer": 0, "number": 0, "boolean": False, "array": [], "object": {}}
+    tool_input = {}
+    for name in schema.get("required", []):
+        prop = schema.get("properties", {}).get(name, {})
+        if "default" in prop:
+            tool_input[name] = prop["default"]
+        elif prop.get("enum"):
+            tool_input[name] = prop["enum"][0]
+        else:
+            tool_input[name] = empty.get(prop.get("type"))
+    return tool_input
+
+
+class ScriptedModel(Model):
+    """
+    스크립트대로 도구를 호출하는 스텁 모델
+
+    script(question)은 이번 턴에 호출할 도구 목록 [(도구 이름, 입력 딕셔너리), ...]을
+    반환합니다. 모델 호출마다 도구를 하나씩 요청하고, 모두 호출한 뒤에는 도구 결과를
+    요약한 텍스트로 턴을 끝냅니다.
+
+    structured_output은 출력 모델 도구를 호출하는 응답으로 흉내냅니다. 스크립트에 그 도구
+    이름의 항목이 있으면 그 입력을 쓰고, 없으면 스키마의 기본값으로 입력을 채웁니다.
+    """
+
+    def __init__(self, script: Callable[[str], List[tuple]], latency_ms: float = 800,
+                 jitter_ms: float = 200, seed: Optional[int] = None):
+        self.config = {"model_id": "scripted-stub", "latency_ms": latency_ms, "jitter_ms": jitter_ms}
+        self.script = script
+        self.random = random.Random(seed)
+
+    def update_config(self, **model_config):
+        self.config.update(model_config)
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.config
+
+    def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        return _structured_output_from_stream(self, output_model, prompt, system_prompt, **kwargs)
+
+    def _current_turn(self, messages: List[Dict[str, Any]]):
+        """(마지막 사용자 질문, 이번 턴에 이미 호출한 도구 수, 마지막 도구 결과)"""
+        tool_calls = 0
+        last_result = None
+        for message in reversed(messages):
+            content = message.get("content", [])
+            if message["role"] == "user" and any("text" in block for block in content):
+                return _message_text(message), tool_calls, last_result
+            if message["role"] == "assistant":
+                tool_calls += sum(1 for block in content if "toolUse" in block)
+            elif last_result is None:
+                for block in content:
+                    if "toolResult" in block:
+                        last_result = block["toolResult"]
+        return "", tool_calls, last_result
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None,
+                     **kwargs) -> AsyncGenerator[Dict[str, Any], None]:
+        latency = max(0.0, self.config["latency_ms"] + self.random.uniform(
+            -self.config["jitter_ms"], self.config["jitter_ms"]))
+        await asyncio.sleep(latency / 1000)
+
+        question, tool_calls, last_result = self._current_turn(messages)
+        planned = self.script(question)
+        input_tokens = _estimate_tokens(messages, system_prompt)
+        forced = _forced_tool(tool_specs, kwargs.get("tool_choice"))
+
+        yield {"messageStart": {"role": "assistant"}}
+        if forced is not None or tool_calls < len(planned):
+            if forced is not None:
+                # structured_output: 스크립트의 같은 이름 항목 입력, 없으면 스키마 기본값
+                name = forced["name"]
+                tool_input = next((planned_input for planned_name, planned_input in planned
+                                   if planned_name == name), None)
+                if tool_input is None:
+                    tool_input = _placeholder_input(forced)
+            else:
+                name, tool_input = planned[tool_calls]
+            payload = json.dumps(tool_input, ensure_ascii=False)
+            yield {"contentBlockStart": {"start": {"toolUse": {
+                "toolUseId": f"tooluse_{uuid.uuid4().hex[:16]}", "name": name
+            }}}}
+            yield {"contentBlockDelta": {"delta": {"toolUse": {"input": payload}}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "tool_use"}}
+            yield _metadata_event(input_tokens, len(payload) // CHARS_PER_TOKEN + 1, int(latency))
+            return
+
+        result_text = ""
+        if last_result:
+            result_text = "".join(block.get("text", "") for block in last_result.get("content", []))
+        answer = f"'{question}'에 대한 조회 결과입니다.\n{result_text[:300]}"
+        yield {"contentBlockStart": {"start": {}}}
+        yield {"contentBlockDelta": {"delta": {"text": answer}}}
+        yield {"contentBlockStop": {}}
+        yield {"messageStop": {"stopReason": "end_turn"}}
+        yield _metadata_event(input_tokens, len(answer) // CHARS_PER_TOKEN + 1, int(latency))
+
+
+def request_fingerprint(messages: List[Dict[str, Any]], system_prompt: Optional[str] = None,
+                        tool_specs: Optional[List[Dict[str, Any]]] = None) -> str:
+    """
+    모델 요청 식별 키
+
+    사용자 텍스트, 도구 호출(이름, 입력), 도구 결과 상태만 사용하고 도구 결과 내용은
+    제외하므로 DB 데이터가 조금 달라도 같은 대화 흐름이면 같은 키가 됩니다.
+    """
+    parts = [system_prompt or "", ",".join(sorted(
+        spec.get("name", "") for spec in (tool_specs or [])
+    ))]
+    for message in messages:
+        for block in message.get("content", []):
+            if "text" in block:
+                parts.append(f"{message['role']}:text:{block['text']}")
+            elif "toolUse" in block:
+                tool_use = block["toolUse"]
+                parts.append(f"toolUse:{tool_use.get('name')}:"
+                             f"{json.dumps(tool_use.get('input'), ensure_ascii=False, sort_keys=True)}")
+            elif "toolResult" in block:
+                parts.append(f"toolResult:{block['toolResult'].get('status')}")
+    return hashlib.sha256("\n".join(parts).encode('utf-8')).hexdigest()[:32]
+
+
+class RecordingModel(Model):
+    """
+    실제 모델 호출을 그대로 전달하면서 요청/응답 이벤트를 카세트 파일에 기록
+
+    카세트는 JSONL 형식이며 모델 호출 한 번이 한 줄입니다.
+    structured_output도 이 모델의 stream()을 거치므로 함께 기록됩니다.
+    """
+
+    def __init__(self, inner: Model, cassette_path: str):
+        self.inner = inner
+        self.path = Path(cassette_path)
+        self.lock = threading.Lock()
+
+    def update_config(self, **model_config):
+        self.inner.update_config(**model_config)
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.inner.get_config()
+
+    def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        return _structured_output_from_stream(self, output_model, prompt, system_prompt, **kwargs)
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None,
+                     **kwargs) -> AsyncGenerator[Dict[str, Any], None]:
+        key = request_fingerprint(messages, system_prompt, tool_specs)
+        events = []
+        start_time = time.perf_counter()
+        async for event in self.inner.stream(messages, tool_specs, system_prompt, **kwargs):
+            events.append(event)
+            yield event
+
+        record = {
+            "key": key,
+            "model_id": self.get_config().get("model_id"),
+            "latency_ms": round((time.perf_counter() - start_time) * 1000, 1),
+            "events": events
+        }
+        # 턴의 첫 모델 호출이면 질문도 기록 (부하 테스트가 같은 질문 순서로 재생)
+        question = _message_text(messages[-1]) if messages and messages[-1]["role"] == "user" else ""
+        if question:
+            record["question"] = question
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self.lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+
+
+def cassette_questions(cassette_path: str) -> List[str]:
+    """
+    카세트에 기록된 사용자 질문 순서
+
+    모델 승격처럼 같은 턴을 다시 호출한 기록은 연속된 같은 질문이므로 한 번만 셉니다.
+    """
+    questions = []
+    with open(cassette_path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            question = json.loads(line).get("question")
+            if question and (not questions or questions[-1] != question):
+                questions.append(question)
+    return questions
+
+
+class ReplayModel(Model):
+    """
+    카세트 파일의 응답을 재생하는 모델 (네트워크 불필요)
+
+    요청 키가 일치하는 기록을 재생하고, 없으면 strict=False일 때 카세트의 기록을 순서대로
+    사용합니다. 같은 키의 기록(또는 카세트 전체)을 다 쓰면 처음부터 다시 재생하므로 한 카세트로
+    대화를 여러 번 반복할 수 있습니다. latency_ms를 지정하지 않으면 기록된 지연 시간에
+    latency_scale을 곱해 기다립니다. structured_output은 기록된 도구 호출 응답으로 결과를 만듭니다.
+    """
+
+    def __init__(self, cassette_path: str, latency_ms: Optional[float] = None,
+                 latency_scale: float = 1.0, strict: bool = False):
+        self.latency_ms = latency_ms
+        self.latency_scale = latency_scale
+        self.strict = strict
+        self.records = []
+        with open(cassette_path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    self.records.append(json.loads(line))
+        self.by_key: Dict[str, List[int]] = defaultdict(list)
+        for index, record in enumerate(self.records):
+            self.by_key[record["key"]].append(index)
+        # 키별 다음 재생 위치 (기록 수로 나눈 나머지로 순환)
+        self.key_position: Dict[str, int] = defaultdict(int)
+        self.next_index = 0
+        self.lock = threading.Lock()
+        model_id = self.records[0].get("model_id") if self.records else None
+        self.config = {"model_id": f"replay:{model_id}"}
+
+    def update_config(self, **model_config):
+        self.config.update(model_config)
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.config
+
+    def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        return _structured_output_from_stream(self, output_model, prompt, system_prompt, **kwargs)
+
+    def _take(self, key: str) -> Dict[str, Any]:
+        with self.lock:
+            candidates = self.by_key.get(key)
+            if candidates:
+                position = self.key_position[key]
+                self.key_position[key] = position + 1
+                return self.records[candidates[position % len(candidates)]]
+            if self.strict:
+                raise KeyError(f"카세트에 일치하는 요청이 없습니다: {key}")
+            if not self.records:
+                raise KeyError("카세트에 기록이 없습니다.")
+            record = self.records[self.next_index % len(self.records)]
+            self.next_index += 1
+            return record
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None,
+                     **kwargs) -> AsyncGenerator[Dict[str, Any], None]:
+        record = self._take(request_fingerprint(messages, system_prompt, tool_specs))
+        latency = self.latency_ms if self.latency_ms is not None else record.get("latency_ms", 0)
+        await asyncio.sleep(latency * self.latency_scale / 1000)
+        for event in record["events"]:
+            yield event
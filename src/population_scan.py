@@ -0,0 +1,290 @@
+"""
+전체 사용자 혈당 이상 스캔
+사용자를 묶음 단위로 나누어 프로세스 풀에서 tb_sensor_log, tb_glucose_msrmt를 읽고,
+저혈당/고혈당 구간, 변동성(CV), 목표 범위 내 비율(TIR)을 NumPy로 한 번에 계산하여 요약 테이블에 저장합니다.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import psycopg2
+from psycopg2.extras import execute_values
+
+import config
+from config import DB_CONFIG
+from src.db_router import DB_REPLICAS
+
+GLUCOSE_LOW = getattr(config, 'GLUCOSE_LOW', 70)
+GLUCOSE_HIGH = getattr(config, 'GLUCOSE_HIGH', 140)
+SCAN_WINDOW_DAYS = getattr(config, 'SCAN_WINDOW_DAYS', 14)
+SCAN_CHUNK_USERS = getattr(config, 'SCAN_CHUNK_USERS', 200)
+SCAN_WORKERS = getattr(config, 'SCAN_WORKERS', 4)
+SCAN_SUMMARY_TABLE = getattr(config, 'SCAN_SUMMARY_TABLE', 'agent.tb_glucose_scan_summary')
+# 변동계수(%)가 이 값을 넘으면 변동성이 큰 것으로 판단
+SCAN_CV_THRESHOLD = getattr(config, 'SCAN_CV_THRESHOLD', 36)
+# 목표 범위 내 비율(%)이 이 값보다 낮으면 주의
+SCAN_TIR_THRESHOLD = getattr(config, 'SCAN_TIR_THRESHOLD', 70)
+
+# 소스별 조회 SQL과 구간(episode)으로 인정할 최소 연속 측정 수
+SOURCES = {
+    'tb_sensor_log': (
+        """
+        SELECT user_uuid, CAST(analog_glucose AS DOUBLE PRECISION)
+        FROM agent.tb_sensor_log
+        WHERE user_uuid = ANY(%s)
+          AND msrmt_dt >= now() - make_interval(days => %s)
+          AND analog_glucose ~ '^[0-9]+(\\.[0-9]+)?$'
+        ORDER BY user_uuid, msrmt_dt
+        """,
+        3
+    ),
+    'tb_glucose_msrmt': (
+        """
+        SELECT user_uuid, CAST(SUBSTRING(bs_rslt_cn FROM 'Glucose Level: ([0-9]+)') AS DOUBLE PRECISION)
+        FROM agent.tb_glucose_msrmt
+        WHERE user_uuid = ANY(%s)
+          AND msrmt_ymd >= to_char(current_date - %s, 'YYYYMMDD')
+          AND bs_rslt_cn ~ 'Glucose Level: [0-9]+'
+        ORDER BY user_uuid, msrmt_ymd
+        """,
+        1
+    ),
+}
+
+SUMMARY_COLUMNS = [
+    'user_uuid', 'source', 'readings', 'mean_glucose', 'std_glucose', 'cv_pct', 'min_glucose',
+    'max_glucose', 'tir_pct', 'hypo_episodes', 'hyper_episodes', 'attention_score', 'flags'
+]
+
+
+def _episode_counts(mask: np.ndarray, group_start: np.ndarray, group_of: np.ndarray,
+                    n_groups: int, min_length: int) -> np.ndarray:
+    """
+    사용자별로 mask가 연속 min_length회 이상 참인 구간 수
+
+    사용자 경계에서는 구간을 끊습니다.
+    """
+    previous = np.concatenate(([False], mask[:-1]))
+    run_start = mask & (group_start | ~previous)
+    if not run_start.any():
+        return np.zeros(n_groups, dtype=np.int64)
+    run_id = np.cumsum(run_start) - 1
+    lengths = np.bincount(run_id[mask], minlength=int(run_start.sum()))
+    run_group = group_of[run_start]
+    return np.bincount(run_group[lengths >= min_length], minlength=n_groups)
+
+
+def compute_metrics(user_uuids: Sequence[str], values: np.ndarray, min_episode: int,
+                    low: float = GLUCOSE_LOW, high: float = GLUCOSE_HIGH) -> List[Dict[str, Any]]:
+    """
+    사용자별 혈당 지표 계산 (사용자 순서로 묶이고 시간순으로 정렬된 측정값)
+
+    Args:
+        user_uuids: 측정값마다의 사용자 UUID
+        values: 혈당 값
+        min_episode: 저혈당/고혈당 구간으로 인정할 최소 연속 측정 수
+
+    Returns:
+        사용자별 지표 딕셔너리 목록
+    """
+    if values.size == 0:
+        return []
+    users = np.asarray(user_uuids)
+    group_start = np.concatenate(([True], users[1:] != users[:-1]))
+    starts = np.flatnonzero(group_start)
+    counts = np.diff(np.append(starts, values.size))
+    n_groups = starts.size
+    group_of = np.repeat(np.arange(n_groups), counts)
+
+    sums = np.add.reduceat(values, starts)
+    squares = np.add.reduceat(values * values, starts)
+    mean = sums / counts
+    std = np.sqrt(np.maximum(squares / counts - mean * mean, 0.0))
+    cv = np.divide(std * 100, mean, out=np.zeros(n_groups), where=mean > 0)
+    in_range = np.add.reduceat(((values >= low) & (values <= high)).astype(np.int64), starts)
+    tir = in_range * 100.0 / counts
+    minimum = np.minimum.reduceat(values, starts)
+    maximum = np.maximum.reduceat(values, starts)
+    hypo = _episode_counts(values < low, group_start, group_of, n_groups, min_episode)
+    hyper = _episode_counts(values > high, group_start, group_of, n_groups, min_episode)
+
+    # 저혈당을 가장 크게, 고혈당, 목표 범위 이탈, 변동성 순으로 가중
+    score = (hypo * 3.0 + hyper
+             + np.maximum(0, SCAN_TIR_THRESHOLD - tir) / 10
+             + np.maximum(0, cv - SCAN_CV_THRESHOLD) / 5)
+
+    results = []
+    for i in range(n_groups):
+        flags = []
+        if hypo[i]:
+            flags.append('hypo')
+        if hyper[i]:
+            flags.append('hyper')
+        if tir[i] < SCAN_TIR_THRESHOLD:
+            flags.append('low_tir')
+        if cv[i] > SCAN_CV_THRESHOLD:
+            flags.append('high_variability')
+        results.append({
+            'user_uuid': str(users[starts[i]]),
+            'readings': int(counts[i]),
+            'mean_glucose': round(float(mean[i]), 1),
+            'std_glucose': round(float(std[i]), 1),
+            'cv_pct': round(float(cv[i]), 1),
+            'min_glucose': float(minimum[i]),
+            'max_glucose': float(maximum[i]),
+            'tir_pct': round(float(tir[i]), 1),
+            'hypo_episodes': int(hypo[i]),
+            'hyper_episodes': int(hyper[i]),
+            'attention_score': round(float(score[i]), 2),
+            'flags': ','.join(flags)
+        })
+    return results
+
+
+def scan_chunk(user_uuids: List[str], window_days: int = SCAN_WINDOW_DAYS,
+               db_config: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    사용자 묶음 하나 스캔 (프로세스 풀 작업 단위, 작업마다 별도 연결 사용)
+
+    Args:
+        user_uuids: 스캔할 사용자 UUID 목록
+        window_days: 최근 며칠간의 측정값을 볼지
+        db_config: 연결 설정 (기본값: DB_CONFIG)
+
+    Returns:
+        (사용자, 소스)별 지표 목록
+    """
+    results = []
+    conn = psycopg2.connect(**(db_config or DB_CONFIG))
+    try:
+        conn.set_session(readonly=True)
+        with conn.cursor() as cur:
+            for source, (sql_query, min_episode) in SOURCES.items():
+                cur.execute(sql_query, (user_uuids, window_days))
+                rows = cur.fetchall()
+                if not rows:
+                    continue
+                users, values = zip(*rows)
+                for metrics in compute_metrics(users, np.array(values, dtype=np.float64), min_episode):
+                    metrics['source'] = source
+                    results.append(metrics)
+    finally:
+        conn.close()
+    return results
+
+
+SUMMARY_DDL = f"""
+CREATE TABLE IF NOT EXISTS {SCAN_SUMMARY_TABLE} (
+    user_uuid VARCHAR(32) NOT NULL,
+    source VARCHAR(30) NOT NULL,
+    readings INTEGER,
+    mean_glucose NUMERIC(6, 1),
+    std_glucose NUMERIC(6, 1),
+    cv_pct NUMERIC(6, 1),
+    min_glucose NUMERIC(6, 1),
+    max_glucose NUMERIC(6, 1),
+    tir_pct NUMERIC(5, 1),
+    hypo_episodes INTEGER,
+    hyper_episodes INTEGER,
+    attention_score NUMERIC(8, 2),
+    flags VARCHAR(100),
+    window_days INTEGER,
+    scanned_at TIMESTAMP NOT NULL DEFAULT now(),
+    PRIMARY KEY (user_uuid, source)
+)
+"""
+
+
+def write_summary(conn, results: List[Dict[str, Any]], window_days: int):
+    """요약 테이블을 이번 스캔 결과로 교체 ((사용자, 소스)별 덮어쓰기)"""
+    columns = SUMMARY_COLUMNS + ['window_days']
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns[2:])
+    with conn.cursor() as cur:
+        cur.execute(SUMMARY_DDL)
+        execute_values(
+            cur,
+            f"INSERT INTO {SCAN_SUMMARY_TABLE} ({', '.join(columns)}) VALUES %s "
+            f"ON CONFLICT (user_uuid, source) DO UPDATE SET {updates}, scanned_at = now()",
+            [tuple(r[c] for c in SUMMARY_COLUMNS) + (window_days,) for r in results],
+            page_size=1000
+        )
+        # 이번 스캔 기간에 측정값이 없는 사용자의 이전 결과 제거 (now()는 트랜잭션 시작 시각)
+        cur.execute(f"DELETE FROM {SCAN_SUMMARY_TABLE} WHERE scanned_at < now()")
+    conn.commit()
+
+
+def run_scan(workers: int = SCAN_WORKERS, chunk_users: int = SCAN_CHUNK_USERS,
+             window_days: int = SCAN_WINDOW_DAYS, progress=None) -> Dict[str, Any]:
+    """
+    전체 사용자 스캔 후 요약 테이블 갱신
+
+    Args:
+        workers: 프로세스 수
+        chunk_users: 작업 하나가 처리할 사용자 수
+        window_days: 최근 며칠간의 측정값을 볼지
+        progress: 묶음 하나가 끝날 때마다 호출할 함수 (완료 수, 전체 수)
+
+    Returns:
+        users, rows, flagged, elapsed
+    """
+    start_time = time.perf_counter()
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT user_uuid FROM agent.tb_user_info ORDER BY user_uuid")
+            user_uuids = [row[0] for row in cur.fetchall()]
+        chunks = [user_uuids[i:i + chunk_users] for i in range(0, len(user_uuids), chunk_users)]
+
+        results = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # 복제본이 있으면 묶음별로 돌아가며 읽어 운영 DB 부하를 줄임
+            sources = [dict(DB_CONFIG, **replica) for replica in DB_REPLICAS] or [DB_CONFIG]
+            futures = [
+                executor.submit(scan_chunk, chunk, window_days, sources[i % len(sources)])
+                for i, chunk in enumerate(chunks)
+            ]
+            for done, future in enumerate(as_completed(futures), 1):
+                results.extend(future.result())
+                if progress:
+                    progress(done, len(chunks))
+
+        write_summary(conn, results, window_days)
+    finally:
+        conn.close()
+
+    return {
+        "users": len(user_uuids),
+        "rows": len(results),
+        "flagged": sum(1 for r in results if r['flags']),
+        "elapsed": time.perf_counter() - start_time
+    }
+
+
+ATTENTION_SQL = f"""
+    SELECT s.user_uuid, u.flnm, s.source, s.readings, s.mean_glucose, s.cv_pct, s.tir_pct,
+           s.hypo_episodes, s.hyper_episodes, s.min_glucose, s.max_glucose,
+           s.attention_score, s.flags, s.window_days, s.scanned_at
+    FROM {SCAN_SUMMARY_TABLE} s
+    LEFT JOIN agent.tb_user_info u ON u.user_uuid = s.user_uuid
+    WHERE s.flags <> '' AND (%s IS NULL OR s.flags LIKE '%%' || %s || '%%')
+    ORDER BY s.attention_score DESC
+    LIMIT %s
+"""
+
+
+def load_attention_list(conn, limit: int = 10, flag: Optional[str] = None) -> Tuple[List[str], List[tuple]]:
+    """
+    주의가 필요한 사용자 목록 (점수 높은 순)
+
+    Args:
+        conn: 조회 연결
+        limit: 최대 사용자 수
+        flag: 'hypo' | 'hyper' | 'low_tir' | 'high_variability' 중 하나로 필터 (없으면 전체)
+
+    Returns:
+        (컬럼명 목록, 행 목록)
+    """
+    with conn.cursor() as cur:
+        cur.execute(ATTENTION_SQL, (flag, flag, limit))
+        return [desc.name for desc in cur.description], cur.fetchall()
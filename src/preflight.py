@@ -0,0 +1,310 @@
+"""
+시작 전 점검 (preflight)
+EC2 메타데이터, AWS 자격 증명, Bedrock, DB 점검을 동시에 실행하고 점검마다 제한 시간을 둡니다.
+성공한 결과는 짧은 시간 동안 파일에 캐시하여 스크립트를 다시 실행할 때 바로 보여줍니다.
+앱 시작 시에는 같은 실행기로 DB 연결 풀, 스키마/사용자 인덱스, Bedrock 클라이언트를 병렬로 준비합니다.
+"""
+import json
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import config
+
+PREFLIGHT_TIMEOUT = getattr(config, 'PREFLIGHT_TIMEOUT', 5)
+PREFLIGHT_CACHE_TTL = getattr(config, 'PREFLIGHT_CACHE_TTL', 300)
+PREFLIGHT_CACHE_PATH = getattr(
+    config, 'PREFLIGHT_CACHE_PATH', str(Path(tempfile.gettempdir()) / 'health_agent_preflight.json')
+)
+
+AWS_REGION = getattr(config, 'AWS_REGION', None) or 'us-east-1'
+IMDS_URL = 'http://169.254.169.254/latest'
+
+
+class Check(NamedTuple):
+    """점검 항목 (func(timeout)은 성공 시 상세 정보 dict를 반환하고 실패 시 예외 발생)"""
+    name: str
+    label: str
+    func: Callable[[float], Dict[str, Any]]
+    timeout: float = PREFLIGHT_TIMEOUT
+    requires: Tuple[str, ...] = ()
+    # 캐시 키에 포함할 설정 값 (바뀌면 캐시 무효)
+    cache_key: str = ''
+
+
+class CheckResult(NamedTuple):
+    name: str
+    label: str
+    status: str             # 'ok' | 'fail' | 'timeout' | 'skipped'
+    detail: Dict[str, Any]
+    error: Optional[str]
+    elapsed_ms: float
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 'ok'
+
+
+def _load_cache(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(path: str, cache: Dict[str, Any]):
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, default=str)
+    except OSError:
+        pass
+
+
+def run_checks(checks: List[Check], use_cache: bool = True, cache_ttl: float = PREFLIGHT_CACHE_TTL,
+               cache_path: Optional[str] = PREFLIGHT_CACHE_PATH) -> Dict[str, CheckResult]:
+    """
+    점검을 동시에 실행
+
+    requires에 적힌 점검이 성공해야 실행하며 (실패하면 skipped), 각 점검은 선행 점검이 끝난 시점부터
+    timeout초 안에 끝나야 합니다. 제한 시간을 넘긴 점검은 기다리지 않고 timeout으로 보고합니다.
+
+    Args:
+        checks: 점검 목록 (requires는 목록 안의 점검 이름)
+        use_cache: cache_ttl초 안에 성공한 결과가 있으면 다시 실행하지 않음 (False여도 결과는 캐시에 저장)
+        cache_ttl: 성공 결과 캐시 유지 시간 (초)
+        cache_path: 캐시 파일 경로 (None이면 캐시를 읽지도 저장하지도 않음)
+
+    Returns:
+        점검 이름 -> CheckResult (checks 순서)
+    """
+    cache = _load_cache(cache_path) if cache_path else {}
+    now = time.time()
+    results: Dict[str, CheckResult] = {}
+    lock = threading.Lock()
+    done = {check.name: threading.Event() for check in checks}
+
+    def cached_result(check: Check) -> Optional[CheckResult]:
+        entry = cache.get(check.name)
+        if entry and entry.get("key") == check.cache_key and now - entry["at"] < cache_ttl:
+            return CheckResult(check.name, check.label, 'ok', entry["detail"], None, 0.0, cached=True)
+        return None
+
+    def run(check: Check):
+        try:
+            for dependency in check.requires:
+                done[dependency].wait()
+                with lock:
+                    if not results[dependency].ok:
+                        results.setdefault(check.name, CheckResult(
+                            check.name, check.label, 'skipped', {},
+                            f"{results[dependency].label} 실패로 건너뜀", 0.0
+                        ))
+                        return
+            start_time = time.perf_counter()
+            try:
+                detail = check.func(check.timeout)
+                status, error = 'ok', None
+            except Exception as e:
+                detail, status, error = {}, 'fail', f"{type(e).__name__}: {e}"
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            with lock:
+                # 제한 시간이 지나 이미 timeout으로 보고된 점검은 덮어쓰지 않음
+                if check.name not in results:
+                    results[check.name] = CheckResult(check.name, check.label, status, detail or {},
+                                                      error, round(elapsed_ms, 1))
+        finally:
+            done[check.name].set()
+
+    pending = []
+    for check in checks:
+        result = cached_result(check) if use_cache and cache_path else None
+        if result is not None:
+            results[check.name] = result
+            done[check.name].set()
+        else:
+            pending.append(check)
+
+    # 데몬 스레드: 응답 없는 점검이 남아 있어도 기다리지 않고, 프로세스 종료도 막지 않음
+    # (ThreadPoolExecutor는 shutdown(wait=False)여도 종료 시 작업 스레드를 join함)
+    for check in pending:
+        threading.Thread(target=run, args=(check,), name=f'preflight-{check.name}', daemon=True).start()
+    start = time.monotonic()
+    deadlines: Dict[str, float] = {}
+    for check in pending:
+        deadline = check.timeout + max((deadlines.get(dep, 0.0) for dep in check.requires), default=0.0)
+        deadlines[check.name] = deadline
+        if not done[check.name].wait(timeout=max(0.0, start + deadline - time.monotonic())):
+            with lock:
+                if check.name not in results:
+                    results[check.name] = CheckResult(
+                        check.name, check.label, 'timeout', {}, f"{check.timeout:g}초 안에 응답 없음",
+                        round(check.timeout * 1000, 1)
+                    )
+            done[check.name].set()
+
+    if cache_path and pending:
+        for check in pending:
+            result = results[check.name]
+            if result.ok:
+                cache[check.name] = {"key": check.cache_key, "at": now, "detail": result.detail}
+            else:
+                cache.pop(check.name, None)
+        _save_cache(cache_path, cache)
+    return {check.name: results[check.name] for check in checks}
+
+
+# ---------------------------------------------------------------------------
+# 환경 점검
+# ---------------------------------------------------------------------------
+
+def _boto_config(timeout: float):
+    from botocore.config import Config as BotocoreConfig
+    return BotocoreConfig(connect_timeout=timeout, read_timeout=timeout,
+                          retries={'mode': 'standard', 'max_attempts': 1})
+
+
+def check_ec2_metadata(timeout: float) -> Dict[str, Any]:
+    """EC2 인스턴스 ID, 리전, IAM Role (IMDSv2, 안 되면 v1)"""
+    headers = {}
+    try:
+        request = urllib.request.Request(f'{IMDS_URL}/api/token', method='PUT',
+                                         headers={'X-aws-ec2-metadata-token-ttl-seconds': '60'})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            headers['X-aws-ec2-metadata-token'] = response.read().decode()
+    except OSError:
+        pass
+
+    def get(path: str) -> str:
+        request = urllib.request.Request(f'{IMDS_URL}/meta-data/{path}', headers=headers)
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.read().decode().strip()
+
+    detail = {"instance_id": get('instance-id'), "region": get('placement/region')}
+    detail["iam_role"] = get('iam/security-credentials/')
+    if not detail["iam_role"]:
+        raise RuntimeError(f"IAM Role이 연결되어 있지 않습니다 (인스턴스 {detail['instance_id']})")
+    return detail
+
+
+def check_aws_credentials(timeout: float) -> Dict[str, Any]:
+    """STS로 현재 자격 증명 확인"""
+    import boto3
+    identity = boto3.client('sts', region_name=AWS_REGION, config=_boto_config(timeout)).get_caller_identity()
+    return {"account": identity['Account'], "arn": identity['Arn'], "user_id": identity['UserId']}
+
+
+def check_bedrock_models(timeout: float) -> Dict[str, Any]:
+    """Bedrock 모델 목록 조회 (권한이 없어도 선택 항목이므로 성공으로 처리)"""
+    import boto3
+    from botocore.exceptions import ClientError
+    bedrock = boto3.client('bedrock', region_name=AWS_REGION, config=_boto_config(timeout))
+    try:
+        response = bedrock.list_foundation_models()
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'AccessDeniedException':
+            return {"note": "모델 목록 조회 권한 없음 (선택사항)"}
+        raise
+    claude_models = [m['modelId'] for m in response.get('modelSummaries', [])
+                     if 'claude' in m.get('modelId', '').lower()]
+    return {"claude_models": len(claude_models), "examples": claude_models[:3]}
+
+
+def check_bedrock_invoke(timeout: float) -> Dict[str, Any]:
+    """MODEL_ID로 최소 토큰 호출"""
+    import boto3
+    runtime = boto3.client('bedrock-runtime', region_name=AWS_REGION, config=_boto_config(timeout))
+    response = runtime.converse(
+        modelId=config.MODEL_ID,
+        messages=[{"role": "user", "content": [{"text": "Hello"}]}],
+        inferenceConfig={"maxTokens": 1}
+    )
+    return {"model_id": config.MODEL_ID, "latency_ms": response.get('metrics', {}).get('latencyMs')}
+
+
+def check_database(timeout: float) -> Dict[str, Any]:
+    """PostgreSQL 접속 및 사용자 테이블 조회 (풀을 거치지 않는 단독 연결)"""
+    import psycopg2
+    conn = psycopg2.connect(
+        **config.DB_CONFIG,
+        connect_timeout=max(1, int(timeout)),
+        options=f"-c statement_timeout={int(timeout * 1000)}"
+    )
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM agent.tb_user_info")
+            users = cur.fetchone()[0]
+            cur.execute("SHOW server_version")
+            version = cur.fetchone()[0]
+    finally:
+        conn.close()
+    return {"host": config.DB_CONFIG.get('host'), "users": users, "server_version": version}
+
+
+def environment_checks(timeout: float = PREFLIGHT_TIMEOUT) -> List[Check]:
+    """AWS/Bedrock/DB 환경 점검 목록 (Bedrock 점검은 자격 증명 확인 후 실행)"""
+    db = config.DB_CONFIG
+    db_key = f"{db.get('host')}:{db.get('port')}/{db.get('database') or db.get('dbname')}"
+    return [
+        Check('ec2_metadata', 'EC2 IAM Role', check_ec2_metadata, min(timeout, 2)),
+        Check('aws_credentials', 'AWS 자격 증명', check_aws_credentials, timeout, cache_key=AWS_REGION),
+        Check('bedrock_models', 'Bedrock 모델 목록', check_bedrock_models, timeout,
+              ('aws_credentials',), AWS_REGION),
+        Check('bedrock_invoke', 'Bedrock 모델 호출', check_bedrock_invoke, max(timeout, 15),
+              ('aws_credentials',), f"{AWS_REGION}/{config.MODEL_ID}"),
+        Check('database', '데이터베이스 연결', check_database, timeout, cache_key=db_key),
+    ]
+
+
+# ---------------------------------------------------------------------------
+# 앱 시작 준비 (warm-up)
+# ---------------------------------------------------------------------------
+
+def warm_up_checks(sql_tool, timeout: float = PREFLIGHT_TIMEOUT) -> List[Check]:
+    """
+    앱 시작 시 병렬로 준비할 항목
+
+    Args:
+        sql_tool: 준비할 TextToSQLTool (연결 풀, 사용자 인덱스 공유)
+    """
+    def warm_db_pool(timeout: float) -> Dict[str, Any]:
+        with sql_tool.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+        return {"endpoints": len(sql_tool.router.stats())}
+
+    def warm_schema(timeout: float) -> Dict[str, Any]:
+        detail = {"schema_chars": len(sql_tool.get_schema_description())}
+        if sql_tool.users is not None:
+            detail["users"] = sql_tool.users.refresh(full=True)
+        return detail
+
+    def warm_bedrock(timeout: float) -> Dict[str, Any]:
+        from src.bedrock_client import get_bedrock_model
+        model = get_bedrock_model()
+        return {"model_id": model.get_config().get("model_id")}
+
+    return [
+        Check('db_pool', 'DB 연결 풀', warm_db_pool, timeout),
+        Check('schema', '스키마/사용자 인덱스', warm_schema, max(timeout, 30)),
+        Check('bedrock_client', 'Bedrock 클라이언트', warm_bedrock, timeout),
+    ]
+
+
+def warm_up(sql_tool, timeout: float = PREFLIGHT_TIMEOUT) -> Dict[str, CheckResult]:
+    """연결 풀, 스키마/사용자 인덱스, Bedrock 클라이언트를 병렬로 준비 (캐시 사용 안 함)"""
+    return run_checks(warm_up_checks(sql_tool, timeout), cache_path=None)
+
+
+def format_result(result: CheckResult) -> str:
+    """한 줄 요약"""
+    mark = {'ok': '✓', 'fail': '✗', 'timeout': '⏱', 'skipped': '⊘'}[result.status]
+    suffix = " (캐시)" if result.cached else f" ({result.elapsed_ms:.0f} ms)"
+    text = f"{mark} {result.label}{suffix}"
+    if result.error:
+        text += f": {result.error}"
+    return text
@@ -0,0 +1,77 @@
+"""
+튜플 기반 쿼리 결과
+행마다 딕셔너리를 만들지 않고 컬럼 정보 하나와 행 튜플 목록으로 결과를 보관하며,
+딕셔너리는 필요한 곳에서만 지연 생성합니다.
+"""
+from collections import namedtuple
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+@lru_cache(maxsize=256)
+def row_type(columns: Tuple[str, ...]):
+    """
+    결과 형태(컬럼 목록)별 행 클래스 (namedtuple, 형태마다 한 번만 생성)
+
+    '?column?' 처럼 식별자가 아니거나 중복된 컬럼명은 _0, _1 ... 로 바뀌므로
+    이름으로 접근할 때는 ResultSet.columns 기준의 dicts()/column()을 사용하세요.
+    """
+    return namedtuple('Row', columns, rename=True)
+
+
+class ResultSet:
+    """
+    컬럼 정보 하나를 공유하는 행 튜플 목록
+
+    행을 딕셔너리 대신 튜플로 보관하므로 행마다 컬럼명 키와 해시 테이블을 갖지 않고,
+    커서가 반환한 튜플을 복사 없이 그대로 사용합니다.
+    """
+
+    __slots__ = ('columns', 'rows')
+
+    def __init__(self, columns: Sequence[str], rows: List[tuple]):
+        self.columns = tuple(columns)
+        self.rows = rows
+
+    @classmethod
+    def from_cursor(cls, cur, limit: Optional[int] = None) -> "ResultSet":
+        """
+        실행된 튜플 커서에서 결과 생성
+
+        Args:
+            cur: 실행된 커서 (서버 측 커서는 첫 fetch 후에 description이 채워짐)
+            limit: 최대 행 수 (None: 전체)
+        """
+        rows = cur.fetchall() if limit is None else cur.fetchmany(limit)
+        return cls([desc.name for desc in cur.description], rows)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[tuple]:
+        return map(row_type(self.columns)._make, self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ResultSet(self.columns, self.rows[index])
+        return row_type(self.columns)._make(self.rows[index])
+
+    def column(self, name: str) -> List[Any]:
+        """한 컬럼의 값 목록"""
+        position = self.columns.index(name)
+        return [row[position] for row in self.rows]
+
+    def dicts(self) -> Iterator[Dict[str, Any]]:
+        """행 딕셔너리를 하나씩 생성 (지연 생성)"""
+        columns = self.columns
+        for row in self.rows:
+            yield dict(zip(columns, row))
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """행 딕셔너리 목록 (records 형식)"""
+        return list(self.dicts())
+
+    def to_columns(self) -> Dict[str, List[Any]]:
+        """컬럼명 -> 값 리스트 (columns 형식)"""
+        values = list(zip(*self.rows)) if self.rows else [()] * len(self.columns)
+        return {name: list(col) for name, col in zip(self.columns, values)}
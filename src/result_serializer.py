@@ -0,0 +1,150 @@
+"""
+쿼리 결과 JSON 직렬화
+PostgreSQL 타입(timestamp, timestamptz, date, numeric, bytea 등)을 컬럼 단위로 미리 변환하여
+값마다 default 훅을 거치지 않고 직렬화합니다. orjson이 설치되어 있으면 사용합니다.
+"""
+import base64
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+from uuid import UUID
+
+import config
+from src.metrics import SIZE_BUCKETS, get_default_registry
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성
+    orjson = None
+
+# 'auto': orjson이 있으면 사용, 'orjson' 또는 'json': 지정한 백엔드 사용
+RESULT_JSON_BACKEND = getattr(config, 'RESULT_JSON_BACKEND', 'auto')
+
+SERIALIZED_BYTES = get_default_registry().histogram(
+    'serialized_bytes', "도구 응답 JSON 크기 (orjson은 UTF-8 바이트, json 백엔드는 문자 수)",
+    ('backend',), SIZE_BUCKETS
+)
+
+
+def _decimal(value: Decimal):
+    # 정수 값은 int로 유지하고, 나머지는 float (AVG 결과 등의 긴 소수 자릿수 축약)
+    # numeric의 NaN/Infinity는 null (json은 유효하지 않은 NaN 토큰을, orjson은 null을 쓰므로 백엔드와 무관하게 통일)
+    if not value.is_finite():
+        return None
+    if value == value.to_integral_value():
+        return int(value)
+    return float(value)
+
+
+def _bytes(value) -> str:
+    return base64.b64encode(bytes(value)).decode('ascii')
+
+
+# 타입별 변환 함수 (str()과 같은 형식을 유지: '2025-12-01 09:00:00+09:00')
+ENCODERS: Dict[type, Callable[[Any], Any]] = {
+    datetime: lambda v: v.isoformat(sep=' '),
+    date: date.isoformat,
+    time: time.isoformat,
+    timedelta: str,
+    Decimal: _decimal,
+    UUID: str,
+    bytes: _bytes,
+    memoryview: _bytes,
+    bytearray: _bytes,
+}
+
+
+def _encoder_for(value: Any) -> Optional[Callable[[Any], Any]]:
+    encoder = ENCODERS.get(type(value))
+    if encoder is None:
+        # 하위 클래스 (datetime이 date보다 먼저 확인되도록 ENCODERS 순서 유지)
+        for base, candidate in ENCODERS.items():
+            if isinstance(value, base):
+                return candidate
+    return encoder
+
+
+def _column_encoders(rows: List[Dict[str, Any]]) -> Dict[str, Callable[[Any], Any]]:
+    """컬럼마다 처음 나오는 NULL이 아닌 값의 타입으로 변환 함수 결정"""
+    encoders = {}
+    pending = set(rows[0].keys())
+    for row in rows:
+        for name in list(pending):
+            value = row.get(name)
+            if value is None:
+                continue
+            pending.discard(name)
+            encoder = _encoder_for(value)
+            if encoder is not None:
+                encoders[name] = encoder
+        if not pending:
+            break
+    return encoders
+
+
+def encode_records(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    행 딕셔너리 목록의 값을 JSON 기본 타입으로 변환 (제자리 변환)
+
+    PostgreSQL 컬럼은 타입이 하나이므로 변환 함수는 컬럼별로 한 번만 정하고,
+    변환이 필요한 컬럼만 순회합니다.
+    """
+    if not rows:
+        return rows
+    for name, encoder in _column_encoders(rows).items():
+        for row in rows:
+            value = row[name]
+            if value is not None:
+                row[name] = encoder(value)
+    return rows
+
+
+def encode_columns(data: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+    """컬럼 배열 형식({컬럼: [값, ...]})의 값을 JSON 기본 타입으로 변환 (제자리 변환)"""
+    for name, values in data.items():
+        sample = next((v for v in values if v is not None), None)
+        encoder = _encoder_for(sample) if sample is not None else None
+        if encoder is not None:
+            data[name] = [encoder(v) if v is not None else None for v in values]
+    return data
+
+
+def _fallback(value: Any) -> str:
+    # 컬럼 내 타입이 섞인 예외적인 경우의 안전장치
+    encoder = _encoder_for(value)
+    return encoder(value) if encoder is not None else str(value)
+
+
+def dumps(obj: Any, backend: str = RESULT_JSON_BACKEND) -> str:
+    """이미 변환된 객체를 들여쓰기 없는 JSON 문자열로 직렬화"""
+    if orjson is not None and backend in ('auto', 'orjson'):
+        try:
+            encoded = orjson.dumps(obj, default=_fallback)
+            SERIALIZED_BYTES.observe(len(encoded), ('orjson',))
+            return encoded.decode('utf-8')
+        except TypeError:
+            # 64비트 범위를 넘는 정수 등 orjson이 처리하지 못하는 값
+            pass
+    text = json.dumps(obj, ensure_ascii=False, default=_fallback, separators=(',', ':'))
+    SERIALIZED_BYTES.observe(len(text), ('json',))
+    return text
+
+
+def serialize_result(payload: Dict[str, Any], backend: str = RESULT_JSON_BACKEND) -> str:
+    """
+    도구 응답 딕셔너리를 JSON 문자열로 직렬화
+
+    payload["data"]가 행 딕셔너리 목록이면 행 단위로, 딕셔너리면 컬럼 배열로 보고
+    컬럼 단위 변환을 적용합니다. data의 값은 제자리에서 변환됩니다.
+
+    Args:
+        payload: success, data 등을 담은 도구 응답
+        backend: 'auto' | 'orjson' | 'json'
+    """
+    data = payload.get("data")
+    if isinstance(data, list) and data and isinstance(data[0], dict):
+        encode_records(data)
+    elif isinstance(data, dict):
+        encode_columns(data)
+    return dumps(payload, backend)
@@ -0,0 +1,139 @@
+"""
+Streamlit 세션용 대화 기록 저장소
+최근 메시지만 메모리에 두고, 오래된 메시지는 디스크로 내보냅니다.
+내보내기 결과 파일도 내용 대신 경로만 세션 상태에 둡니다.
+"""
+import json
+import os
+import shutil
+import tempfile
+import uuid
+import weakref
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+import config
+
+SESSION_MAX_MESSAGES = getattr(config, 'SESSION_MAX_MESSAGES', 40)
+SESSION_MAX_BYTES = getattr(config, 'SESSION_MAX_BYTES', 2 * 1024 * 1024)
+SESSION_SPILL_DIR = getattr(config, 'SESSION_SPILL_DIR', None)
+
+
+def _estimate_size(message: Dict[str, Any]) -> int:
+    """메시지가 차지하는 메모리 크기 추정 (바이트)"""
+    return len(message.get("content", "")) * 2 + len(message.get("sql", ""))
+
+
+class MessageStore:
+    """
+    메모리 상한이 있는 세션별 메시지 저장소
+
+    최근 메시지는 메모리에 유지하고, 개수(max_messages)나 추정 크기(max_bytes)를
+    넘으면 가장 오래된 메시지부터 세션 디렉터리의 JSONL 파일로 내보냅니다.
+    세션 디렉터리는 clear()나 저장소가 정리될 때(Streamlit 세션 종료, 프로세스 종료) 삭제됩니다.
+    """
+
+    def __init__(self, max_messages: int = SESSION_MAX_MESSAGES,
+                 max_bytes: int = SESSION_MAX_BYTES, spill_dir: Optional[str] = None):
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        base_dir = Path(spill_dir or SESSION_SPILL_DIR or Path(tempfile.gettempdir()) / 'health_agent_sessions')
+        self.dir = base_dir / uuid.uuid4().hex
+        self.recent: List[Dict[str, Any]] = []
+        self.recent_bytes = 0
+        # 디스크에 내보낸 메시지의 파일 오프셋 (인덱스 = 메시지 순번)
+        self.offsets: List[int] = []
+        # 세션 상태와 함께 저장소가 사라지면 디렉터리도 삭제 (종료 시에도 실행)
+        self._cleanup = weakref.finalize(self, shutil.rmtree, str(self.dir), True)
+
+    def __len__(self) -> int:
+        return len(self.offsets) + len(self.recent)
+
+    def append(self, message: Dict[str, Any]):
+        """메시지 추가 후 상한을 넘으면 오래된 메시지를 디스크로 내보냄"""
+        self.recent.append(message)
+        self.recent_bytes += _estimate_size(message)
+        while len(self.recent) > 1 and (
+            len(self.recent) > self.max_messages or self.recent_bytes > self.max_bytes
+        ):
+            self._spill(self.recent.pop(0))
+
+    def _spill(self, message: Dict[str, Any]):
+        """메시지 하나를 디스크에 기록"""
+        self.recent_bytes -= _estimate_size(message)
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+        record = dict(message)
+        if isinstance(record.get("timestamp"), datetime):
+            record["timestamp"] = record["timestamp"].isoformat()
+
+        with open(self.dir / "messages.jsonl", 'ab') as f:
+            self.offsets.append(f.tell())
+            f.write(json.dumps(record, ensure_ascii=False, default=str).encode('utf-8') + b"\n")
+
+    def _load(self, start: int, end: int) -> List[Dict[str, Any]]:
+        """디스크에 내보낸 메시지 [start, end)를 읽음"""
+        records = []
+        with open(self.dir / "messages.jsonl", 'rb') as f:
+            f.seek(self.offsets[start])
+            for _ in range(start, end):
+                record = json.loads(f.readline())
+                if record.get("timestamp"):
+                    record["timestamp"] = datetime.fromisoformat(record["timestamp"])
+                records.append(record)
+        return records
+
+    def tail(self, count: int) -> List[Dict[str, Any]]:
+        """
+        최근 count개 메시지를 오래된 순서로 반환
+
+        메모리에 없는 부분만 디스크에서 읽으므로 렌더링 비용은 전체 기록 길이가 아닌
+        count에 비례합니다.
+        """
+        count = min(count, len(self))
+        from_disk = count - len(self.recent)
+        if from_disk <= 0:
+            return self.recent[-count:] if count else []
+        start = len(self.offsets) - from_disk
+        return self._load(start, len(self.offsets)) + self.recent
+
+    def clear(self):
+        """모든 메시지와 디스크 파일 삭제"""
+        self.recent = []
+        self.recent_bytes = 0
+        self.offsets = []
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class ExportFile:
+    """
+    SQL 실행기 내보내기 결과 파일
+
+    세션 상태에는 경로와 메타데이터만 두고, 다운로드 버튼을 그릴 때 파일을 엽니다.
+    다운로드하면 remove()로 지우고, 받지 않은 채 세션 상태에서 사라지면(새 내보내기,
+    Streamlit 세션 종료, 프로세스 종료) 함께 삭제됩니다.
+    """
+
+    def __init__(self, path: str, name: str, mime: str, row_count: int, size_bytes: int):
+        self.path = path
+        self.name = name
+        self.mime = mime
+        self.row_count = row_count
+        self.size_bytes = size_bytes
+        self._cleanup = weakref.finalize(self, _remove_file, path)
+
+    def open(self):
+        """다운로드용 파일 핸들 (바이너리)"""
+        return open(self.path, 'rb')
+
+    def remove(self):
+        """파일 삭제 (여러 번 호출해도 됨)"""
+        self._cleanup()
@@ -0,0 +1,151 @@
+"""
+규칙 기반 SQL 자동 수정
+모델이 자주 틀리는 패턴(bs_rslt_cn에 JSON 연산자 사용, agent 스키마 누락, CHAR(8) msrmt_ymd와 날짜 비교)으로
+쿼리가 실패하면 SQL을 고쳐 한 번 다시 실행합니다. 모델이 오류를 읽고 다시 작성하는 왕복을 줄이기 위한 것입니다.
+"""
+import re
+from typing import List, NamedTuple, Optional
+
+import config
+from src.sql_shape import map_outside_literals
+
+SQL_REPAIR_ENABLED = getattr(config, 'SQL_REPAIR_ENABLED', True)
+
+TABLES = ('tb_user_info', 'tb_glucose_msrmt', 'tb_sensor_log')
+GLUCOSE_EXPR = "CAST(SUBSTRING({column} FROM 'Glucose Level: ([0-9]+)') AS INTEGER)"
+
+# 오류 분류 (PostgreSQL SQLSTATE, 메시지)
+UNDEFINED_FUNCTION = '42883'
+UNDEFINED_TABLE = '42P01'
+INVALID_TEXT_REPRESENTATION = '22P02'
+JSON_ERROR = re.compile(r'operator does not exist: text ->|invalid input syntax for type json', re.IGNORECASE)
+TABLE_ERROR = re.compile(r'relation "(?:' + '|'.join(TABLES) + r')" does not exist', re.IGNORECASE)
+DATE_ERROR = re.compile(
+    r'operator does not exist: (?:character|bpchar|text) \S+ (?:date|timestamp)|'
+    r'operator does not exist: (?:date|timestamp[\w ]*?) \S+ (?:character|bpchar)\b',
+    re.IGNORECASE
+)
+
+# 규칙은 문자열 리터럴과 주석을 자리표시자로 가린 쿼리에 적용 (리터럴 안의 텍스트는 고치지 않음)
+LITERAL = r"\x00\d+\x00"
+
+# bs_rslt_cn->>'...', bs_rslt_cn::json->'a'->>'b', (bs_rslt_cn::jsonb)->>'...'
+JSON_PATH = r"(?:\s*->>?\s*" + LITERAL + r")+"
+JSON_ACCESS = re.compile(
+    r"\(\s*((?:\w+\.)?bs_rslt_cn)\s*(?:::\s*jsonb?\s*)?\)" + JSON_PATH + r"|"
+    r"((?:\w+\.)?bs_rslt_cn)(?:\s*::\s*jsonb?)?" + JSON_PATH,
+    re.IGNORECASE
+)
+# 스키마 없이 참조한 테이블
+UNQUALIFIED_TABLE = re.compile(r'\b(from|join)\s+(' + '|'.join(TABLES) + r')\b', re.IGNORECASE)
+
+# 날짜 값 표현식: CURRENT_DATE - INTERVAL '7 days', '2025-12-01'::date, DATE '2025-12-01', NOW() 등
+DATE_EXPR = (
+    r"(?:current_date|current_timestamp|localtimestamp|now\s*\(\s*\)|"
+    r"(?:date|timestamp)\s*" + LITERAL + r"|" + LITERAL + r"\s*::\s*(?:date|timestamp)|"
+    r"(?:date|to_date)\s*\([^()]*\))"
+    r"(?:\s*[-+]\s*(?:interval\s*" + LITERAL + r"|\d+))*"
+)
+COMPARE_OP = r"(>=|<=|<>|!=|=|<|>)"
+YMD_COLUMN = r"((?:\w+\.)?msrmt_ymd)"
+YMD_COMPARE = re.compile(YMD_COLUMN + r"\s*" + COMPARE_OP + r"\s*(" + DATE_EXPR + r")", re.IGNORECASE)
+YMD_COMPARE_REVERSED = re.compile(r"(" + DATE_EXPR + r")\s*" + COMPARE_OP + r"\s*" + YMD_COLUMN + r"\b",
+                                  re.IGNORECASE)
+YMD_BETWEEN = re.compile(
+    YMD_COLUMN + r"\s+between\s+(" + DATE_EXPR + r")\s+and\s+(" + DATE_EXPR + r")", re.IGNORECASE
+)
+# 날짜 값을 알아볼 수 없을 때: 컬럼 쪽을 날짜로 변환
+YMD_OPERAND = re.compile(YMD_COLUMN + r"(?=\s*(?:>=|<=|<>|!=|=|<|>|between\b))|"
+                         r"(?<=[=<>])(\s*)" + YMD_COLUMN + r"\b", re.IGNORECASE)
+
+
+class Repair(NamedTuple):
+    sql: str
+    changes: List[str]
+
+
+def _to_char(expr: str) -> str:
+    return f"TO_CHAR({expr}, 'YYYYMMDD')"
+
+
+def _repair_json(sql_query: str) -> str:
+    return JSON_ACCESS.sub(lambda m: GLUCOSE_EXPR.format(column=m.group(1) or m.group(2)), sql_query)
+
+
+def _repair_schema(sql_query: str) -> str:
+    return UNQUALIFIED_TABLE.sub(lambda m: f"{m.group(1)} agent.{m.group(2)}", sql_query)
+
+
+def _repair_ymd(sql_query: str) -> str:
+    repaired = YMD_BETWEEN.sub(
+        lambda m: f"{m.group(1)} BETWEEN {_to_char(m.group(2))} AND {_to_char(m.group(3))}", sql_query
+    )
+    repaired = YMD_COMPARE.sub(lambda m: f"{m.group(1)} {m.group(2)} {_to_char(m.group(3))}", repaired)
+    repaired = YMD_COMPARE_REVERSED.sub(
+        lambda m: f"{_to_char(m.group(1))} {m.group(2)} {m.group(3)}", repaired
+    )
+    return repaired
+
+
+def _repair_ymd_column(sql_query: str) -> str:
+    return YMD_OPERAND.sub(
+        lambda m: (f"TO_DATE({m.group(1)}, 'YYYYMMDD')" if m.group(1)
+                   else f"{m.group(2)}TO_DATE({m.group(3)}, 'YYYYMMDD')"),
+        sql_query
+    )
+
+
+# (규칙, 설명)
+RULES = [
+    (_repair_json, "bs_rslt_cn은 JSON이 아닌 TEXT이므로 JSON 연산자를 "
+                   "CAST(SUBSTRING(bs_rslt_cn FROM 'Glucose Level: ([0-9]+)') AS INTEGER)로 변경"),
+    (_repair_schema, "테이블 이름에 agent 스키마 추가"),
+    (_repair_ymd, "msrmt_ymd는 CHAR(8) 'YYYYMMDD'이므로 비교할 날짜를 TO_CHAR(..., 'YYYYMMDD')로 변환"),
+]
+
+
+def is_repairable(error_code: Optional[str], error_message: str) -> bool:
+    """자동 수정 대상 오류인지 (JSON 연산자, 테이블 없음, 문자-날짜 비교)"""
+    if error_code == UNDEFINED_TABLE or TABLE_ERROR.search(error_message):
+        return True
+    if error_code in (UNDEFINED_FUNCTION, INVALID_TEXT_REPRESENTATION, None):
+        return bool(JSON_ERROR.search(error_message) or DATE_ERROR.search(error_message))
+    return False
+
+
+def repair_query(sql_query: str, error_code: Optional[str], error_message: str) -> Optional[Repair]:
+    """
+    실패한 쿼리 자동 수정
+
+    오류가 수정 대상이면 알려진 잘못된 패턴을 모두 고칩니다
+    (PostgreSQL은 첫 오류만 알려주므로 다시 실패하지 않도록 한 번에 수정).
+
+    Args:
+        sql_query: 실패한 쿼리
+        error_code: SQLSTATE (psycopg2 오류의 pgcode)
+        error_message: 오류 메시지
+
+    Returns:
+        수정된 쿼리와 변경 내용, 수정할 수 없으면 None
+    """
+    if not is_repairable(error_code, error_message):
+        return None
+
+    repaired = sql_query
+    changes = []
+    applied = set()
+    for rule, description in RULES:
+        rewritten = map_outside_literals(repaired, rule)
+        if rewritten != repaired:
+            repaired = rewritten
+            changes.append(description)
+            applied.add(rule)
+
+    # 문자-날짜 비교인데 날짜 값을 알아보지 못함: 컬럼을 날짜로 변환 (인덱스는 사용하지 못함)
+    if _repair_ymd not in applied and DATE_ERROR.search(error_message):
+        rewritten = map_outside_literals(repaired, _repair_ymd_column)
+        if rewritten != repaired:
+            repaired = rewritten
+            changes.append("msrmt_ymd를 TO_DATE(msrmt_ymd, 'YYYYMMDD')로 변환하여 날짜와 비교")
+
+    return Repair(repaired, changes) if changes else None
@@ -0,0 +1,126 @@
+"""
+SQL 쿼리 형태(shape) 정규화
+리터럴 값만 다른 쿼리를 같은 형태로 묶어 캐시와 통계의 키로 사용합니다.
+"""
+import hashlib
+import re
+from typing import Callable, Iterator, List, Tuple
+
+# 문자열 리터럴과 주석을 왼쪽부터 한 번에 찾음 ('a--b' 안의 --를 주석으로 보지 않도록)
+LEXEME = re.compile(r"(?P<string>'(?:[^']|'')*')|(?P<comment>--[^\n]*|/\*.*?\*/)", re.DOTALL)
+# LIMIT/OFFSET/FETCH FIRST 뒤의 숫자는 비용이 크게 달라지므로 형태에 남김
+NUMBER_LITERAL = re.compile(
+    r"(\b(?:limit|offset|fetch\s+(?:first|next))\s+)?(?<![\w.])(-?\d+(?:\.\d+)?)(?![\w.])",
+    re.IGNORECASE
+)
+IN_LIST = re.compile(r"\bin\s*\(\s*\?(?:\s*,\s*\?)*\s*\)")
+WHITESPACE = re.compile(r"\s+")
+LIKE_BEFORE = re.compile(r"(?:\b\w+\.)?(\w+)\s+(?:not\s+)?i?like\s*$", re.IGNORECASE)
+
+
+def split_literals(sql_query: str) -> Iterator[Tuple[str, str]]:
+    """
+    쿼리를 ('sql' | 'string' | 'comment', 텍스트) 조각으로 나눔
+
+    닫히지 않은 문자열 리터럴은 SQL 조각으로 남습니다.
+    """
+    last = 0
+    for match in LEXEME.finditer(sql_query):
+        if match.start() > last:
+            yield 'sql', sql_query[last:match.start()]
+        yield match.lastgroup, match.group()
+        last = match.end()
+    if last < len(sql_query):
+        yield 'sql', sql_query[last:]
+
+
+def map_outside_literals(sql_query: str, func: Callable[[str], str]) -> str:
+    """
+    문자열 리터럴과 주석을 자리표시자로 가린 채 func를 적용한 뒤 되돌림
+
+    규칙 기반 재작성이 리터럴 안의 텍스트를 바꾸지 않도록 할 때 사용합니다.
+    자리표시자는 '\\x00<번호>\\x00'이며 func가 그대로 남겨야 합니다.
+    """
+    literals = []
+    masked = []
+    for kind, text in split_literals(sql_query):
+        if kind == 'sql':
+            masked.append(text)
+        else:
+            masked.append(f"\x00{len(literals)}\x00")
+            literals.append(text)
+    rewritten = func("".join(masked))
+    return re.sub(r"\x00(\d+)\x00", lambda m: literals[int(m.group(1))], rewritten)
+
+
+def _keep_limits(match: re.Match) -> str:
+    return match.group(0) if match.group(1) else "?"
+
+
+def normalize_query(sql_query: str) -> str:
+    """
+    쿼리를 형태 문자열로 정규화
+
+    주석 제거, 문자열/숫자 리터럴을 ?로 치환 (LIMIT/OFFSET 값은 유지), IN 목록 축약,
+    공백 정리, 소문자 변환.
+
+    예: "SELECT * FROM agent.tb_user_info WHERE flnm LIKE '%User_1%' LIMIT 10"
+        -> "select * from agent.tb_user_info where flnm like ? limit 10"
+    """
+    parts = []
+    for kind, text in split_literals(sql_query):
+        if kind == 'sql':
+            parts.append(NUMBER_LITERAL.sub(_keep_limits, text))
+        elif kind == 'string':
+            parts.append("?")
+        else:
+            parts.append(" ")
+    shape = WHITESPACE.sub(" ", "".join(parts)).strip().rstrip(";").strip().lower()
+    return IN_LIST.sub("in (?)", shape)
+
+
+def canonical_query(sql_query: str) -> str:
+    """
+    리터럴 값은 유지한 채 쿼리 표기만 정규화 (같은 조회인지 비교할 때 사용)
+
+    주석 제거, 문자열 리터럴 밖의 공백 정리와 소문자 변환, 끝의 세미콜론 제거.
+
+    예: "SELECT *\n  FROM agent.tb_user_info WHERE flnm LIKE '%User_1%';"
+        -> "select * from agent.tb_user_info where flnm like '%User_1%'"
+    """
+    parts = []
+    # 리터럴 사이의 SQL/주석 조각을 모아 한 번에 공백 정리 (리터럴 안의 공백은 유지)
+    pending = []
+    for kind, text in split_literals(sql_query):
+        if kind == 'string':
+            parts.append(WHITESPACE.sub(" ", "".join(pending)).lower())
+            parts.append(text)
+            pending = []
+        else:
+            pending.append(text if kind == 'sql' else " ")
+    parts.append(WHITESPACE.sub(" ", "".join(pending)).lower())
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+def leading_wildcard_columns(sql_query: str) -> List[str]:
+    """
+    앞쪽 와일드카드 패턴('%...')으로 LIKE/ILIKE 비교하는 컬럼 이름 (소문자, 등장 순서)
+
+    형태 문자열에서는 패턴이 ?로 바뀌므로 B-tree로 처리할 수 없는 조건인지 알 수 없어
+    리터럴 값 대신 이 정보만 따로 기록할 때 사용합니다.
+    """
+    columns = []
+    previous = ""
+    for kind, text in split_literals(sql_query):
+        if kind == 'string' and text.startswith("'%"):
+            match = LIKE_BEFORE.search(previous)
+            if match and match.group(1).lower() not in columns:
+                columns.append(match.group(1).lower())
+        if kind != 'comment':
+            previous = text
+    return columns
+
+
+def shape_id(shape: str) -> str:
+    """형태 문자열의 짧은 식별자"""
+    return hashlib.sha1(shape.encode('utf-8')).hexdigest()[:12]
@@ -6,21 +6,83 @@ Text-to-SQL 기능으로 자연어를 SQL로 변환하여 데이터베이스 조
 import warnings
 warnings.filterwarnings(action="ignore", message=r"datetime.datetime.utcnow")
 
-from strands import Agent, tool
+from strands import Agent, ToolContext, tool
+from strands.models import Model
+from strands.types.exceptions import ModelThrottledException
+import asyncio
+import contextlib
 import sys
+import time
+import uuid
 from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.text_to_sql_tool import TextToSQLTool
-from config import MODEL_ID
+from src.result_serializer import dumps, serialize_result
+from src.model_router import ModelRouter, LARGE
+from src.glucose_forecast import GlucoseForecaster
+from src.population_scan import load_attention_list
+from src.result_rows import ResultSet
+from src.sql_shape import canonical_query, normalize_query
+from src.tool_memo import TOOL_MEMO_ENABLED, ToolCallMemo
+from src.metrics import COUNT_BUCKETS, TOKEN_BUCKETS, get_default_registry
+from src.token_budget import TurnBudget, add_usage, session_budget_error, total_usage
+from src.usage_log import get_default_recorder
 
 
 # Text-to-SQL 도구 초기화
 sql_tool = TextToSQLTool()
 
+# 혈당 예측 (사용자별 예측 결과 캐시 공유)
+forecaster = GlucoseForecaster(sql_tool)
 
-@tool
-def get_database_schema() -> str:
+# 모델 라우터 (경로별 지연 시간 통계를 프로세스 단위로 집계)
+model_router = ModelRouter()
+
+metrics = get_default_registry()
+TOOL_CALLS = metrics.counter('tool_calls_total', "도구 호출 수 (status: ok, error, cached, repeated_failure)",
+                             ('tool', 'status'))
+AGENT_TURNS = metrics.counter('agent_turns_total', "Agent 턴 수", ('route', 'status'))
+AGENT_TURN_LATENCY = metrics.histogram('agent_turn_seconds', "Agent 턴 소요 시간 (초)", ('route',))
+AGENT_ESCALATIONS = metrics.counter('agent_escalations_total', "빠른 모델 실패로 대형 모델로 재시도한 턴 수")
+MODEL_CALLS = metrics.counter('model_calls_total', "모델 호출 수 (Agent 루프 사이클)", ('model_id',))
+MODEL_CALLS_PER_TURN = metrics.histogram('model_calls_per_turn', "턴당 모델 호출 수", (), COUNT_BUCKETS)
+TOKENS = metrics.counter('model_tokens_total', "모델 토큰 사용량", ('model_id', 'direction'))
+TOKENS_PER_TURN = metrics.histogram('turn_tokens', "턴당 토큰 사용량", ('direction',), TOKEN_BUCKETS)
+MODEL_COST = metrics.counter('model_cost_usd_total', "모델 예상 비용 (USD)", ('model_id',))
+BUDGET_EVENTS = metrics.counter('budget_events_total',
+                                "토큰 예산 적용 횟수 (tool_output_trimmed, turn_stopped, session_rejected)",
+                                ('kind',))
+
+
+def _stop_event_loop(tool_context: ToolContext):
+    """이번 도구 결과를 기록한 뒤 Agent 루프를 끝내도록 표시 (모델 재호출 없음)"""
+    tool_context.invocation_state.setdefault("request_state", {})["stop_event_loop"] = True
+
+
+def _check_budget(tool_context: ToolContext):
+    """턴 토큰 예산을 넘었으면 이번 도구 결과를 끝으로 루프 중단"""
+    budget = tool_context.invocation_state.get("turn_budget")
+    if budget is not None and budget.check(tool_context.agent):
+        _stop_event_loop(tool_context)
+
+
+def _fit(tool_context: ToolContext, payload: Dict[str, Any], serialize=dumps, key: str = "data") -> str:
+    """도구 결과를 직렬화 (턴 예산이 부족하면 payload[key] 목록을 줄이고, 넘었으면 루프 중단)"""
+    budget = tool_context.invocation_state.get("turn_budget")
+    if budget is None:
+        return serialize(payload)
+    trimmed = budget.trimmed
+    response = budget.fit(tool_context.agent, payload, serialize, key)
+    if budget.trimmed > trimmed:
+        BUDGET_EVENTS.inc(("tool_output_trimmed",))
+    _check_budget(tool_context)
+    return response
+
+
+@tool(context=True)
+def get_database_schema(tool_context: ToolContext) -> str:
     """
     데이터베이스 스키마 정보를 반환합니다.
     SQL 쿼리를 작성하기 전에 반드시 이 함수를 먼저 호출하세요.
@@ -28,11 +90,22 @@ def get_database_schema() -> str:
     Returns:
         데이터베이스 스키마 정보 (테이블 구조, 컬럼 정보, 예제 쿼리)
     """
-    return sql_tool.get_schema_description()
+    memo = tool_context.invocation_state.get("tool_memo")
+    if memo is not None:
+        cached = memo.lookup("get_database_schema", "", tool_context.agent.messages)
+        if cached and cached[1]:
+            TOOL_CALLS.inc(("get_database_schema", "cached"))
+            return "스키마는 이 대화에서 이미 조회했습니다. 이전 결과를 참고하세요."
+    TOOL_CALLS.inc(("get_database_schema", "ok"))
+    _check_budget(tool_context)
+    schema = sql_tool.get_schema_description()
+    if memo is not None:
+        memo.record("get_database_schema", "", tool_context.tool_use["toolUseId"], schema)
+    return schema
 
 
-@tool
-def execute_sql_query(sql_query: str) -> str:
+@tool(context=True)
+def execute_sql_query(sql_query: str, tool_context: ToolContext) -> str:
     """
     SQL 쿼리를 실행하여 데이터베이스를 조회합니다.
     SELECT 쿼리 또는 WITH 구문을 사용할 수 있습니다.
@@ -43,24 +116,164 @@ def execute_sql_query(sql_query: str) -> str:
     Returns:
         쿼리 실행 결과 (JSON 형식)
     """
-    import json
+    # 같은 대화에서 이미 실행한 쿼리는 다시 조회하지 않음
+    memo = tool_context.invocation_state.get("tool_memo")
+    key = canonical_query(sql_query)
+    if memo is not None:
+        error = memo.failed_error(key)
+        if error is not None:
+            TOOL_CALLS.inc(("execute_sql_query", "repeated_failure"))
+            if memo.record_failure(key, normalize_query(sql_query), error):
+                _stop_event_loop(tool_context)
+            return dumps({
+                "success": False,
+                "repeated": True,
+                "error": error,
+                "message": "이번 질문에서 이미 실패한 쿼리와 동일합니다. 오류를 참고해 쿼리를 수정하세요."
+            })
+        cached = memo.lookup("execute_sql_query", key, tool_context.agent.messages)
+        if cached:
+            TOOL_CALLS.inc(("execute_sql_query", "cached"))
+            entry, in_history = cached
+            if not in_history:
+                return entry.payload
+            return dumps({
+                "success": True,
+                "repeated": True,
+                "row_count": entry.summary["row_count"],
+                "message": "이 대화에서 이미 실행한 쿼리와 동일합니다. 이전 결과를 그대로 사용하세요."
+            })
     
-    result = sql_tool.execute_sql(sql_query)
+    # 세션별 동시 실행 제한을 위해 대화 세션 ID 전달
+    session_id = tool_context.agent.state.get("session_id")
+    result = sql_tool.execute_sql(sql_query, result_format='rows', session_id=session_id)
+    
+    TOOL_CALLS.inc(("execute_sql_query", "ok" if result["success"] else "error"))
     
     # 결과를 더 명확하게 반환
     if result["success"]:
-        return json.dumps({
+        payload = {
             "success": True,
             "row_count": result.get("row_count", 0),
-            "data": result.get("data", [])[:20],  # 최대 20개만 반환
+            "data": result["data"][:20].to_records(),  # 최대 20개만 딕셔너리로 변환하여 반환
             "message": f"쿼리 실행 성공! {result.get('row_count', 0)}건의 데이터를 조회했습니다."
-        }, ensure_ascii=False, default=str, indent=2)
+        }
+        if result.get("cost_gate"):
+            # 비용 게이트가 LIMIT을 붙인 사유
+            payload["note"] = result["cost_gate"]["reason"]
+        if result.get("source") == "analytics":
+            # 분석 저장소 결과는 마지막 동기화 시점 기준
+            payload["data_as_of"] = (f"분석 저장소 기준 (약 {result['staleness_seconds'] / 60:.0f}분 전 동기화, "
+                                     "이후 측정값은 빠져 있을 수 있음)")
+        if result.get("repair"):
+            # 자동 수정 내용을 알려 다음 쿼리부터 같은 실수를 하지 않도록 함
+            payload["repaired_sql"] = result["repair"]["sql"]
+            payload["repair_note"] = (
+                "원래 쿼리가 실패하여 자동 수정한 쿼리로 실행했습니다: "
+                + "; ".join(result["repair"]["changes"])
+                + ". 이후 쿼리도 이 형식으로 작성하세요."
+            )
+        response = _fit(tool_context, payload, serialize_result)
+        if memo is not None:
+            memo.record("execute_sql_query", key, tool_context.tool_use["toolUseId"], response,
+                        {"row_count": payload["row_count"]})
+        return response
     else:
-        return json.dumps({
+        payload = {
             "success": False,
             "error": result.get("error"),
             "message": "쿼리 실행 실패. 에러 메시지를 확인하고 다른 방법을 시도하세요."
-        }, ensure_ascii=False, indent=2)
+        }
+        if memo is not None and memo.record_failure(key, normalize_query(sql_query), payload["error"]):
+            # 같은 형태의 쿼리가 계속 실패: 모델 재호출 없이 턴 종료
+            payload["message"] = "같은 형태의 쿼리가 반복해서 실패하여 조회를 중단합니다."
+            _stop_event_loop(tool_context)
+        return dumps(payload)
+
+
+@tool(context=True)
+def find_user(name: str, tool_context: ToolContext, limit: int = 10) -> str:
+    """
+    이름으로 사용자를 찾아 user_uuid를 반환합니다.
+    사용자 이름이 나오면 SQL의 LIKE 검색 대신 이 함수로 user_uuid를 먼저 확인하세요.
+    
+    Args:
+        name: 사용자 이름 (일부만 입력해도 됨, 대소문자 무시)
+        limit: 최대 결과 수 (기본 10)
+    
+    Returns:
+        사용자 목록 (JSON 형식): user_uuid, flnm, gndr_cd, use_yn,
+        match('exact': 이름이 정확히 일치, 'partial': 부분 일치) - 정확히 일치하는 사용자가 먼저 옴
+    """
+    session_id = tool_context.agent.state.get("session_id")
+    try:
+        users = sql_tool.find_users(name, min(max(1, int(limit)), 50), session_id=session_id)
+    except Exception as e:
+        TOOL_CALLS.inc(("find_user", "error"))
+        return dumps({"success": False, "error": f"사용자 검색 실패: {str(e)}"})
+    TOOL_CALLS.inc(("find_user", "ok"))
+    return _fit(tool_context, {
+        "success": True,
+        "row_count": len(users),
+        "data": users,
+        "message": (f"'{name}' 이름의 사용자 {len(users)}명을 찾았습니다." if users
+                    else f"'{name}' 이름의 사용자를 찾지 못했습니다.")
+    })
+
+
+@tool(context=True)
+def forecast_glucose(user_uuid: str, tool_context: ToolContext, horizon_hours: int = 24) -> str:
+    """
+    사용자의 전체 혈당 기록으로 향후 혈당을 예측합니다.
+    혈당 예측 요청 시 직접 추정하지 말고 이 함수를 호출하세요.
+    
+    Args:
+        user_uuid: 사용자 UUID (모르면 먼저 find_user로 조회)
+        horizon_hours: 예측 기간 (시간, 기본 24, 최대 72)
+    
+    Returns:
+        예측 결과 (JSON 형식): 시각별 예측값, 80%/95% 예측 구간, 모델 요약
+    """
+    session_id = tool_context.agent.state.get("session_id")
+    try:
+        result = forecaster.forecast(user_uuid, horizon_hours, session_id=session_id)
+    except Exception as e:
+        result = {"success": False, "error": f"예측 실패: {str(e)}"}
+    TOOL_CALLS.inc(("forecast_glucose", "ok" if result.get("success") else "error"))
+    return _fit(tool_context, result, key="forecast")
+
+
+@tool(context=True)
+def list_users_needing_attention(tool_context: ToolContext, limit: int = 10, flag: str = "") -> str:
+    """
+    전체 사용자 혈당 스캔 결과에서 주의가 필요한 사용자를 점수 높은 순으로 반환합니다.
+    "누가 주의가 필요한가", "저혈당이 잦은 사용자" 같은 전체 사용자 질문에 사용하세요.
+    
+    Args:
+        limit: 최대 사용자 수 (기본 10)
+        flag: 필터 - 'hypo'(저혈당), 'hyper'(고혈당), 'low_tir'(목표 범위 비율 낮음),
+            'high_variability'(변동성 큼), 빈 문자열이면 전체
+    
+    Returns:
+        사용자별 평균 혈당, CV, TIR, 저혈당/고혈당 구간 수, 점수, 스캔 시각 (JSON 형식)
+    """
+    session_id = tool_context.agent.state.get("session_id")
+    try:
+        with sql_tool.get_connection(session_id) as conn:
+            columns, rows = load_attention_list(conn, min(max(1, int(limit)), 100), flag or None)
+    except Exception as e:
+        TOOL_CALLS.inc(("list_users_needing_attention", "error"))
+        return dumps({
+            "success": False,
+            "error": f"스캔 결과를 조회하지 못했습니다: {str(e)}",
+            "message": "scripts/scan_population.py로 전체 스캔을 먼저 실행해야 합니다."
+        })
+    TOOL_CALLS.inc(("list_users_needing_attention", "ok"))
+    return _fit(tool_context, {
+        "success": True,
+        "row_count": len(rows),
+        "data": ResultSet(columns, rows).to_records()
+    }, serialize_result)
 
 
 # 시스템 프롬프트
@@ -70,6 +283,7 @@ SYSTEM_PROMPT = """당신은 건강 데이터 분석 전문 AI 어시스턴트
 
 **중요한 작업 순서:**
 1. 먼저 get_database_schema()를 호출하여 데이터베이스 스키마를 확인합니다
+   (질문에 사용자 이름이 있으면 find_user(name)로 user_uuid를 먼저 확인합니다)
 2. 스키마 정보를 바탕으로 적절한 SQL 쿼리를 생성합니다
 3. execute_sql_query()를 호출하여 쿼리를 실행합니다
 4. 쿼리 실행 결과를 확인합니다:
@@ -81,7 +295,9 @@ SYSTEM_PROMPT = """당신은 건강 데이터 분석 전문 AI 어시스턴트
 - 모든 테이블은 agent 스키마에 있습니다 (예: agent.tb_user_info)
 - SELECT 쿼리 또는 WITH 구문 사용 가능
 - 날짜 형식은 YYYYMMDD (문자열)입니다
-- 사용자 검색 시 flnm 컬럼에 LIKE '%검색어%' 사용 (대소문자 구분: User_1)
+- 사용자 이름 검색은 find_user를 사용하고, 데이터 조회는 user_uuid = '...' 조건으로 작성
+  (flnm LIKE '%검색어%'는 전체 스캔이므로 find_user가 실패한 경우에만 사용)
+  find_user 결과에 match가 'exact'인 사용자가 있으면 그 사용자를 우선 사용
 - 결과는 LIMIT을 사용하여 제한 (기본 10개)
 - JOIN 시 user_uuid 사용
 
@@ -95,11 +311,14 @@ SYSTEM_PROMPT = """당신은 건강 데이터 분석 전문 AI 어시스턴트
 - 저혈당: 70 미만
 - 고혈당: 140 초과
 - 추세 분석 시 최근 데이터의 패턴 설명
-- 예측 요청 시 과거 데이터 기반으로 합리적인 추정 제공
+- 전체 사용자 중 주의가 필요한 사용자를 묻으면 list_users_needing_attention()을 사용
+  (사용자별로 쿼리를 반복하지 마세요)
+- 예측 요청 시 forecast_glucose(user_uuid)를 호출하고, 예측값과 예측 구간을 함께 설명
+  (센서 로그가 있으면 시간 단위, 없으면 일 단위 예측입니다)
 
 **에러 처리:**
 - 쿼리 실행 실패 시 에러 메시지를 읽고 다른 방법을 시도하세요
-- 같은 쿼리를 반복하지 마세요
+- 같은 쿼리를 반복하지 마세요 ("repeated": true 응답은 이전 결과를 다시 사용하라는 뜻입니다)
 - 간단한 쿼리부터 시작하세요
 """
 
@@ -107,14 +326,83 @@ SYSTEM_PROMPT = """당신은 건강 데이터 분석 전문 AI 어시스턴트
 class HealthChatAgent:
     """Strands Agents SDK를 사용한 건강 데이터 대화형 Agent"""
     
-    def __init__(self):
-        """Agent 초기화"""
-        self.agent = Agent(
-            model=MODEL_ID,
-            tools=[get_database_schema, execute_sql_query],
-            system_prompt=SYSTEM_PROMPT
+    def __init__(self, router: ModelRouter = None, model: Model = None, session_id: str = None,
+                 store=None):
+        """
+        Agent 초기화
+        
+        Args:
+            router: 모델 라우터 (기본값: 프로세스 공유 라우터)
+            model: 모든 턴에 사용할 모델 (지정하면 라우팅 없이 사용, 테스트용 스텁 등)
+            session_id: 대화 세션 ID (기본값: 새로 생성, API 등 외부 세션 ID 사용 시 지정)
+            store: 대화 저장소 (conversation_store, 지정하면 매 턴 후 저장하고 같은 session_id로 이어서 대화)
+        """
+        self.router = router or model_router
+        self.session_id = session_id or uuid.uuid4().hex
+        # 모델(Bedrock 클라이언트)은 프로세스 전체에서 공유
+        self.fixed_model = model is not None
+        self.model = model if self.fixed_model else self.router.get_model(LARGE)
+        self.store = store
+        # 대화 내 도구 호출 기록 (같은 쿼리 재실행 방지, 반복 실패 시 중단)
+        self.memo = ToolCallMemo() if TOOL_MEMO_ENABLED else None
+        # 이번 턴의 토큰 예산 (도구 결과 줄이기, 루프 중단)
+        self.turn_budget: Optional[TurnBudget] = None
+        self.usage_log = get_default_recorder()
+        # Strands Agent는 처음 사용할 때 생성 (저장된 대화가 있으면 그때 불러옴)
+        self._agent = None
+        self.version = None
+        self.last_turn = {}
+        # 세션 누적 사용량 (agent.state["usage"]의 마지막 값, 화면 표시 시 대화를 복원하지 않도록 보관)
+        self.session_usage: Dict[str, Dict[str, Any]] = {}
+    
+    @property
+    def agent(self) -> Agent:
+        """Strands Agent (메모리에 없으면 저장소에서 복원)"""
+        if self._agent is None:
+            saved = self.store.load(self.session_id) if self.store else None
+            if saved:
+                self.version, payload = saved
+                self._agent = self._build_agent(payload["messages"], payload["state"])
+            else:
+                self.version = None
+                self._agent = self._build_agent()
+            self.session_usage = self._agent.state.get("usage") or {}
+        return self._agent
+    
+    def _build_agent(self, messages: List[Dict[str, Any]] = None,
+                     state: Dict[str, Any] = None) -> Agent:
+        """공유 모델로 Strands Agent 생성"""
+        return Agent(
+            model=self.model,
+            tools=[get_database_schema, execute_sql_query, find_user, forecast_glucose,
+                   list_users_needing_attention],
+            system_prompt=SYSTEM_PROMPT,
+            messages=messages,
+            state=dict(state or {}, session_id=self.session_id),
+            # 기본 출력 핸들러는 응답을 stdout에 그대로 찍어 배치 JSONL과 API 출력에 섞이므로 끔
+            # (응답 텍스트는 chat()의 반환값과 stream()의 이벤트로 전달)
+            callback_handler=None
         )
     
+    def _refresh(self) -> Agent:
+        """다른 프로세스가 같은 세션을 갱신했으면 메모리의 대화를 버리고 다시 불러옴"""
+        if self.store and self._agent is not None and self.store.version(self.session_id) != self.version:
+            self._agent = None
+        return self.agent
+    
+    def save(self):
+        """현재 대화를 저장소에 저장"""
+        if self.store and self._agent is not None:
+            self.version = self.store.save(self.session_id, {
+                "messages": self._agent.messages,
+                "state": self._agent.state.get()
+            })
+    
+    def unload(self):
+        """메모리의 대화를 내려놓음 (저장소가 있으면 다음 사용 시 다시 불러옴)"""
+        self.save()
+        self._agent = None
+    
     def chat(self, user_message: str) -> str:
         """
         사용자와 대화
@@ -126,22 +414,292 @@ class HealthChatAgent:
             Agent 응답
         """
         try:
-            response = self.agent(user_message)
-            return response
+            return self._run_turn(user_message)
+        except ModelThrottledException as e:
+            return f"요청이 많아 모델 호출이 제한되었습니다. 잠시 후 다시 시도해주세요. ({str(e)})"
         except Exception as e:
             import traceback
             traceback.print_exc()
             return f"오류 발생: {str(e)}"
     
+    def ask(self, user_message: str) -> Dict[str, Any]:
+        """
+        한 턴을 실행하고 응답과 실행 정보를 함께 반환 (배치 실행, API용)
+        
+        Returns:
+            answer, success, error와 last_turn 항목
+            (route, model_id, latency_ms, escalated, sql, usage, cost_usd, usage_by_model)
+        """
+        try:
+            response = self._run_turn(user_message)
+            return dict(self.last_turn, answer=str(response), success=True, error=None)
+        except Exception as e:
+            return dict(self.last_turn, answer=None, success=False, error=f"{type(e).__name__}: {e}")
+    
+    def _usage(self) -> Dict[str, int]:
+        """Agent 누적 토큰 사용량과 모델 호출 수 (대화 초기화와 무관하게 누적)"""
+        loop_metrics = self.agent.event_loop_metrics
+        usage = loop_metrics.accumulated_usage
+        counts = {key: usage.get(key, 0) for key in ('inputTokens', 'outputTokens', 'totalTokens')}
+        counts["modelCalls"] = loop_metrics.cycle_count
+        return counts
+    
+    def _executed_sql(self, previous_messages: List[Dict[str, Any]]) -> List[str]:
+        """
+        이번 턴에 추가된 메시지에서 execute_sql_query로 요청된 SQL 목록
+
+        대화 관리자가 앞쪽 기록을 잘라낼 수 있으므로 위치가 아니라 턴 시작 시점의
+        메시지 객체(previous_messages)에 없는 메시지를 이번 턴 메시지로 봅니다.
+        """
+        previous = {id(message) for message in previous_messages}
+        queries = []
+        for message in self.agent.messages:
+            if message["role"] != "assistant" or id(message) in previous:
+                continue
+            for block in message["content"]:
+                tool_use = block.get("toolUse")
+                if tool_use and tool_use.get("name") == "execute_sql_query":
+                    tool_input = tool_use.get("input") or {}
+                    if isinstance(tool_input, dict) and tool_input.get("sql_query"):
+                        queries.append(tool_input["sql_query"])
+        return queries
+    
+    def _add_attempt_usage(self, by_model: Dict[str, Dict[str, Any]], before: Dict[str, int]):
+        """before 이후 사용량을 현재 모델 ID로 by_model에 더함 (승격 시 모델별로 따로 집계)"""
+        after = self._usage()
+        add_usage(by_model, self.agent.model.get_config().get("model_id"),
+                  after["inputTokens"] - before["inputTokens"],
+                  after["outputTokens"] - before["outputTokens"],
+                  after["modelCalls"] - before["modelCalls"])
+    
+    def _invocation_state(self) -> Dict[str, Any]:
+        """이번 턴에 도구로 전달할 상태 (도구 호출 기록, 턴 토큰 예산)"""
+        state = {"turn_budget": self.turn_budget}
+        if self.memo is not None:
+            self.memo.start_turn()
+            state["tool_memo"] = self.memo
+        return state
+    
+    def _stop_cause(self) -> Optional[str]:
+        """도구가 루프를 중단시킨 원인 ('budget', 'repeated_failure', 없으면 None)"""
+        if self.turn_budget is not None and self.turn_budget.stop_reason is not None:
+            return 'budget'
+        if self.memo is not None and self.memo.stop_reason is not None:
+            return 'repeated_failure'
+        return None
+    
+    def _stopped_early(self, result) -> bool:
+        """도구가 루프를 중단시켰는지 (마지막 메시지가 도구 호출인 채로 종료)"""
+        return (self._stop_cause() is not None
+                and result is not None and result.stop_reason == 'tool_use')
+    
+    def _close_stopped_turn(self) -> str:
+        """중단된 턴을 안내 메시지로 마무리 (다음 턴을 위해 user/assistant 순서 유지)"""
+        if self._stop_cause() == 'budget':
+            text = (f"{self.turn_budget.stop_reason} 조회를 중단했습니다. "
+                    "질문 범위를 좁혀 다시 시도해주세요.")
+        else:
+            text = ("같은 형태의 쿼리가 반복해서 실패하여 조회를 중단했습니다. "
+                    "질문을 조금 더 구체적으로 바꿔 다시 시도해주세요.\n"
+                    f"(마지막 오류: {self.memo.stop_reason})")
+        self.agent.messages.append({"role": "assistant", "content": [{"text": text}]})
+        return text
+    
+    def _session_budget_error(self) -> Optional[str]:
+        """세션 예산을 넘었으면 모델을 호출하지 않고 돌려줄 안내 문구 (last_turn 기록 포함)"""
+        error = session_budget_error(self.agent.state.get("usage") or {})
+        if error is None:
+            return None
+        BUDGET_EVENTS.inc(("session_rejected",))
+        self.usage_log.record(self.session_id, None, {}, False, 'session_budget')
+        self.last_turn = {
+            "route": None,
+            "model_id": None,
+            "latency_ms": 0.0,
+            "escalated": False,
+            "sql": [],
+            "usage": {"inputTokens": 0, "outputTokens": 0, "totalTokens": 0},
+            "model_calls": 0,
+            "cost_usd": 0.0,
+            "usage_by_model": {},
+            "tool_cache_hits": 0,
+            "stopped_early": True,
+            "stop_cause": 'session_budget'
+        }
+        return f"{error} 이 대화에서는 더 이상 질문을 처리할 수 없습니다."
+    
+    def _run_turn(self, user_message: str):
+        """라우팅된 모델로 한 턴을 실행하고, 빠른 모델 실패 시 대형 모델로 재시도"""
+        self.last_turn = {}
+        self._refresh()
+        budget_error = self._session_budget_error()
+        if budget_error is not None:
+            return budget_error
+        route = LARGE if self.fixed_model else self.router.classify(user_message)
+        # 대화 관리자가 실행 중에 앞쪽 기록을 잘라낼 수 있으므로 길이가 아니라 목록 전체를 보관
+        snapshot = list(self.agent.messages)
+        # 승격해도 턴 예산은 턴 전체에 적용
+        self.turn_budget = TurnBudget(self._usage()["totalTokens"])
+        usage_by_model = {}
+        escalated = False
+        
+        while True:
+            self.agent.model = self.model if self.fixed_model else self.router.get_model(route)
+            attempt_usage = self._usage()
+            start_time = time.perf_counter()
+            try:
+                response = self.agent(user_message, invocation_state=self._invocation_state())
+                success = response.stop_reason in ('end_turn', 'stop_sequence')
+                error = None
+            except ModelThrottledException:
+                raise
+            except Exception as e:
+                response, success, error = None, False, e
+            latency_ms = (time.perf_counter() - start_time) * 1000
+            self._add_attempt_usage(usage_by_model, attempt_usage)
+            if not self.fixed_model:
+                self.router.record(route, latency_ms, success, escalated)
+            
+            # 예산으로 중단된 턴은 대형 모델로 다시 실행하지 않음
+            if success or route == LARGE or self.turn_budget.stop_reason is not None:
+                break
+            
+            # 빠른 모델 실패: 이번 턴 기록을 되돌리고 대형 모델로 승격
+            self.agent.messages[:] = snapshot
+            route, escalated = LARGE, True
+        
+        if self._stopped_early(response):
+            response = self._close_stopped_turn()
+        self._finish_turn(route, latency_ms, escalated, snapshot, usage_by_model, success)
+        if error is not None:
+            raise error
+        return response
+    
+    def _finish_turn(self, route: str, latency_ms: float, escalated: bool,
+                     previous_messages: List[Dict[str, Any]], usage_by_model: Dict[str, Dict[str, Any]], success: bool):
+        """
+        공유 모델로 되돌리고 이번 턴 정보를 기록한 뒤 대화 저장
+        
+        last_turn, 메트릭, 사용량 로그에 기록하고 세션 누적 사용량(agent.state["usage"])에 더합니다.
+        """
+        model_id = self.agent.model.get_config().get("model_id")
+        self.agent.model = self.model
+        summed = total_usage(usage_by_model)
+        stop_cause = self._stop_cause()
+        trimmed = self.turn_budget.trimmed if self.turn_budget else 0
+        
+        # 세션 누적 사용량은 대화와 함께 저장됨 (대화 초기화 후에도 유지)
+        session_usage = self.agent.state.get("usage") or {}
+        for turn_model_id, usage in usage_by_model.items():
+            add_usage(session_usage, turn_model_id, usage["input_tokens"], usage["output_tokens"],
+                      usage["model_calls"])
+        self.agent.state.set("usage", session_usage)
+        self.session_usage = session_usage
+        
+        self.last_turn = {
+            "route": route,
+            "model_id": model_id,
+            "latency_ms": round(latency_ms, 1),
+            "escalated": escalated,
+            "sql": self._executed_sql(previous_messages),
+            "usage": {
+                "inputTokens": summed["input_tokens"],
+                "outputTokens": summed["output_tokens"],
+                "totalTokens": summed["input_tokens"] + summed["output_tokens"]
+            },
+            "model_calls": summed["model_calls"],
+            "cost_usd": round(summed["cost_usd"], 6),
+            "usage_by_model": usage_by_model,
+            "tool_cache_hits": self.memo.turn_hits if self.memo else 0,
+            "tool_outputs_trimmed": trimmed,
+            "stopped_early": stop_cause is not None,
+            "stop_cause": stop_cause
+        }
+        
+        status = "stopped" if stop_cause else ("ok" if success else "error")
+        AGENT_TURNS.inc((route, status))
+        AGENT_TURN_LATENCY.observe(latency_ms / 1000, (route,))
+        if escalated:
+            AGENT_ESCALATIONS.inc()
+        if stop_cause == 'budget':
+            BUDGET_EVENTS.inc(("turn_stopped",))
+        for turn_model_id, usage in usage_by_model.items():
+            MODEL_CALLS.inc((turn_model_id,), usage["model_calls"])
+            TOKENS.inc((turn_model_id, "input"), usage["input_tokens"])
+            TOKENS.inc((turn_model_id, "output"), usage["output_tokens"])
+            MODEL_COST.inc((turn_model_id,), usage["cost_usd"])
+        MODEL_CALLS_PER_TURN.observe(summed["model_calls"])
+        TOKENS_PER_TURN.observe(summed["input_tokens"], ("input",))
+        TOKENS_PER_TURN.observe(summed["output_tokens"], ("output",))
+        self.usage_log.record(self.session_id, route, usage_by_model, success, stop_cause, trimmed)
+        self.save()
+    
+    async def stream(self, user_message: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        한 턴을 스트리밍으로 실행 (HTTP API용)
+        
+        이미 전송한 텍스트는 되돌릴 수 없으므로 빠른 모델이 실패해도 대형 모델로 승격하지 않습니다.
+        
+        Yields:
+            {"type": "text", "text": ...} 응답 조각,
+            {"type": "tool", "name": ...} 도구 호출 시작,
+            마지막으로 {"type": "done", "answer": ..., **last_turn}
+        """
+        self.last_turn = {}
+        # 저장소 확인과 복원은 파일/DB 입출력이므로 이벤트 루프 밖에서 실행
+        await asyncio.to_thread(self._refresh)
+        budget_error = self._session_budget_error()
+        if budget_error is not None:
+            yield {"type": "text", "text": budget_error}
+            yield dict(self.last_turn, type="done", answer=budget_error)
+            return
+        route = LARGE if self.fixed_model else await asyncio.to_thread(self.router.classify, user_message)
+        snapshot = list(self.agent.messages)
+        usage_before = self._usage()
+        self.turn_budget = TurnBudget(usage_before["totalTokens"])
+        self.agent.model = self.model if self.fixed_model else self.router.get_model(route)
+        start_time = time.perf_counter()
+        result = None
+        answer = None
+        announced = set()
+        try:
+            # 중간에 끊기면 Agent 스트림을 먼저 닫아 대화 기록이 더 바뀌지 않게 한 뒤 마무리
+            async with contextlib.aclosing(self.agent.stream_async(
+                    user_message, invocation_state=self._invocation_state())) as events:
+                async for event in events:
+                    if "data" in event:
+                        yield {"type": "text", "text": event["data"]}
+                    elif "current_tool_use" in event:
+                        tool_use = event["current_tool_use"]
+                        if tool_use.get("toolUseId") not in announced:
+                            announced.add(tool_use.get("toolUseId"))
+                            yield {"type": "tool", "name": tool_use.get("name")}
+                    elif "result" in event:
+                        result = event["result"]
+            if self._stopped_early(result):
+                answer = self._close_stopped_turn()
+                yield {"type": "text", "text": answer}
+        finally:
+            latency_ms = (time.perf_counter() - start_time) * 1000
+            success = result is not None and result.stop_reason in ('end_turn', 'stop_sequence')
+            if not self.fixed_model:
+                self.router.record(route, latency_ms, success, False)
+            usage_by_model = {}
+            self._add_attempt_usage(usage_by_model, usage_before)
+            # 대화 저장은 파일/DB 입출력이므로 이벤트 루프 밖에서 실행
+            await asyncio.to_thread(self._finish_turn, route, latency_ms, False, snapshot,
+                                    usage_by_model, success)
+        yield dict(self.last_turn, type="done", answer=answer or str(result))
+    
     def reset(self):
-        """대화 기록 초기화"""
-        # Strands Agent는 자동으로 대화 기록을 관리하므로
-        # 새로운 Agent 인스턴스를 생성하여 초기화
-        self.agent = Agent(
-            model=MODEL_ID,
-            tools=[get_database_schema, execute_sql_query],
-            system_prompt=SYSTEM_PROMPT
-        )
+        """대화 기록 초기화 (세션 누적 사용량과 예산은 유지)"""
+        # 모델 클라이언트는 그대로 두고 대화 기록만 비움
+        self.agent.messages.clear()
+        if self.memo is not None:
+            self.memo.clear()
+        if self.store:
+            self.store.delete(self.session_id)
+            self.version = None
 
 
 def main():
@@ -2,17 +2,65 @@
 Text-to-SQL Tool using Strands Agents
 자연어를 SQL로 변환하여 데이터베이스를 조회하는 도구
 """
+import csv
+import gzip
+from contextlib import contextmanager
+import io
+import os
+import time
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from config import DB_CONFIG
+from src.cost_gate import COST_GATE_ENABLED, get_default_gate
+from src.workload_log import get_default_recorder
+from src.admission import AdmissionController, AdmissionRejected, get_default_controller
+from src.db_router import DatabaseRouter, get_default_router
+from src.analytics_store import ANALYTICS_ENABLED, AnalyticsStore, get_default_store
+from src.result_rows import ResultSet
+from src.result_serializer import dumps, serialize_result
+from src.sql_repair import SQL_REPAIR_ENABLED, repair_query
+from src.user_directory import USER_COLUMNS, USER_DIRECTORY_ENABLED, UserDirectory
+from src.metrics import COUNT_BUCKETS, get_default_registry
+
+metrics = get_default_registry()
+SQL_QUERIES = metrics.counter('sql_queries_total', "실행한 SQL 쿼리 수", ('source', 'status'))
+SQL_LATENCY = metrics.histogram('sql_query_seconds', "SQL 쿼리 실행 시간 (초)", ('source',))
+SQL_ROWS = metrics.histogram('sql_rows_returned', "쿼리당 반환 행 수", ('source',), COUNT_BUCKETS)
+SQL_REJECTIONS = metrics.counter('sql_rejections_total', "실행 전에 거절된 쿼리 수", ('reason',))
+SQL_REPAIRS = metrics.counter('sql_repairs_total', "자동 수정 후 성공한 쿼리 수")
+
+
+def _pool_gauge(key: str):
+    # 내보낼 때 공유 라우터의 엔드포인트 상태를 읽음 (쿼리 경로에는 비용 없음)
+    return lambda: {(e["name"], e["role"]): float(e[key]) for e in get_default_router().stats()}
+
+
+metrics.gauge('db_pool_in_use', "사용 중인 풀 연결 수", ('endpoint', 'role'), _pool_gauge('outstanding'))
+metrics.gauge('db_pool_max', "풀 최대 연결 수", ('endpoint', 'role'), _pool_gauge('pool_max'))
+metrics.gauge('db_endpoint_available', "엔드포인트 사용 가능 여부 (1/0)", ('endpoint', 'role'),
+              _pool_gauge('available'))
+metrics.gauge('db_admission_active', "실행 중인 쿼리 수", (),
+              lambda: {(): get_default_controller().stats()["active"]})
+metrics.gauge('db_admission_waiting', "실행 슬롯을 기다리는 쿼리 수", (),
+              lambda: {(): get_default_controller().stats()["waiting"]})
 
 
 class TextToSQLTool:
     """자연어를 SQL로 변환하여 실행하는 도구"""
     
-    def __init__(self):
+    def __init__(self, router: Optional[DatabaseRouter] = None,
+                 admission: Optional[AdmissionController] = None,
+                 analytics: Optional[AnalyticsStore] = None):
         self.config = DB_CONFIG
+        # 연결 풀, 복제본 라우팅, 승인 제어는 프로세스 전체에서 공유
+        self.router = router or get_default_router()
+        self.admission = admission or get_default_controller()
+        # 집계 전용 쿼리를 보낼 로컬 분석 저장소 (설정 시)
+        self.analytics = analytics or (get_default_store() if ANALYTICS_ENABLED else None)
+        self.cost_gate = get_default_gate()
+        self.workload = get_default_recorder()
+        # 이름 -> user_uuid 검색 인덱스 (처음 검색할 때 DB에서 읽음)
+        self.users = UserDirectory(self) if USER_DIRECTORY_ENABLED else None
         self.schema_info = self._get_schema_info()
     
     def _get_schema_info(self) -> str:
@@ -53,7 +101,7 @@ class TextToSQLTool:
         주의사항:
         - 모든 테이블은 agent 스키마에 있습니다
         - 날짜 형식: YYYYMMDD (예: 20251205)
-        - 사용자 검색 시 LIKE 사용 가능
+        - 사용자 이름으로 찾을 때는 find_user 도구로 user_uuid를 먼저 확인 (flnm LIKE는 전체 스캔)
         - JOIN 시 user_uuid 사용
         
         중요: bs_rslt_cn 데이터 형식
@@ -63,8 +111,8 @@ class TextToSQLTool:
         
         예제 쿼리:
         
-        1. 사용자 검색:
-        SELECT * FROM agent.tb_user_info WHERE flnm LIKE '%User_1%' LIMIT 10
+        1. 사용자 조회 (이름은 find_user로 user_uuid를 먼저 찾은 뒤):
+        SELECT * FROM agent.tb_user_info WHERE user_uuid = 'xxx'
         
         2. 혈당 데이터 조회 (값 추출):
         SELECT 
@@ -97,83 +145,478 @@ class TextToSQLTool:
         ORDER BY msrmt_ymd DESC
         """
     
-    def get_connection(self):
-        """데이터베이스 연결 생성"""
-        return psycopg2.connect(**self.config)
+    @contextmanager
+    def get_connection(self, session_id: Optional[str] = None):
+        """
+        읽기 전용 데이터베이스 연결 (with 구문용)
+        
+        승인 제어로 실행 슬롯을 얻은 뒤, 복제본이 설정되어 있으면 복제본 중 하나를,
+        아니면 primary 풀의 연결을 제공하며 블록이 끝나면 풀에 반환합니다.
+        
+        Args:
+            session_id: 요청한 세션 ID (세션별 동시 실행 제한 및 공정 대기열에 사용)
+        
+        Raises:
+            AdmissionRejected: 대기 시간 예산 안에 실행 슬롯을 얻지 못함
+        """
+        with self.admission.admit(session_id):
+            with self.router.connection() as conn:
+                yield conn
+    
+    def _error_result(self, error: str) -> Dict[str, Any]:
+        """실패 결과 딕셔너리 생성"""
+        return {
+            "success": False,
+            "error": error,
+            "data": [],
+            "row_count": 0
+        }
+    
+    def _validate_query(self, sql_query: str) -> Optional[str]:
+        """
+        SQL 인젝션 방지를 위한 기본 검증
+        
+        Returns:
+            오류 메시지 (통과 시 None)
+        """
+        sql_lower = sql_query.lower().strip()
+        
+        # WITH 구문 허용 (CTE - Common Table Expression)
+        if sql_lower.startswith('with'):
+            # WITH 구문 내에 SELECT가 있는지 확인
+            if 'select' not in sql_lower:
+                return "WITH 구문에는 SELECT가 포함되어야 합니다."
+        elif not sql_lower.startswith('select'):
+            # SELECT 또는 WITH로 시작하지 않으면 차단
+            return "보안상 SELECT 쿼리 또는 WITH 구문만 허용됩니다."
+        
+        # 위험한 키워드 차단 (단, WITH는 허용)
+        dangerous_keywords = ['drop', 'delete', 'update', 'insert', 'alter', 'create', 'truncate']
+        for keyword in dangerous_keywords:
+            if f' {keyword} ' in f' {sql_lower} ' or sql_lower.endswith(keyword):
+                return f"보안상 '{keyword}' 명령은 허용되지 않습니다."
+        
+        return None
+    
+    def _is_single_statement(self, sql_query: str) -> bool:
+        """
+        쿼리가 괄호로 감싸도 안전한 단일 문장인지 확인
+        
+        COPY (...) TO STDOUT 처럼 쿼리를 다른 구문 안에 넣을 때
+        괄호를 닫고 다른 옵션을 덧붙이는 형태를 막기 위해 사용합니다.
+        """
+        depth = 0
+        i = 0
+        text = sql_query.strip().rstrip(';')
+        while i < len(text):
+            ch = text[i]
+            if ch == "'":
+                # 문자열 리터럴 건너뛰기 ('' 이스케이프 포함)
+                i += 1
+                while i < len(text):
+                    if text[i] == "'":
+                        if i + 1 < len(text) and text[i + 1] == "'":
+                            i += 2
+                            continue
+                        break
+                    i += 1
+            elif text.startswith('--', i) or text.startswith('/*', i):
+                return False
+            elif ch == '(':
+                depth += 1
+            elif ch == ')':
+                depth -= 1
+                if depth < 0:
+                    return False
+            elif ch == ';':
+                return False
+            i += 1
+        return depth == 0
+    
+    def _run_query(self, conn, sql_query: str, result_format: str,
+                   max_rows: Optional[int] = None) -> Dict[str, Any]:
+        """
+        연결에서 쿼리를 실행하고 요청한 형식으로 결과 반환
+        
+        max_rows를 주면 서버 측 커서로 max_rows + 1행까지만 읽고,
+        더 있으면 max_rows행만 남기고 truncated를 표시합니다.
+        """
+        if max_rows is None:
+            # 일반 튜플 커서로 읽고 컬럼 정보는 결과 전체에서 한 번만 보관
+            with conn.cursor() as cur:
+                cur.execute(sql_query)
+                result_set = ResultSet.from_cursor(cur)
+            return self._format_result(result_set, result_format)
+        
+        # 일반 커서는 fetchmany여도 결과 전체를 클라이언트로 받으므로 서버 측 커서 사용
+        with conn.cursor(name='limited_cursor') as cur:
+            cur.itersize = max_rows + 1
+            cur.execute(sql_query)
+            result_set = ResultSet.from_cursor(cur, max_rows + 1)
+        truncated = len(result_set) > max_rows
+        result = self._format_result(result_set[:max_rows] if truncated else result_set, result_format)
+        if truncated:
+            result["truncated"] = True
+        return result
+    
+    def _format_result(self, result_set: ResultSet, result_format: str) -> Dict[str, Any]:
+        """ResultSet을 요청한 형식의 결과 딕셔너리로 변환"""
+        result = {
+            "success": True,
+            "row_count": len(result_set),
+            "error": None
+        }
+        if result_format == 'rows':
+            result["columns"] = list(result_set.columns)
+            result["data"] = result_set
+        elif result_format == 'columns':
+            result["columns"] = list(result_set.columns)
+            result["data"] = result_set.to_columns()
+        else:
+            result["data"] = result_set.to_records()
+        return result
     
-    def execute_sql(self, sql_query: str) -> Dict[str, Any]:
+    def _run_recorded(self, conn, sql_query: str, result_format: str,
+                      plan: Optional[Dict[str, Any]] = None,
+                      max_rows: Optional[int] = None) -> Dict[str, Any]:
+        """쿼리를 실행하고 워크로드 로그에 형태, 소요 시간, 행 수를 기록"""
+        start_time = time.perf_counter()
+        try:
+            result = self._run_query(conn, sql_query, result_format, max_rows)
+        except psycopg2.Error:
+            elapsed = time.perf_counter() - start_time
+            self.workload.record(sql_query, elapsed * 1000, 0, False, plan)
+            SQL_QUERIES.inc(('postgres', 'error'))
+            SQL_LATENCY.observe(elapsed, ('postgres',))
+            raise
+        elapsed = time.perf_counter() - start_time
+        self.workload.record(sql_query, elapsed * 1000, result["row_count"], True, plan)
+        SQL_QUERIES.inc(('postgres', 'ok'))
+        SQL_LATENCY.observe(elapsed, ('postgres',))
+        SQL_ROWS.observe(result["row_count"], ('postgres',))
+        return result
+    
+    def _execute_on(self, conn, sql_query: str, result_format: str, cost_gate: bool,
+                    max_rows: Optional[int] = None) -> Dict[str, Any]:
+        """연결에서 쿼리 실행 (비용 게이트 사용 시 EXPLAIN으로 거절하거나 LIMIT 적용)"""
+        if not cost_gate:
+            return self._run_recorded(conn, sql_query, result_format, max_rows=max_rows)
+        
+        decision = self.cost_gate.check(conn, sql_query, self._is_single_statement(sql_query))
+        gate_info = {
+            "action": decision["action"],
+            "estimated_cost": decision["plan"]["total_cost"],
+            "estimated_rows": decision["plan"]["plan_rows"],
+            "reason": decision["reason"]
+        }
+        if decision["action"] == "reject":
+            SQL_REJECTIONS.inc(('cost_gate',))
+            result = self._error_result(f"쿼리 비용이 너무 큽니다. {decision['reason']}")
+            result["cost_gate"] = gate_info
+            return result
+        
+        result = self._run_recorded(conn, decision["sql"], result_format, decision["plan"], max_rows)
+        if decision["action"] == "limit":
+            result["cost_gate"] = gate_info
+        return result
+    
+    def execute_sql(self, sql_query: str, result_format: str = 'records',
+                    session_id: Optional[str] = None,
+                    cost_gate: Optional[bool] = None,
+                    analytics: Optional[bool] = None,
+                    max_rows: Optional[int] = None) -> Dict[str, Any]:
         """
         SQL 쿼리를 실행하고 결과를 반환
         
         Args:
             sql_query: 실행할 SQL 쿼리
+            result_format: 'records' (행 딕셔너리 목록),
+                'columns' (컬럼명 -> 값 리스트, pandas/Arrow 변환용) 또는
+                'rows' (ResultSet: 공유 컬럼 정보 + 행 튜플, 대용량 결과용)
+            session_id: 요청한 세션 ID (승인 제어용)
+            cost_gate: EXPLAIN 비용 게이트 사용 여부 (기본값: config.COST_GATE_ENABLED)
+            analytics: 집계 전용 쿼리를 분석 저장소에서 실행할지 여부
+                (기본값: 분석 저장소가 설정되어 있으면 사용)
+            max_rows: 최대 반환 행 수 (None: 제한 없음, 넘으면 잘라서 truncated 키 표시)
             
         Returns:
             실행 결과 딕셔너리 (success, data, error, row_count)
+            'columns'/'rows' 형식이면 컬럼 순서를 담은 columns 키가 추가되고,
+            비용 게이트가 쿼리를 거절하거나 제한했으면 cost_gate 키에 사유가 담기고,
+            분석 저장소에서 실행했으면 source 키가 'analytics'이고
+            staleness_seconds에 마지막 동기화 후 경과 시간(초)이 들어 있습니다.
+            max_rows보다 행이 많으면 max_rows행만 담고 truncated 키가 True입니다.
+            실패한 쿼리를 자동 수정해 실행했으면 repair 키에 수정된 SQL과 변경 내용이 담깁니다.
         """
+        if cost_gate is None:
+            cost_gate = COST_GATE_ENABLED
+        if analytics is None:
+            analytics = self.analytics is not None
+        
         try:
-            # SQL 인젝션 방지를 위한 기본 검증
-            sql_lower = sql_query.lower().strip()
+            error = self._validate_query(sql_query)
+            if error:
+                SQL_REJECTIONS.inc(('validation',))
+                return self._error_result(error)
             
-            # WITH 구문 허용 (CTE - Common Table Expression)
-            if sql_lower.startswith('with'):
-                # WITH 구문 내에 SELECT가 있는지 확인
-                if 'select' not in sql_lower:
-                    return {
-                        "success": False,
-                        "error": "WITH 구문에는 SELECT가 포함되어야 합니다.",
-                        "data": [],
-                        "row_count": 0
-                    }
-            elif not sql_lower.startswith('select'):
-                # SELECT 또는 WITH로 시작하지 않으면 차단
-                return {
-                    "success": False,
-                    "error": "보안상 SELECT 쿼리 또는 WITH 구문만 허용됩니다.",
-                    "data": [],
-                    "row_count": 0
-                }
-            
-            # 위험한 키워드 차단 (단, WITH는 허용)
-            dangerous_keywords = ['drop', 'delete', 'update', 'insert', 'alter', 'create', 'truncate']
-            for keyword in dangerous_keywords:
-                if f' {keyword} ' in f' {sql_lower} ' or sql_lower.endswith(keyword):
-                    return {
-                        "success": False,
-                        "error": f"보안상 '{keyword}' 명령은 허용되지 않습니다.",
-                        "data": [],
-                        "row_count": 0
-                    }
+            # 집계 전용 쿼리는 분석 저장소에서 실행 (대상이 아니거나 실패하면 PostgreSQL)
+            if analytics and self.analytics is not None:
+                start_time = time.perf_counter()
+                analytics_result = self.analytics.try_execute(sql_query)
+                if analytics_result is not None:
+                    result_set, age = analytics_result
+                    if max_rows is not None and len(result_set) > max_rows:
+                        result_set = result_set[:max_rows]
+                        truncated = True
+                    else:
+                        truncated = False
+                    SQL_QUERIES.inc(('analytics', 'ok'))
+                    SQL_LATENCY.observe(time.perf_counter() - start_time, ('analytics',))
+                    SQL_ROWS.observe(len(result_set), ('analytics',))
+                    result = self._format_result(result_set, result_format)
+                    result["source"] = "analytics"
+                    # 마지막 동기화 이후의 측정값은 빠져 있음
+                    result["staleness_seconds"] = round(age, 1)
+                    if truncated:
+                        result["truncated"] = True
+                    return result
             
             # 쿼리 실행
-            with self.get_connection() as conn:
-                with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                    cur.execute(sql_query)
-                    results = cur.fetchall()
-                    data = [dict(row) for row in results]
-                    
-                    return {
-                        "success": True,
-                        "data": data,
-                        "row_count": len(data),
-                        "error": None
+            with self.get_connection(session_id) as conn:
+                try:
+                    return self._execute_on(conn, sql_query, result_format, cost_gate, max_rows)
+                except psycopg2.Error as e:
+                    # 알려진 실수(JSON 연산자, 스키마 누락, 날짜 비교)는 고쳐서 한 번 더 실행
+                    repair = repair_query(sql_query, e.pgcode, str(e)) if SQL_REPAIR_ENABLED else None
+                    if repair is None or self._validate_query(repair.sql):
+                        raise
+                    conn.rollback()
+                    try:
+                        result = self._execute_on(conn, repair.sql, result_format, cost_gate, max_rows)
+                    except psycopg2.Error:
+                        # 수정한 쿼리도 실패하면 모델이 고칠 수 있도록 원래 오류를 반환
+                        raise e
+                    SQL_REPAIRS.inc()
+                    result["repair"] = {
+                        "sql": repair.sql,
+                        "changes": repair.changes,
+                        "original_error": str(e).strip()
                     }
+                    return result
+        
+        except AdmissionRejected as e:
+            SQL_REJECTIONS.inc(('admission',))
+            return self._error_result(str(e))
         
         except psycopg2.Error as e:
-            return {
-                "success": False,
-                "error": f"데이터베이스 오류: {str(e)}",
-                "data": [],
-                "row_count": 0
-            }
+            return self._error_result(f"데이터베이스 오류: {str(e)}")
+        
+        except Exception as e:
+            return self._error_result(f"예상치 못한 오류: {str(e)}")
+    
+    def fetch_dataframe(self, sql_query: str, method: str = 'cursor',
+                        session_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        SQL 쿼리 결과를 pandas DataFrame으로 반환
+        
+        행 딕셔너리를 거치지 않고 컬럼 단위로 DataFrame을 만듭니다.
+        
+        Args:
+            sql_query: 실행할 SQL 쿼리
+            method: 'cursor' (커서 결과를 컬럼 배열로 전치, 원본 타입 유지)
+                또는 'copy' (COPY ... TO STDOUT으로 CSV를 받아 일괄 파싱, 대용량에 유리하지만
+                모든 컬럼이 문자열이고 NULL은 NaN: 앞자리 0, 긴 숫자 ID가 바뀌지 않도록 타입을 추론하지 않음)
+            session_id: 요청한 세션 ID (승인 제어용)
+        
+        Returns:
+            실행 결과 딕셔너리 (success, dataframe, error, row_count)
+        """
+        import pandas as pd
+        
+        # 주석/세미콜론 등으로 COPY 안에 안전하게 넣을 수 없는 쿼리는 커서 경로 사용
+        if method == 'copy' and not self._is_single_statement(sql_query):
+            method = 'cursor'
+        
+        if method == 'cursor':
+            result = self.execute_sql(sql_query, result_format='columns', session_id=session_id)
+            if not result["success"]:
+                return dict(result, dataframe=None)
+            df = pd.DataFrame(result["data"], columns=result["columns"])
+            return {"success": True, "dataframe": df, "row_count": len(df), "error": None}
+        
+        error = self._validate_query(sql_query)
+        if error:
+            return dict(self._error_result(error), dataframe=None)
+        
+        try:
+            buffer = io.BytesIO()
+            copy_sql = f"COPY ({sql_query.strip().rstrip(';')}) TO STDOUT WITH (FORMAT csv, HEADER true)"
+            with self.get_connection(session_id) as conn:
+                with conn.cursor() as cur:
+                    cur.copy_expert(copy_sql, buffer)
+            buffer.seek(0)
+            
+            # 타입 추론은 '007' -> 7, 'NA' -> NaN처럼 값을 바꾸므로 문자열 그대로 읽음
+            csv_options = dict(dtype=str, keep_default_na=False, na_values=[''])
+            try:
+                df = pd.read_csv(buffer, engine='pyarrow', **csv_options)
+            except (ImportError, ValueError):
+                buffer.seek(0)
+                df = pd.read_csv(buffer, **csv_options)
+            
+            return {"success": True, "dataframe": df, "row_count": len(df), "error": None}
+        
+        except AdmissionRejected as e:
+            return dict(self._error_result(str(e)), dataframe=None)
+        
+        except psycopg2.Error as e:
+            return dict(self._error_result(f"데이터베이스 오류: {str(e)}"), dataframe=None)
         
         except Exception as e:
+            return dict(self._error_result(f"예상치 못한 오류: {str(e)}"), dataframe=None)
+    
+    def export_query(self, sql_query: str, path: str, file_format: str = 'csv',
+                     chunk_size: int = 50000, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        SQL 쿼리 결과를 파일로 스트리밍 내보내기
+        
+        전체 결과를 메모리에 올리지 않고 청크 단위로 파일에 기록합니다.
+        CSV는 COPY ... TO STDOUT을 파일에 바로 쓰고, Parquet은 서버 측 커서에서
+        chunk_size 행씩 받아 row group 단위로 기록합니다.
+        
+        Args:
+            sql_query: 실행할 SQL 쿼리
+            path: 저장할 파일 경로
+            file_format: 'csv', 'csv.gz' 또는 'parquet'
+            chunk_size: 서버 측 커서에서 한 번에 가져올 행 수
+            session_id: 요청한 세션 ID (승인 제어용)
+        
+        Returns:
+            실행 결과 딕셔너리 (success, path, row_count, bytes, error)
+        """
+        error = self._validate_query(sql_query)
+        if error is None and file_format not in ('csv', 'csv.gz', 'parquet'):
+            error = f"지원하지 않는 형식입니다: {file_format}"
+        if error:
+            return dict(self._error_result(error), path=None, bytes=0)
+        
+        try:
+            if file_format == 'parquet':
+                row_count = self._export_parquet(sql_query, path, chunk_size, session_id)
+            else:
+                opener = gzip.open if file_format == 'csv.gz' else open
+                with opener(path, 'wb') as f:
+                    if self._is_single_statement(sql_query):
+                        row_count = self._export_csv_copy(sql_query, f, session_id)
+                    else:
+                        row_count = self._export_csv_cursor(sql_query, f, chunk_size, session_id)
+            
             return {
-                "success": False,
-                "error": f"예상치 못한 오류: {str(e)}",
-                "data": [],
-                "row_count": 0
+                "success": True,
+                "path": path,
+                "row_count": row_count,
+                "bytes": os.path.getsize(path),
+                "error": None
             }
+        
+        except AdmissionRejected as e:
+            return dict(self._error_result(str(e)), path=None, bytes=0)
+        
+        except psycopg2.Error as e:
+            return dict(self._error_result(f"데이터베이스 오류: {str(e)}"), path=None, bytes=0)
+        
+        except Exception as e:
+            return dict(self._error_result(f"예상치 못한 오류: {str(e)}"), path=None, bytes=0)
+    
+    def _export_csv_copy(self, sql_query: str, f, session_id: Optional[str]) -> int:
+        """COPY ... TO STDOUT 결과를 파일 객체에 바로 기록"""
+        copy_sql = f"COPY ({sql_query.strip().rstrip(';')}) TO STDOUT WITH (FORMAT csv, HEADER true)"
+        with self.get_connection(session_id) as conn:
+            with conn.cursor() as cur:
+                cur.copy_expert(copy_sql, f)
+                return cur.rowcount
+    
+    def _iter_chunks(self, sql_query: str, chunk_size: int, session_id: Optional[str]):
+        """서버 측 커서로 (컬럼명 목록, 행 청크)를 순서대로 반환"""
+        with self.get_connection(session_id) as conn:
+            with conn.cursor(name='export_cursor') as cur:
+                cur.itersize = chunk_size
+                cur.execute(sql_query)
+                rows = cur.fetchmany(chunk_size)
+                columns = [desc.name for desc in cur.description]
+                while rows:
+                    yield columns, rows
+                    rows = cur.fetchmany(chunk_size)
+    
+    def _export_csv_cursor(self, sql_query: str, f, chunk_size: int, session_id: Optional[str]) -> int:
+        """서버 측 커서 청크를 CSV로 기록 (COPY를 쓸 수 없는 쿼리용)"""
+        text = io.TextIOWrapper(f, encoding='utf-8', newline='')
+        writer = csv.writer(text)
+        row_count = 0
+        for columns, rows in self._iter_chunks(sql_query, chunk_size, session_id):
+            if row_count == 0:
+                writer.writerow(columns)
+            writer.writerows(rows)
+            row_count += len(rows)
+        text.flush()
+        text.detach()
+        return row_count
+    
+    def _export_parquet(self, sql_query: str, path: str, chunk_size: int, session_id: Optional[str]) -> int:
+        """서버 측 커서 청크를 Parquet row group으로 기록"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet 내보내기에는 pyarrow 패키지가 필요합니다.")
+        
+        writer = None
+        row_count = 0
+        try:
+            for columns, rows in self._iter_chunks(sql_query, chunk_size, session_id):
+                data = {name: list(col) for name, col in zip(columns, zip(*rows))}
+                if writer is None:
+                    table = pa.Table.from_pydict(data)
+                    writer = pq.ParquetWriter(path, table.schema, compression='zstd')
+                else:
+                    table = pa.Table.from_pydict(data, schema=writer.schema)
+                writer.write_table(table)
+                row_count += len(rows)
+        finally:
+            if writer is not None:
+                writer.close()
+        
+        if writer is None:
+            # 결과가 없으면 빈 파일 대신 빈 Parquet 생성
+            pq.write_table(pa.table({}), path)
+        return row_count
+    
+    def find_users(self, name: str, limit: int = 10,
+                   session_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        이름으로 사용자 검색
+        
+        사용자 인덱스가 켜져 있으면 메모리에서 찾고, 꺼져 있으면 tb_user_info를 직접 조회합니다.
+        
+        Returns:
+            user_uuid, flnm, gndr_cd, use_yn, match('exact' | 'partial') 목록 (정확히 일치하는 이름 먼저)
+        """
+        if self.users is not None:
+            return self.users.find(name, limit, session_id)
+        
+        with self.get_connection(session_id) as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"SELECT {', '.join(USER_COLUMNS)} FROM agent.tb_user_info "
+                    "WHERE flnm ILIKE %s ORDER BY (lower(flnm) = lower(%s)) DESC, length(flnm), flnm LIMIT %s",
+                    (f"%{name.strip()}%", name.strip(), limit)
+                )
+                rows = cur.fetchall()
+        key = name.strip().lower()
+        return [
+            dict(zip(USER_COLUMNS, row), match='exact' if row[1].lower() == key else 'partial')
+            for row in rows
+        ]
     
     def get_schema_description(self) -> str:
         """스키마 정보 반환"""
@@ -192,25 +635,23 @@ def search_database(natural_language_query: str, sql_query: str) -> str:
     Returns:
         JSON 형식의 검색 결과
     """
-    import json
-    
     tool = TextToSQLTool()
     result = tool.execute_sql(sql_query)
     
     # 결과를 보기 좋게 포맷팅
     if result["success"]:
-        return json.dumps({
+        return serialize_result({
             "status": "success",
             "query": sql_query,
             "row_count": result["row_count"],
             "data": result["data"]
-        }, ensure_ascii=False, default=str, indent=2)
+        })
     else:
-        return json.dumps({
+        return dumps({
             "status": "error",
             "query": sql_query,
             "error": result["error"]
-        }, ensure_ascii=False, indent=2)
+        })
 
 
 def get_database_schema() -> str:
@@ -0,0 +1,196 @@
+"""
+토큰/비용 계산과 예산
+모델 ID별 단가로 턴/세션의 예상 비용을 계산하고, 턴 토큰 예산이 줄어들면 도구 결과를 줄이며
+예산을 넘기면 Agent 루프를 멈추고, 세션 예산을 넘긴 대화는 모델을 호출하지 않습니다.
+"""
+import re
+import threading
+import warnings
+from typing import Any, Callable, Dict, Optional
+
+import config
+
+# 모델 ID -> (입력, 출력) 100만 토큰당 USD (리전 접두어 us./eu./apac./global. 제외)
+# 공개 온디맨드 가격 기준 추정치이므로 계약 가격에 맞게 config.py에서 바꿔 쓰세요.
+DEFAULT_MODEL_PRICES = {
+    'anthropic.claude-3-haiku-20240307-v1:0': (0.25, 1.25),
+    'anthropic.claude-3-5-haiku-20241022-v1:0': (0.8, 4.0),
+    'anthropic.claude-3-5-sonnet-20240620-v1:0': (3.0, 15.0),
+    'anthropic.claude-3-5-sonnet-20241022-v2:0': (3.0, 15.0),
+    'anthropic.claude-3-7-sonnet-20250219-v1:0': (3.0, 15.0),
+}
+MODEL_PRICES = getattr(config, 'MODEL_PRICES', DEFAULT_MODEL_PRICES)
+
+# 한 턴(모델 재호출 포함)에서 사용할 최대 토큰 수 (입력+출력, 0: 제한 없음)
+TURN_TOKEN_BUDGET = getattr(config, 'TURN_TOKEN_BUDGET', 100000)
+# 도구 결과 한 건의 최대 토큰 수 (0: 제한 없음, 턴 예산이 줄어들면 더 작게 자름)
+TOOL_OUTPUT_MAX_TOKENS = getattr(config, 'TOOL_OUTPUT_MAX_TOKENS', 8000)
+# 세션 누적 예산 (0: 제한 없음)
+SESSION_TOKEN_BUDGET = getattr(config, 'SESSION_TOKEN_BUDGET', 0)
+SESSION_COST_BUDGET = getattr(config, 'SESSION_COST_BUDGET', 0)
+
+# 도구 결과 길이 -> 토큰 수 환산 (JSON과 한글이 섞인 결과의 보수적인 추정)
+CHARS_PER_TOKEN = 3
+# 턴 예산이 남아 있으면 도구 결과에 최소 이만큼은 허용
+MIN_TOOL_OUTPUT_TOKENS = 500
+
+REGION_PREFIX = re.compile(r'^(?:us|eu|apac|us-gov|global)\.')
+
+# 단가가 없다고 경고한 모델 ID (모델마다 한 번만 경고)
+_unpriced_models = set()
+_unpriced_lock = threading.Lock()
+
+
+def model_price(model_id: Optional[str]):
+    """(입력, 출력) 100만 토큰당 USD, 모르는 모델이면 None"""
+    if not model_id:
+        return None
+    return MODEL_PRICES.get(model_id) or MODEL_PRICES.get(REGION_PREFIX.sub('', model_id))
+
+
+def estimate_cost(model_id: Optional[str], input_tokens: int, output_tokens: int) -> Optional[float]:
+    """예상 비용 (USD, 단가를 모르면 None)"""
+    price = model_price(model_id)
+    if price is None:
+        return None
+    return (input_tokens * price[0] + output_tokens * price[1]) / 1_000_000
+
+
+def add_usage(totals: Dict[str, Dict[str, Any]], model_id: str, input_tokens: int,
+              output_tokens: int, model_calls: int) -> Dict[str, Dict[str, Any]]:
+    """
+    모델 ID별 사용량에 더함 (totals를 제자리에서 갱신)
+
+    Args:
+        totals: 모델 ID -> {input_tokens, output_tokens, model_calls, cost_usd}
+    """
+    entry = totals.setdefault(model_id, {"input_tokens": 0, "output_tokens": 0,
+                                         "model_calls": 0, "cost_usd": 0.0})
+    entry["input_tokens"] += input_tokens
+    entry["output_tokens"] += output_tokens
+    entry["model_calls"] += model_calls
+    cost = estimate_cost(model_id, input_tokens, output_tokens)
+    if cost is None and (input_tokens or output_tokens):
+        _warn_unpriced(model_id)
+    entry["cost_usd"] += cost or 0.0
+    return totals
+
+
+def _warn_unpriced(model_id: Optional[str]):
+    """단가를 모르는 모델의 비용은 0으로 집계되어 비용 예산이 걸리지 않으므로 경고"""
+    with _unpriced_lock:
+        if model_id in _unpriced_models:
+            return
+        _unpriced_models.add(model_id)
+    warnings.warn(
+        f"모델 '{model_id}'의 단가가 MODEL_PRICES에 없어 예상 비용을 0으로 집계합니다. "
+        "SESSION_COST_BUDGET을 쓰려면 config.py의 MODEL_PRICES에 추가하세요.",
+        RuntimeWarning, stacklevel=3
+    )
+
+
+def total_usage(totals: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """모델 ID별 사용량 합계"""
+    summed = {"input_tokens": 0, "output_tokens": 0, "model_calls": 0, "cost_usd": 0.0}
+    for entry in totals.values():
+        for key in summed:
+            summed[key] += entry.get(key, 0)
+    return summed
+
+
+def session_budget_error(totals: Dict[str, Dict[str, Any]], token_budget: int = SESSION_TOKEN_BUDGET,
+                         cost_budget: float = SESSION_COST_BUDGET) -> Optional[str]:
+    """세션 누적 사용량이 예산을 넘었으면 안내 문구, 아니면 None"""
+    summed = total_usage(totals)
+    tokens = summed["input_tokens"] + summed["output_tokens"]
+    if token_budget and tokens >= token_budget:
+        return f"이 대화의 토큰 사용량({tokens:,})이 예산({token_budget:,})에 도달했습니다."
+    if cost_budget and summed["cost_usd"] >= cost_budget:
+        return f"이 대화의 예상 비용(${summed['cost_usd']:.4f})이 예산(${cost_budget:.4f})에 도달했습니다."
+    return None
+
+
+class TurnBudget:
+    """
+    한 턴의 토큰 예산
+
+    HealthChatAgent가 invocation_state["turn_budget"]으로 도구에 전달합니다.
+    사용량은 Agent의 누적 사용량에서 턴 시작 시점 값을 빼서 구하므로
+    도구가 실행될 때는 그 도구를 요청한 모델 호출까지 반영되어 있습니다.
+    """
+
+    def __init__(self, start_tokens: int, max_tokens: int = TURN_TOKEN_BUDGET,
+                 tool_output_max_tokens: int = TOOL_OUTPUT_MAX_TOKENS):
+        self.start_tokens = start_tokens
+        self.max_tokens = max_tokens
+        self.tool_output_max_tokens = tool_output_max_tokens
+        self.trimmed = 0
+        self.stop_reason: Optional[str] = None
+
+    def used(self, agent) -> int:
+        return agent.event_loop_metrics.accumulated_usage.get("totalTokens", 0) - self.start_tokens
+
+    def check(self, agent) -> Optional[str]:
+        """턴 예산을 넘었으면 중단 사유를 기록하고 반환"""
+        if self.max_tokens and self.stop_reason is None:
+            used = self.used(agent)
+            if used >= self.max_tokens:
+                self.stop_reason = f"이번 질문의 토큰 사용량({used:,})이 턴 예산({self.max_tokens:,})에 도달했습니다."
+        return self.stop_reason
+
+    def output_limit(self, agent) -> Optional[int]:
+        """
+        도구 결과 최대 길이 (문자 수, 제한 없으면 None)
+
+        도구 결과는 이후 모델 호출마다 다시 입력되므로 남은 턴 예산의 절반을 넘지 않게 합니다.
+        """
+        limits = []
+        if self.tool_output_max_tokens:
+            limits.append(self.tool_output_max_tokens)
+        if self.max_tokens:
+            remaining = self.max_tokens - self.used(agent)
+            limits.append(max(MIN_TOOL_OUTPUT_TOKENS, remaining // 2))
+        return min(limits) * CHARS_PER_TOKEN if limits else None
+
+    def fit(self, agent, payload: Dict[str, Any], serialize: Callable[[Dict[str, Any]], str],
+            key: str = "data") -> str:
+        """
+        도구 결과를 직렬화하고, 한도를 넘으면 payload[key] 목록의 뒤쪽 항목을 잘라 한도에 맞춤
+
+        Args:
+            agent: 도구를 호출한 Strands Agent
+            payload: 도구 응답 딕셔너리
+            serialize: 직렬화 함수 (dumps, serialize_result)
+            key: 자를 목록의 키
+
+        Returns:
+            직렬화한 도구 결과 (잘랐으면 truncated, returned_items, message 포함)
+        """
+        text = serialize(payload)
+        limit = self.output_limit(agent)
+        if limit is None or len(text) <= limit:
+            return text
+
+        items = payload.get(key)
+        if not isinstance(items, list):
+            items = []
+        self.trimmed += 1
+
+        def trimmed(count: int) -> str:
+            return serialize(dict(
+                payload, **{key: items[:count]}, truncated=True, returned_items=count,
+                message=(f"토큰 예산 때문에 결과 {len(items)}건 중 {count}건만 반환했습니다. "
+                         "필요하면 조건이나 LIMIT을 좁혀 다시 조회하세요.")
+            ))
+
+        # 한도 안에 들어가는 최대 항목 수 (이진 탐색)
+        low, high = 0, len(items)
+        best = trimmed(0)
+        while low < high:
+            middle = (low + high + 1) // 2
+            candidate = trimmed(middle)
+            if len(candidate) <= limit:
+                low, best = middle, candidate
+            else:
+                high = middle - 1
+        return best
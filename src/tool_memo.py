@@ -0,0 +1,127 @@
+"""
+대화별 도구 호출 기록
+같은 대화에서 같은 인자로 다시 호출된 도구는 DB를 다시 조회하지 않고 이전 결과를 사용하며,
+같은 형태의 쿼리가 한 턴에서 반복해서 실패하면 Agent 루프를 중단하도록 표시합니다.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import config
+
+TOOL_MEMO_ENABLED = getattr(config, 'TOOL_MEMO_ENABLED', True)
+# 이 시간(초)이 지난 결과는 다시 조회 (새 측정값 반영)
+TOOL_MEMO_TTL = getattr(config, 'TOOL_MEMO_TTL', 300)
+# 대화 하나에 보관할 최대 결과 수 (넘으면 가장 오래 쓰지 않은 결과부터 삭제)
+TOOL_MEMO_MAX_ENTRIES = getattr(config, 'TOOL_MEMO_MAX_ENTRIES', 64)
+# 한 턴에서 같은 형태의 쿼리가 이 횟수만큼 실패하면 루프 중단
+TOOL_MAX_REPEATED_FAILURES = getattr(config, 'TOOL_MAX_REPEATED_FAILURES', 3)
+
+
+class MemoEntry(NamedTuple):
+    tool_use_id: str
+    created: float
+    payload: str
+    summary: Dict[str, Any]
+
+
+def _in_history(messages: List[Dict[str, Any]], tool_use_id: str) -> bool:
+    """toolUseId의 결과가 아직 대화 기록에 남아 있는지 (대화 관리자가 잘라냈으면 False)"""
+    for message in reversed(messages):
+        if message["role"] != "user":
+            continue
+        for block in message["content"]:
+            tool_result = block.get("toolResult")
+            if tool_result and tool_result.get("toolUseId") == tool_use_id:
+                return True
+    return False
+
+
+class ToolCallMemo:
+    """
+    대화 하나의 도구 호출 결과와 턴 내 실패 기록
+
+    HealthChatAgent가 invocation_state["tool_memo"]로 도구에 전달합니다.
+    이전 결과가 대화 기록에 남아 있으면 모델에는 짧은 안내만 돌려주고,
+    기록에서 잘려 나갔으면 저장한 전체 결과를 다시 돌려줍니다 (어느 경우든 DB는 조회하지 않음).
+    """
+
+    def __init__(self, ttl: float = TOOL_MEMO_TTL,
+                 max_repeated_failures: int = TOOL_MAX_REPEATED_FAILURES,
+                 max_entries: int = TOOL_MEMO_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_repeated_failures = max_repeated_failures
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple[str, str], MemoEntry]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.start_turn()
+
+    def start_turn(self):
+        """턴(또는 대형 모델 재시도) 시작 시 턴 단위 기록 초기화"""
+        self.turn_hits = 0
+        # 형태별 실패 횟수, 실패한 쿼리별 오류 (일시적 오류일 수 있으므로 턴이 끝나면 잊음)
+        self.turn_failures: Dict[str, int] = {}
+        self.failed_queries: Dict[str, str] = {}
+        self.stop_reason: Optional[str] = None
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+        self.start_turn()
+
+    def lookup(self, tool_name: str, key: str, messages: List[Dict[str, Any]]) -> Optional[Tuple[MemoEntry, bool]]:
+        """
+        이전 호출 결과 조회
+
+        Returns:
+            (기록, 이전 결과가 대화 기록에 있는지) 또는 None (기록 없음, 만료)
+        """
+        with self.lock:
+            entry = self.entries.get((tool_name, key))
+            if entry is None:
+                return None
+            if time.monotonic() - entry.created > self.ttl:
+                del self.entries[(tool_name, key)]
+                return None
+            self.entries.move_to_end((tool_name, key))
+            self.hits += 1
+            self.turn_hits += 1
+        return entry, _in_history(messages, entry.tool_use_id)
+
+    def record(self, tool_name: str, key: str, tool_use_id: str, payload: str,
+               summary: Optional[Dict[str, Any]] = None):
+        """성공한 도구 호출 결과 저장 (만료된 결과를 지우고 max_entries를 넘으면 오래된 것부터 삭제)"""
+        now = time.monotonic()
+        with self.lock:
+            for expired in [k for k, entry in self.entries.items() if now - entry.created > self.ttl]:
+                del self.entries[expired]
+            self.entries[(tool_name, key)] = MemoEntry(tool_use_id, now, payload, summary or {})
+            self.entries.move_to_end((tool_name, key))
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def failed_error(self, key: str) -> Optional[str]:
+        """이번 턴에 같은 쿼리가 실패했으면 그 오류"""
+        return self.failed_queries.get(key)
+
+    def record_failure(self, key: str, shape: str, error: str) -> bool:
+        """
+        이번 턴의 쿼리 실패 기록
+
+        Args:
+            key: 정규화한 쿼리 (같은 쿼리 재실행 방지)
+            shape: 쿼리 형태 (리터럴만 바꾼 재시도도 같은 실패로 집계)
+            error: 오류 메시지
+
+        Returns:
+            같은 형태의 실패가 한도에 도달해 루프를 중단해야 하면 True
+        """
+        with self.lock:
+            self.failed_queries[key] = error
+            count = self.turn_failures.get(shape, 0) + 1
+            self.turn_failures[shape] = count
+            if count >= self.max_repeated_failures and self.stop_reason is None:
+                self.stop_reason = error
+        return self.stop_reason is not None
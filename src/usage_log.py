@@ -0,0 +1,133 @@
+"""
+모델 사용량 기록
+턴마다 세션, 경로, 모델 ID별 토큰 수와 예상 비용을 JSONL 파일에 기록합니다 (scripts/usage_report.py로 집계).
+"""
+import json
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: 파일 잠금 없이 기록 (여러 워커가 같은 파일을 쓰면 교체 시 기록이 섞일 수 있음)
+    fcntl = None
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import config
+
+USAGE_LOG_ENABLED = getattr(config, 'USAGE_LOG_ENABLED', True)
+USAGE_LOG_PATH = getattr(
+    config, 'USAGE_LOG_PATH',
+    str(Path(__file__).parent.parent / 'logs' / 'usage.jsonl')
+)
+USAGE_LOG_MAX_BYTES = getattr(config, 'USAGE_LOG_MAX_BYTES', 50 * 1024 * 1024)
+
+
+class UsageRecorder:
+    """
+    턴별 모델 사용량 기록
+
+    파일이 max_bytes를 넘으면 .1 파일로 교체합니다. API 서버 워커처럼 여러 프로세스가
+    같은 파일에 기록하므로 쓰기와 교체는 파일 잠금(fcntl) 안에서 하고, 다른 프로세스가
+    파일을 교체했으면(경로의 inode가 바뀌면) 새 파일을 다시 엽니다.
+    """
+
+    def __init__(self, path: str = USAGE_LOG_PATH, enabled: bool = USAGE_LOG_ENABLED,
+                 max_bytes: int = USAGE_LOG_MAX_BYTES):
+        self.path = Path(path)
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.file = None
+
+    def _open(self):
+        if self.file is not None and self._replaced():
+            self.file.close()
+            self.file = None
+        if self.file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.file = open(self.path, 'a', encoding='utf-8')
+        return self.file
+
+    def _replaced(self) -> bool:
+        """열어 둔 파일이 다른 프로세스의 교체로 더 이상 경로의 파일이 아닌지"""
+        try:
+            return os.stat(self.path).st_ino != os.fstat(self.file.fileno()).st_ino
+        except FileNotFoundError:
+            return True
+
+    def _write(self, line: str):
+        """파일 잠금 안에서 한 줄 추가 (잠그는 사이 교체되었으면 새 파일로 다시 시도)"""
+        while True:
+            f = self._open()
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                if fcntl is not None and self._replaced():
+                    continue
+                f.write(line)
+                f.flush()
+                if os.fstat(f.fileno()).st_size > self.max_bytes:
+                    # 잠금을 쥔 채 교체하므로 다른 워커의 기록이 교체 전 파일과 새 파일 사이에서 사라지지 않음
+                    os.replace(self.path, self.path.with_name(self.path.name + '.1'))
+                return
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def record(self, session_id: str, route: Optional[str], usage_by_model: Dict[str, Dict[str, Any]],
+               success: bool, stopped: Optional[str] = None, trimmed: int = 0):
+        """
+        턴 한 건 기록
+
+        Args:
+            session_id: 대화 세션 ID
+            route: 모델 라우팅 경로 (세션 예산으로 거절한 턴은 None)
+            usage_by_model: 모델 ID -> {input_tokens, output_tokens, model_calls, cost_usd}
+            success: 턴 성공 여부
+            stopped: 루프를 중단했으면 사유 ('budget', 'repeated_failure', 'session_budget')
+            trimmed: 토큰 예산 때문에 줄인 도구 결과 수
+        """
+        if not self.enabled:
+            return
+        entry = {
+            "t": round(time.time(), 3),
+            "session": session_id,
+            "route": route,
+            "models": {
+                model_id: {
+                    "in": usage["input_tokens"],
+                    "out": usage["output_tokens"],
+                    "calls": usage["model_calls"],
+                    "cost": round(usage["cost_usd"], 6)
+                }
+                for model_id, usage in usage_by_model.items()
+            },
+            "ok": success
+        }
+        if stopped:
+            entry["stopped"] = stopped
+        if trimmed:
+            entry["trimmed"] = trimmed
+
+        try:
+            with self.lock:
+                self._write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError:
+            # 기록 실패가 대화를 막지 않도록 무시
+            pass
+
+
+_default_recorder: Optional[UsageRecorder] = None
+_default_lock = threading.Lock()
+
+
+def get_default_recorder() -> UsageRecorder:
+    """프로세스 전체에서 공유하는 사용량 기록기"""
+    global _default_recorder
+    with _default_lock:
+        if _default_recorder is None:
+            _default_recorder = UsageRecorder()
+        return _default_recorder
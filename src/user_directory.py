@@ -0,0 +1,208 @@
+"""
+사용자 이름 -> user_uuid 조회 인덱스
+tb_user_info의 이름을 메모리에 올려 두고 trigram 인덱스로 부분 일치 검색을 합니다.
+reg_dt 워터마크로 새로 등록된 사용자만 주기적으로 가져오고, 긴 주기로 전체를 다시 읽습니다.
+앞에 %가 붙은 LIKE 검색(전체 스캔)을 하지 않고 user_uuid를 찾은 뒤 기본 키로 조회하기 위한 것입니다.
+"""
+import heapq
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+
+import config
+
+USER_DIRECTORY_ENABLED = getattr(config, 'USER_DIRECTORY_ENABLED', True)
+# 증분 갱신 주기 (초)
+USER_DIRECTORY_REFRESH = getattr(config, 'USER_DIRECTORY_REFRESH', 60)
+# 전체 다시 읽기 주기 (초, 이름 변경/삭제 반영)
+USER_DIRECTORY_FULL_REFRESH = getattr(config, 'USER_DIRECTORY_FULL_REFRESH', 3600)
+# 검색 결과가 없을 때 증분 갱신을 다시 시도하는 최소 간격 (초)
+USER_DIRECTORY_MISS_REFRESH = 5
+USER_DIRECTORY_FETCH_SIZE = 10000
+
+USER_COLUMNS = ('user_uuid', 'flnm', 'gndr_cd', 'use_yn')
+FULL_SQL = f"SELECT {', '.join(USER_COLUMNS)}, reg_dt FROM agent.tb_user_info"
+INCREMENTAL_SQL = FULL_SQL + " WHERE reg_dt >= %s ORDER BY reg_dt"
+
+
+def trigrams(text: str) -> Set[str]:
+    """문자열의 3글자 조각 집합 (소문자 기준)"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class NameIndex:
+    """
+    이름 검색 인덱스 (잠금 없음, UserDirectory가 보호)
+
+    정확히 일치하는 이름은 딕셔너리로, 부분 일치는 trigram 후보 집합의 교집합을 구한 뒤
+    실제 포함 여부를 확인합니다 (3글자 미만 검색어는 전체 이름을 확인).
+    """
+
+    def __init__(self):
+        self.users: Dict[str, Dict[str, Any]] = {}
+        self.exact: Dict[str, Set[str]] = {}
+        self.grams: Dict[str, Set[str]] = {}
+
+    def remove(self, user_uuid: str):
+        user = self.users.pop(user_uuid, None)
+        if user is None:
+            return
+        key = user["flnm"].lower()
+        self.exact.get(key, set()).discard(user_uuid)
+        for gram in trigrams(key):
+            self.grams.get(gram, set()).discard(user_uuid)
+
+    def add(self, row: tuple):
+        user = dict(zip(USER_COLUMNS, row))
+        user_uuid = user["user_uuid"]
+        self.remove(user_uuid)
+        if not user["flnm"]:
+            return
+        self.users[user_uuid] = user
+        key = user["flnm"].lower()
+        self.exact.setdefault(key, set()).add(user_uuid)
+        for gram in trigrams(key):
+            self.grams.setdefault(gram, set()).add(user_uuid)
+
+    def search(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        key = query.strip().lower()
+        if not key:
+            return []
+        exact = self.exact.get(key, set())
+        if len(key) >= 3:
+            # 가장 작은 후보 집합부터 교집합
+            sets = sorted((self.grams.get(gram, set()) for gram in trigrams(key)), key=len)
+            candidates = sets[0].intersection(*sets[1:])
+        else:
+            candidates = self.users.keys()
+        partial = heapq.nsmallest(
+            limit,
+            (u for u in candidates if u not in exact and key in self.users[u]["flnm"].lower()),
+            key=lambda u: (len(self.users[u]["flnm"]), self.users[u]["flnm"])
+        )
+        ordered = sorted(exact, key=lambda u: self.users[u]["flnm"])
+        return ([dict(self.users[u], match='exact') for u in ordered]
+                + [dict(self.users[u], match='partial') for u in partial])[:limit]
+
+
+class UserDirectory:
+    """
+    이름 -> 사용자 검색 (주기적으로 DB와 동기화)
+
+    전체 다시 읽기는 새 인덱스를 만든 뒤 교체하므로 그동안에도 기존 인덱스로 검색할 수 있습니다.
+    """
+
+    def __init__(self, tool, refresh_interval: float = USER_DIRECTORY_REFRESH,
+                 full_refresh_interval: float = USER_DIRECTORY_FULL_REFRESH):
+        """
+        Args:
+            tool: 연결을 제공할 TextToSQLTool (승인 제어, 연결 풀 공유)
+            refresh_interval: 증분 갱신 주기 (초)
+            full_refresh_interval: 전체 다시 읽기 주기 (초)
+        """
+        self.tool = tool
+        self.refresh_interval = refresh_interval
+        self.full_refresh_interval = full_refresh_interval
+        self.names = NameIndex()
+        self.watermark = None
+        self.refreshed_at = 0.0
+        self.full_refreshed_at = 0.0
+        # 검색/반영은 lock, 갱신(DB 조회)은 refresh_lock으로 한 스레드만
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+        self.lookups = 0
+        self.misses = 0
+
+    def refresh(self, full: bool = False, session_id: Optional[str] = None,
+                max_age: Optional[float] = None) -> int:
+        """
+        DB에서 사용자 목록 갱신
+
+        Args:
+            full: 전체 다시 읽기 (아니면 워터마크 이후 등록된 사용자만)
+            session_id: 요청한 세션 ID (승인 제어용)
+            max_age: 지정하면 기다리는 동안 다른 스레드가 이 시간(초) 안에 갱신했을 때 건너뜀
+
+        Returns:
+            읽은 행 수
+        """
+        with self.refresh_lock:
+            last = self.full_refreshed_at if full else self.refreshed_at
+            if max_age is not None and time.monotonic() - last < max_age:
+                return 0
+            full = full or self.watermark is None
+            target = NameIndex() if full else self.names
+            watermark = None if full else self.watermark
+            count = 0
+            with self.tool.get_connection(session_id) as conn:
+                # 서버 측 커서로 나누어 읽음 (전체 읽기 시 메모리 급증 방지)
+                with conn.cursor(name='user_directory') as cur:
+                    cur.itersize = USER_DIRECTORY_FETCH_SIZE
+                    if full:
+                        cur.execute(FULL_SQL)
+                    else:
+                        cur.execute(INCREMENTAL_SQL, (watermark,))
+                    while True:
+                        rows = cur.fetchmany(USER_DIRECTORY_FETCH_SIZE)
+                        if not rows:
+                            break
+                        count += len(rows)
+                        for row in rows:
+                            if row[-1] is not None and (watermark is None or row[-1] > watermark):
+                                watermark = row[-1]
+                        if full:
+                            for row in rows:
+                                target.add(row[:-1])
+                        else:
+                            with self.lock:
+                                for row in rows:
+                                    target.add(row[:-1])
+            now = time.monotonic()
+            with self.lock:
+                self.names = target
+                self.watermark = watermark
+                self.refreshed_at = now
+                if full:
+                    self.full_refreshed_at = now
+            return count
+
+    def _ensure_fresh(self, session_id: Optional[str]):
+        now = time.monotonic()
+        if now - self.full_refreshed_at >= self.full_refresh_interval:
+            self.refresh(full=True, session_id=session_id, max_age=self.full_refresh_interval)
+        elif now - self.refreshed_at >= self.refresh_interval:
+            self.refresh(session_id=session_id, max_age=self.refresh_interval)
+
+    def _search(self, name: str, limit: int) -> List[Dict[str, Any]]:
+        with self.lock:
+            return self.names.search(name, limit)
+
+    def find(self, name: str, limit: int = 10, session_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        이름으로 사용자 검색
+
+        정확히 일치하는 이름을 먼저, 그다음 부분 일치를 짧은 이름 순으로 반환합니다.
+        결과가 없으면 방금 등록된 사용자일 수 있으므로 증분 갱신 후 한 번 더 찾습니다.
+
+        Returns:
+            user_uuid, flnm, gndr_cd, use_yn, match('exact' | 'partial') 목록
+        """
+        self.lookups += 1
+        self._ensure_fresh(session_id)
+        results = self._search(name, limit)
+        if not results and time.monotonic() - self.refreshed_at >= USER_DIRECTORY_MISS_REFRESH:
+            self.refresh(session_id=session_id, max_age=USER_DIRECTORY_MISS_REFRESH)
+            results = self._search(name, limit)
+        if not results:
+            self.misses += 1
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "users": len(self.names.users),
+                "trigrams": len(self.names.grams),
+                "lookups": self.lookups,
+                "misses": self.misses,
+                "age_seconds": round(time.monotonic() - self.refreshed_at, 1) if self.refreshed_at else None
+            }
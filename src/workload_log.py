@@ -0,0 +1,150 @@
+"""
+쿼리 워크로드 기록
+실행된 쿼리를 형태(shape)별로 묶을 수 있도록 JSONL 파일에 간단히 기록합니다.
+"""
+import json
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: 파일 잠금 없이 기록 (여러 워커가 같은 파일을 쓰면 교체 시 기록이 섞일 수 있음)
+    fcntl = None
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+import config
+from src.sql_shape import leading_wildcard_columns, normalize_query, shape_id
+
+WORKLOAD_LOG_ENABLED = getattr(config, 'WORKLOAD_LOG_ENABLED', True)
+WORKLOAD_LOG_PATH = getattr(
+    config, 'WORKLOAD_LOG_PATH',
+    str(Path(__file__).parent.parent / 'logs' / 'workload.jsonl')
+)
+WORKLOAD_LOG_MAX_BYTES = getattr(config, 'WORKLOAD_LOG_MAX_BYTES', 50 * 1024 * 1024)
+# 형태별 원본 SQL 예시도 기록 (리터럴의 사용자 UUID, 이름 등이 로그에 남으므로 기본은 끔)
+WORKLOAD_LOG_SAMPLES = getattr(config, 'WORKLOAD_LOG_SAMPLES', False)
+
+
+class WorkloadRecorder:
+    """
+    실행된 쿼리의 형태, 소요 시간, 행 수, 계획 요약을 기록
+
+    형태 문자열은 파일마다 형태별로 처음 한 번만 기록하고, 이후 기록은 형태 ID만 남겨
+    로그를 작게 유지합니다. 리터럴 값이 남는 원본 SQL 예시는 samples=True일 때만 기록합니다.
+    파일이 max_bytes를 넘으면 .1 파일로 교체합니다. API 서버 워커처럼 여러 프로세스가
+    같은 파일에 기록하므로 쓰기와 교체는 파일 잠금(fcntl) 안에서 하고, 다른 프로세스가
+    파일을 교체했으면(경로의 inode가 바뀌면) 새 파일을 다시 엽니다.
+    """
+
+    def __init__(self, path: str = WORKLOAD_LOG_PATH, enabled: bool = WORKLOAD_LOG_ENABLED,
+                 max_bytes: int = WORKLOAD_LOG_MAX_BYTES, samples: bool = WORKLOAD_LOG_SAMPLES):
+        self.path = Path(path)
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.samples = samples
+        self.lock = threading.Lock()
+        # 지금 열린 파일에 형태 문자열을 기록한 형태 ID
+        self.seen_shapes = set()
+        self.file = None
+
+    def _open(self):
+        if self.file is not None and self._replaced():
+            self.file.close()
+            self.file = None
+        if self.file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.file = open(self.path, 'a', encoding='utf-8')
+            # 새 파일에도 형태 정보가 남도록 초기화
+            self.seen_shapes.clear()
+        return self.file
+
+    def _replaced(self) -> bool:
+        """열어 둔 파일이 교체되어 더 이상 경로의 파일이 아닌지"""
+        try:
+            return os.stat(self.path).st_ino != os.fstat(self.file.fileno()).st_ino
+        except FileNotFoundError:
+            return True
+
+    def _write(self, entry: Dict[str, Any], details: Dict[str, Any]):
+        """
+        파일 잠금 안에서 한 줄 추가 (잠그는 사이 교체되었으면 새 파일로 다시 시도)
+
+        형태 정보(details)는 실제로 쓸 파일이 정해진 뒤에 넣을지 결정하므로
+        교체 직후의 새 파일에도 형태별 첫 기록에 형태 문자열이 남습니다.
+        """
+        while True:
+            f = self._open()
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                if fcntl is not None and self._replaced():
+                    continue
+                line = entry
+                if entry["id"] not in self.seen_shapes:
+                    self.seen_shapes.add(entry["id"])
+                    line = dict(entry, **details)
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+                f.flush()
+                if os.fstat(f.fileno()).st_size > self.max_bytes:
+                    # 잠금을 쥔 채 교체하므로 다른 워커가 방금 만든 .1 파일을 덮어쓰지 않음
+                    os.replace(self.path, self.path.with_name(self.path.name + '.1'))
+                return
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def record(self, sql_query: str, duration_ms: float, row_count: int, success: bool,
+               plan: Optional[Dict[str, Any]] = None):
+        """
+        쿼리 실행 한 건 기록
+
+        Args:
+            sql_query: 실행된 SQL
+            duration_ms: 실행 시간 (밀리초)
+            row_count: 반환 행 수
+            success: 성공 여부
+            plan: 비용 게이트의 계획 요약 (있으면)
+        """
+        if not self.enabled:
+            return
+        shape = normalize_query(sql_query)
+        entry = {
+            "t": round(time.time(), 3),
+            "id": shape_id(shape),
+            "ms": round(duration_ms, 2),
+            "rows": row_count,
+            "ok": success
+        }
+        if plan:
+            entry["cost"] = round(plan["total_cost"], 1)
+            entry["scans"] = plan["scans"]
+
+        details = {"shape": shape}
+        wildcard = leading_wildcard_columns(sql_query)
+        if wildcard:
+            details["wildcard"] = wildcard
+        if self.samples:
+            details["sample"] = sql_query
+
+        try:
+            with self.lock:
+                self._write(entry, details)
+        except OSError:
+            # 기록 실패가 쿼리 실행을 막지 않도록 무시
+            pass
+
+
+_default_recorder: Optional[WorkloadRecorder] = None
+_default_lock = threading.Lock()
+
+
+def get_default_recorder() -> WorkloadRecorder:
+    """프로세스 전체에서 공유하는 워크로드 기록기"""
+    global _default_recorder
+    with _default_lock:
+        if _default_recorder is None:
+            _default_recorder = WorkloadRecorder()
+        return _default_recorder
@@ -0,0 +1,18 @@
+"""
+테스트 공통 설정
+프로젝트 루트를 경로에 추가하고, config.py가 없으면 config.example.py를 config로 불러옵니다.
+"""
+import importlib.util
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+try:
+    import config  # noqa: F401
+except ImportError:
+    spec = importlib.util.spec_from_file_location('config', ROOT / 'config.example.py')
+    config = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(config)
+    sys.modules['config'] = config
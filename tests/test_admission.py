@@ -0,0 +1,75 @@
+import threading
+import time
+
+import pytest
+
+from src.admission import AdmissionController, AdmissionRejected
+
+
+def test_limits_concurrent_queries():
+    controller = AdmissionController(max_concurrent=2, max_per_session=2, queue_timeout=5)
+    peak = []
+    lock = threading.Lock()
+    running = [0]
+
+    def query(session_id):
+        with controller.admit(session_id):
+            with lock:
+                running[0] += 1
+                peak.append(running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+
+    threads = [threading.Thread(target=query, args=(f"s{i % 3}",)) for i in range(9)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(peak) <= 2
+    stats = controller.stats()
+    assert stats["admitted"] == 9
+    assert stats["active"] == 0
+    assert stats["wait_p95_ms"] is not None
+
+
+def test_rejects_after_queue_timeout():
+    controller = AdmissionController(max_concurrent=1, max_per_session=1, queue_timeout=0.05)
+    with controller.admit('a'):
+        with pytest.raises(AdmissionRejected):
+            with controller.admit('b'):
+                pass
+    stats = controller.stats()
+    assert stats["rejected"] == 1
+    assert stats["waiting"] == 0
+
+
+def test_waiting_sessions_are_served_round_robin():
+    controller = AdmissionController(max_concurrent=1, max_per_session=1, queue_timeout=5)
+    order = []
+    release = threading.Event()
+
+    def hold():
+        with controller.admit('holder'):
+            release.wait(5)
+
+    def query(session_id, name):
+        with controller.admit(session_id):
+            order.append(name)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    while controller.stats()["active"] == 0:
+        time.sleep(0.001)
+    # 세션 a가 먼저 두 건을 줄 세워도 b가 사이에 끼어 들어감
+    waiters = []
+    for session_id, name in (('a', 'a1'), ('a', 'a2'), ('b', 'b1')):
+        thread = threading.Thread(target=query, args=(session_id, name))
+        thread.start()
+        waiters.append(thread)
+        while controller.stats()["waiting"] < len(waiters):
+            time.sleep(0.001)
+    release.set()
+    for thread in [holder] + waiters:
+        thread.join()
+    assert order == ['a1', 'b1', 'a2']
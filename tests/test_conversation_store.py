@@ -0,0 +1,47 @@
+import pytest
+
+from src.conversation_store import (FileConversationStore, SQLiteConversationStore, decode_conversation,
+                                    encode_conversation)
+
+PAYLOAD = {
+    "messages": [
+        {"role": "user", "content": [{"text": "User_1의 혈당을 분석해줘"}]},
+        {"role": "assistant", "content": [{"reasoningContent": {"redactedContent": b"\x00\xffsig"}}]},
+    ],
+    "state": {"usage": {"m": {"input_tokens": 10, "output_tokens": 2, "model_calls": 1, "cost_usd": 0.1}}}
+}
+
+
+def test_encode_decode_round_trip_keeps_bytes():
+    decoded = decode_conversation(encode_conversation(PAYLOAD))
+    assert decoded == PAYLOAD
+    assert isinstance(decoded["messages"][1]["content"][0]["reasoningContent"]["redactedContent"], bytes)
+
+
+@pytest.mark.parametrize("store_class", [FileConversationStore, SQLiteConversationStore])
+def test_save_bumps_version(tmp_path, store_class):
+    path = tmp_path / ('conversations.sqlite' if store_class is SQLiteConversationStore else 'conversations')
+    store = store_class(str(path))
+    assert store.load('session-1') is None
+    assert store.version('session-1') is None
+
+    first = store.save('session-1', PAYLOAD)
+    second = store.save('session-1', dict(PAYLOAD, state={}))
+    assert first != second
+    assert store.version('session-1') == second
+    version, payload = store.load('session-1')
+    assert version == second
+    assert payload["state"] == {}
+
+    assert store.delete('session-1')
+    assert store.load('session-1') is None
+    assert not store.delete('session-1')
+
+
+@pytest.mark.parametrize("session_id", ["../escape", "a/b", "a.b", ""])
+def test_file_store_rejects_bad_session_ids(tmp_path, session_id):
+    store = FileConversationStore(str(tmp_path))
+    with pytest.raises(ValueError):
+        store.save(session_id, PAYLOAD)
+    with pytest.raises(ValueError):
+        store.load(session_id)
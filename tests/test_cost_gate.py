@@ -0,0 +1,73 @@
+import re
+
+from src.cost_gate import CostGate, summarize_plan
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        self.conn.explained.append(sql)
+        self.sql = sql
+
+    def fetchone(self):
+        limit = re.search(r'LIMIT (\d+)\s*$', self.sql)
+        rows = int(limit.group(1)) if limit else self.conn.rows
+        return ([{"Plan": {"Node Type": "Seq Scan", "Relation Name": "tb_sensor_log",
+                           "Total Cost": rows * 10.0, "Plan Rows": rows}}],)
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+        self.explained = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+def test_summarize_plan_collects_scans():
+    plan = {"Node Type": "Hash Join", "Total Cost": 12.5, "Plan Rows": 3, "Plans": [
+        {"Node Type": "Seq Scan", "Relation Name": "tb_user_info"},
+        {"Node Type": "Index Scan", "Relation Name": "tb_glucose_msrmt", "Index Name": "ix_user"},
+    ]}
+    summary = summarize_plan(plan)
+    assert summary["total_cost"] == 12.5
+    assert sorted(summary["scans"]) == ["Index Scan on tb_glucose_msrmt using ix_user",
+                                        "Seq Scan on tb_user_info"]
+
+
+def test_allows_cheap_query():
+    gate = CostGate(max_cost=1000, max_rows=100)
+    decision = gate.check(FakeConnection(rows=10), "SELECT * FROM agent.tb_sensor_log LIMIT 10", True)
+    assert decision["action"] == "allow"
+
+
+def test_limits_or_rejects_expensive_query():
+    sql = "SELECT * FROM agent.tb_sensor_log"
+    limited = CostGate(max_cost=100000, max_rows=1000, action='limit', limit_rows=50)
+    decision = limited.check(FakeConnection(rows=1000000), sql, True)
+    assert decision["action"] == "limit"
+    assert decision["sql"].endswith("LIMIT 50")
+
+    rejected = CostGate(max_cost=100000, max_rows=1000, action='reject')
+    assert rejected.check(FakeConnection(rows=1000000), sql, True)["action"] == "reject"
+    # 감쌀 수 없는 쿼리는 limit 설정이어도 거절
+    assert limited.check(FakeConnection(rows=1000000), sql, False)["action"] == "reject"
+
+
+def test_cache_is_keyed_by_shape_including_limit():
+    gate = CostGate(max_cost=1000, max_rows=100)
+    conn = FakeConnection(rows=10)
+    gate.estimate(conn, "SELECT * FROM agent.tb_sensor_log WHERE user_uuid = 'a' LIMIT 10")
+    gate.estimate(conn, "SELECT * FROM agent.tb_sensor_log WHERE user_uuid = 'b' LIMIT 10")
+    gate.estimate(conn, "SELECT * FROM agent.tb_sensor_log WHERE user_uuid = 'b' LIMIT 5000000")
+    assert len(conn.explained) == 2
+    assert gate.stats()["hits"] == 1
@@ -0,0 +1,53 @@
+import numpy as np
+
+from src.glucose_forecast import (ALPHAS, DAY, HOUR, fit_exponential_smoothing, forecast_series, resample,
+                                  seasonal_profile)
+
+
+def test_resample_averages_each_bucket():
+    epochs = np.array([0, 600, 3000, 7300, 7400], dtype=np.float64)
+    values = np.array([100, 110, 120, 90, 70], dtype=np.float64)
+    starts, means = resample(epochs, values, HOUR)
+    assert starts.tolist() == [0, 2 * HOUR]
+    assert means.tolist() == [110.0, 80.0]
+
+
+def test_seasonal_profile_is_zero_with_less_than_two_periods():
+    starts = np.arange(30) * HOUR
+    means = 100 + 10 * np.sin(np.arange(30) * 2 * np.pi / 24)
+    assert not seasonal_profile(starts, means, HOUR, 24).any()
+
+
+def test_seasonal_profile_follows_time_of_day():
+    starts = np.arange(24 * 7) * HOUR
+    means = 100 + np.where(starts // HOUR % 24 == 8, 30.0, 0.0)
+    profile = seasonal_profile(starts, means, HOUR, 24)
+    assert int(np.argmax(profile)) == 8
+    assert abs(profile.sum()) < 1e-9
+
+
+def test_constant_series_has_no_error():
+    alpha, level, sigma = fit_exponential_smoothing(np.full(20, 120.0))
+    # 오차가 모두 0이면 첫 후보(가장 작은 alpha)를 선택
+    assert alpha == ALPHAS[0]
+    assert level == 120.0
+    assert sigma == 0.0
+
+
+def test_level_shift_prefers_large_alpha():
+    alpha, level, _ = fit_exponential_smoothing(np.array([100.0] * 10 + [160.0] * 10))
+    assert alpha == ALPHAS[-1]
+    assert abs(level - 160.0) < 1.0
+
+
+def test_forecast_interval_widens_with_horizon():
+    rng = np.random.default_rng(0)
+    starts = np.arange(14) * DAY
+    means = 120 + rng.normal(0, 10, size=14)
+    result = forecast_series(starts, means, DAY, 7, horizon=5)
+    forecast = result["forecast"]
+    assert len(forecast) == 5
+    widths = [point["upper_95"] - point["lower_95"] for point in forecast]
+    assert all(later >= earlier for earlier, later in zip(widths, widths[1:]))
+    assert widths[-1] > widths[0]
+    assert all(point["lower_80"] >= point["lower_95"] for point in forecast)
@@ -0,0 +1,22 @@
+from src.metrics import MetricsRegistry, percentile
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 0.50) == 51
+    assert percentile(values, 0.95) == 96
+    assert percentile(values, 1.0) == 100
+    assert percentile([], 0.95) is None
+
+
+def test_render_counter_and_histogram():
+    registry = MetricsRegistry(enabled=True, prefix='t_')
+    counter = registry.counter('queries_total', "쿼리 수", ('source',))
+    histogram = registry.histogram('latency_seconds', "지연", ('source',), buckets=(0.1, 1))
+    counter.inc(('pg"x',))
+    histogram.observe(0.5, ('pg',))
+    text = registry.render()
+    assert 't_queries_total{source="pg\\"x"} 1' in text
+    assert 't_latency_seconds_bucket{source="pg",le="0.1"} 0' in text
+    assert 't_latency_seconds_bucket{source="pg",le="+Inf"} 1' in text
+    assert registry.counter('queries_total', "쿼리 수", ('source',)) is counter
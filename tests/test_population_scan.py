@@ -0,0 +1,31 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("psycopg2")
+
+from src.population_scan import compute_metrics  # noqa: E402
+
+
+def test_metrics_per_user():
+    users = ["a"] * 4 + ["b"] * 3
+    values = np.array([60.0, 65.0, 100.0, 120.0, 150.0, 160.0, 100.0])
+    results = {r["user_uuid"]: r for r in compute_metrics(users, values, min_episode=2, low=70, high=140)}
+
+    assert results["a"]["readings"] == 4
+    assert results["a"]["mean_glucose"] == 86.2
+    assert results["a"]["hypo_episodes"] == 1
+    assert results["a"]["tir_pct"] == 50.0
+    assert results["b"]["hyper_episodes"] == 1
+    assert results["b"]["min_glucose"] == 100.0
+    assert 'hyper' in results["b"]["flags"]
+
+
+def test_episodes_do_not_cross_user_boundary():
+    users = ["a", "a", "b", "b"]
+    values = np.array([100.0, 60.0, 60.0, 100.0])
+    results = compute_metrics(users, values, min_episode=2, low=70, high=140)
+    assert [r["hypo_episodes"] for r in results] == [0, 0]
+
+
+def test_empty_input():
+    assert compute_metrics([], np.array([]), min_episode=1) == []
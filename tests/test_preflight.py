@@ -0,0 +1,49 @@
+import threading
+import time
+
+from src.preflight import Check, run_checks
+
+
+def _ok(timeout):
+    return {"ok": True}
+
+
+def _fail(timeout):
+    raise RuntimeError("down")
+
+
+def test_dependent_check_is_skipped_after_failure():
+    results = run_checks([
+        Check('db', 'DB', _fail, 1.0),
+        Check('schema', '스키마', _ok, 1.0, ('db',)),
+        Check('model', '모델', _ok, 1.0),
+    ], cache_path=None)
+    assert [r.status for r in results.values()] == ['fail', 'skipped', 'ok']
+
+
+def test_hung_check_times_out_without_blocking():
+    release = threading.Event()
+    start = time.monotonic()
+    results = run_checks([
+        Check('hang', '멈춤', lambda timeout: release.wait(10), 0.1),
+        Check('after', '후속', _ok, 1.0, ('hang',)),
+    ], cache_path=None)
+    release.set()
+    assert time.monotonic() - start < 2
+    assert results['hang'].status == 'timeout'
+    assert results['after'].status == 'skipped'
+
+
+def test_cached_success_is_reused(tmp_path):
+    cache_path = str(tmp_path / 'preflight.json')
+    calls = []
+
+    def counted(timeout):
+        calls.append(1)
+        return {}
+
+    checks = [Check('db', 'DB', counted, 1.0)]
+    run_checks(checks, cache_path=cache_path)
+    results = run_checks(checks, cache_path=cache_path)
+    assert len(calls) == 1
+    assert results['db'].cached
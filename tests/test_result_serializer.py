@@ -0,0 +1,26 @@
+import json
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from src.result_serializer import serialize_result
+
+
+def test_records_are_encoded_per_column():
+    payload = {"success": True, "data": [
+        {"t": datetime(2025, 12, 1, 9, 0, tzinfo=timezone(timedelta(hours=9))), "avg": Decimal("126.5"),
+         "n": Decimal("3")},
+        {"t": None, "avg": Decimal("98.25"), "n": Decimal("10")},
+    ]}
+    decoded = json.loads(serialize_result(payload, backend='json'))
+    assert decoded["data"] == [
+        {"t": "2025-12-01 09:00:00+09:00", "avg": 126.5, "n": 3},
+        {"t": None, "avg": 98.25, "n": 10},
+    ]
+
+
+def test_non_finite_numeric_becomes_null():
+    for backend in ('json', 'auto'):
+        payload = {"data": {"v": [Decimal("NaN"), Decimal("Infinity"), Decimal("1.5")]}}
+        text = serialize_result(payload, backend=backend)
+        assert "NaN" not in text and "Infinity" not in text
+        assert json.loads(text)["data"]["v"] == [None, None, 1.5]
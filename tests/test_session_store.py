@@ -0,0 +1,55 @@
+import gc
+from datetime import datetime
+
+from src.session_store import ExportFile, MessageStore
+
+
+def _message(i):
+    return {"role": "user", "content": f"질문 {i}", "timestamp": datetime(2025, 12, 1, 9, 0, i % 60)}
+
+
+def test_spills_old_messages_and_reads_them_back(tmp_path):
+    store = MessageStore(max_messages=3, spill_dir=str(tmp_path))
+    for i in range(10):
+        store.append(_message(i))
+    assert len(store) == 10
+    assert len(store.recent) == 3
+    assert [m["content"] for m in store.tail(5)] == [f"질문 {i}" for i in range(5, 10)]
+    assert store.tail(5)[0]["timestamp"] == datetime(2025, 12, 1, 9, 0, 5)
+
+
+def test_spill_directory_is_removed_with_store(tmp_path):
+    store = MessageStore(max_messages=1, spill_dir=str(tmp_path))
+    store.append(_message(0))
+    store.append(_message(1))
+    spill_dir = store.dir
+    assert spill_dir.exists()
+    del store
+    gc.collect()
+    assert not spill_dir.exists()
+
+
+def test_clear_removes_files(tmp_path):
+    store = MessageStore(max_messages=1, spill_dir=str(tmp_path))
+    store.append(_message(0))
+    store.append(_message(1))
+    store.clear()
+    assert len(store) == 0
+    assert not store.dir.exists()
+
+
+def test_export_file_is_removed_after_download_or_with_session(tmp_path):
+    path = tmp_path / "query_result.csv"
+    path.write_bytes(b"a,b\n1,2\n")
+    export_file = ExportFile(str(path), "query_result.csv", "text/csv", 1, 8)
+    with export_file.open() as f:
+        assert f.read() == b"a,b\n1,2\n"
+    export_file.remove()
+    export_file.remove()
+    assert not path.exists()
+
+    path.write_bytes(b"a\n")
+    export_file = ExportFile(str(path), "query_result.csv", "text/csv", 0, 2)
+    del export_file
+    gc.collect()
+    assert not path.exists()
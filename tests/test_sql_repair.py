@@ -0,0 +1,45 @@
+from src.sql_repair import repair_query
+
+JSON_ERROR = ('42883', 'operator does not exist: text ->> unknown')
+TABLE_ERROR = ('42P01', 'relation "tb_user_info" does not exist')
+DATE_ERROR = ('42883', 'operator does not exist: character >= date')
+
+
+def test_json_operator_is_replaced():
+    repair = repair_query(
+        "SELECT bs_rslt_cn->>'glucose' FROM agent.tb_glucose_msrmt", *JSON_ERROR
+    )
+    assert repair.sql == ("SELECT CAST(SUBSTRING(bs_rslt_cn FROM 'Glucose Level: ([0-9]+)') AS INTEGER) "
+                          "FROM agent.tb_glucose_msrmt")
+
+
+def test_schema_is_added_outside_literals_only():
+    repair = repair_query(
+        "SELECT 'from tb_user_info' AS note FROM tb_user_info -- join tb_sensor_log", *TABLE_ERROR
+    )
+    assert repair.sql == "SELECT 'from tb_user_info' AS note FROM agent.tb_user_info -- join tb_sensor_log"
+
+
+def test_ymd_compare_is_converted():
+    repair = repair_query(
+        "SELECT * FROM agent.tb_glucose_msrmt WHERE msrmt_ymd >= CURRENT_DATE - INTERVAL '7 days'",
+        *DATE_ERROR
+    )
+    assert repair.sql.endswith("msrmt_ymd >= TO_CHAR(CURRENT_DATE - INTERVAL '7 days', 'YYYYMMDD')")
+
+
+def test_ymd_date_literal_is_converted():
+    repair = repair_query(
+        "SELECT * FROM agent.tb_glucose_msrmt WHERE msrmt_ymd BETWEEN DATE '2025-01-01' AND DATE '2025-01-31'",
+        *DATE_ERROR
+    )
+    assert "BETWEEN TO_CHAR(DATE '2025-01-01', 'YYYYMMDD') AND TO_CHAR(DATE '2025-01-31', 'YYYYMMDD')" in repair.sql
+
+
+def test_literal_text_is_not_rewritten():
+    sql = "SELECT * FROM agent.tb_user_info WHERE flnm = 'msrmt_ymd >= current_date'"
+    assert repair_query(sql, *DATE_ERROR) is None
+
+
+def test_unrelated_error_is_not_repaired():
+    assert repair_query("SELECT 1", '42601', 'syntax error at or near "FORM"') is None
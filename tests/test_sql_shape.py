@@ -0,0 +1,57 @@
+from src.sql_shape import (canonical_query, leading_wildcard_columns, map_outside_literals, normalize_query,
+                           shape_id)
+
+
+def test_normalize_replaces_literals():
+    shape = normalize_query("SELECT * FROM agent.tb_user_info WHERE flnm LIKE '%User_1%' AND age > 30")
+    assert shape == "select * from agent.tb_user_info where flnm like ? and age > ?"
+
+
+def test_normalize_keeps_limit_and_offset():
+    small = normalize_query("SELECT * FROM t LIMIT 10 OFFSET 20")
+    large = normalize_query("SELECT * FROM t LIMIT 50000000")
+    assert small == "select * from t limit 10 offset 20"
+    assert small != large
+    assert normalize_query("SELECT * FROM t FETCH FIRST 5 ROWS ONLY").endswith("fetch first 5 rows only")
+
+
+def test_normalize_collapses_in_list():
+    assert normalize_query("SELECT 1 FROM t WHERE id IN (1, 2, 3)") == "select ? from t where id in (?)"
+
+
+def test_comment_markers_inside_literal():
+    shape = normalize_query("SELECT * FROM t WHERE note = 'a--b' AND id = 1 -- trailing")
+    assert shape == "select * from t where note = ? and id = ?"
+    assert normalize_query("SELECT '/* x */' FROM t /* hint */") == "select ? from t"
+
+
+def test_canonical_keeps_literals():
+    first = canonical_query("SELECT * FROM t WHERE note = 'a--b' AND id = 1")
+    second = canonical_query("SELECT * FROM t WHERE note = 'a--c' AND id = 2")
+    assert first == "select * from t where note = 'a--b' and id = 1"
+    assert first != second
+
+
+def test_canonical_ignores_layout_only():
+    first = canonical_query("SELECT *\n  FROM t  -- comment\n WHERE flnm = 'User  A';")
+    second = canonical_query("select * from t where flnm = 'User  A'")
+    assert first == second
+
+
+def test_map_outside_literals_skips_strings():
+    rewritten = map_outside_literals(
+        "SELECT 'from tb_x' FROM tb_x -- from tb_x",
+        lambda text: text.replace("FROM tb_x", "FROM agent.tb_x")
+    )
+    assert rewritten == "SELECT 'from tb_x' FROM agent.tb_x -- from tb_x"
+
+
+def test_shape_id_is_stable():
+    assert shape_id("select ?") == shape_id("select ?")
+    assert len(shape_id("select ?")) == 12
+
+
+def test_leading_wildcard_columns():
+    sql_query = ("SELECT * FROM agent.tb_user_info u WHERE u.flnm LIKE '%User_1%' "
+                 "AND eml_addr ILIKE 'kim%' AND note = '%x' -- flnm LIKE '%y'")
+    assert leading_wildcard_columns(sql_query) == ['flnm']
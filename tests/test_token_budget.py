@@ -0,0 +1,67 @@
+import json
+import warnings
+
+import pytest
+
+from src import token_budget
+from src.token_budget import (TurnBudget, add_usage, estimate_cost, model_price, session_budget_error,
+                              total_usage)
+
+
+class FakeMetrics:
+    def __init__(self, total_tokens=0):
+        self.accumulated_usage = {"totalTokens": total_tokens}
+
+
+class FakeAgent:
+    def __init__(self, total_tokens=0):
+        self.event_loop_metrics = FakeMetrics(total_tokens)
+
+
+def test_model_price_ignores_region_prefix():
+    assert model_price('us.anthropic.claude-3-haiku-20240307-v1:0') == (0.25, 1.25)
+    assert model_price('unknown-model') is None
+    assert estimate_cost('anthropic.claude-3-haiku-20240307-v1:0', 1_000_000, 0) == pytest.approx(0.25)
+
+
+def test_add_usage_accumulates_per_model():
+    totals = {}
+    add_usage(totals, 'anthropic.claude-3-haiku-20240307-v1:0', 1000, 100, 1)
+    add_usage(totals, 'anthropic.claude-3-haiku-20240307-v1:0', 1000, 100, 1)
+    summed = total_usage(totals)
+    assert summed["input_tokens"] == 2000
+    assert summed["model_calls"] == 2
+    assert summed["cost_usd"] > 0
+
+
+def test_unpriced_model_warns_once(monkeypatch):
+    monkeypatch.setattr(token_budget, '_unpriced_models', set())
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        add_usage({}, 'custom-model', 10, 10, 1)
+        add_usage({}, 'custom-model', 10, 10, 1)
+    assert len([w for w in caught if 'custom-model' in str(w.message)]) == 1
+
+
+def test_session_budget_error():
+    totals = add_usage({}, 'anthropic.claude-3-haiku-20240307-v1:0', 600, 500, 1)
+    assert session_budget_error(totals, token_budget=1000, cost_budget=0) is not None
+    assert session_budget_error(totals, token_budget=0, cost_budget=0) is None
+
+
+def test_turn_budget_check_and_limit():
+    budget = TurnBudget(start_tokens=100, max_tokens=1000, tool_output_max_tokens=8000)
+    assert budget.check(FakeAgent(500)) is None
+    # 남은 예산 600의 절반 = 300 -> 최소값 500 토큰
+    assert budget.output_limit(FakeAgent(500)) == 500 * token_budget.CHARS_PER_TOKEN
+    assert budget.check(FakeAgent(1100)) is not None
+
+
+def test_turn_budget_fit_trims_items():
+    budget = TurnBudget(start_tokens=0, max_tokens=0, tool_output_max_tokens=10)
+    payload = {"success": True, "data": [{"value": i} for i in range(100)]}
+    text = budget.fit(FakeAgent(), payload, json.dumps)
+    fitted = json.loads(text)
+    assert fitted["truncated"] is True
+    assert len(text) <= 10 * token_budget.CHARS_PER_TOKEN or fitted["returned_items"] == 0
+    assert budget.trimmed == 1
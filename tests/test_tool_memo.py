@@ -0,0 +1,28 @@
+import time
+
+from src.tool_memo import ToolCallMemo
+
+
+def test_lookup_returns_recorded_entry():
+    memo = ToolCallMemo(ttl=60)
+    memo.record("execute_sql", "select 1", "tool-1", "{}")
+    entry, in_history = memo.lookup("execute_sql", "select 1", [])
+    assert entry.tool_use_id == "tool-1"
+    assert in_history is False
+
+
+def test_entries_are_bounded_lru():
+    memo = ToolCallMemo(ttl=60, max_entries=2)
+    memo.record("execute_sql", "a", "tool-a", "{}")
+    memo.record("execute_sql", "b", "tool-b", "{}")
+    memo.lookup("execute_sql", "a", [])
+    memo.record("execute_sql", "c", "tool-c", "{}")
+    assert set(key for _, key in memo.entries) == {"a", "c"}
+
+
+def test_record_purges_expired_entries():
+    memo = ToolCallMemo(ttl=0.01)
+    memo.record("execute_sql", "a", "tool-a", "{}")
+    time.sleep(0.02)
+    memo.record("execute_sql", "b", "tool-b", "{}")
+    assert list(memo.entries) == [("execute_sql", "b")]
@@ -0,0 +1,43 @@
+import json
+import multiprocessing
+
+import pytest
+
+from src.usage_log import UsageRecorder, fcntl
+
+USAGE = {"m": {"input_tokens": 1, "output_tokens": 1, "model_calls": 1, "cost_usd": 0.0}}
+
+
+def _write_entries(path, max_bytes, worker, count):
+    recorder = UsageRecorder(path, enabled=True, max_bytes=max_bytes)
+    for i in range(count):
+        recorder.record(f"{worker}-{i}", "fast", USAGE, True)
+
+
+def _read_sessions(path):
+    sessions = []
+    for log_path in (path.with_name(path.name + '.1'), path):
+        if log_path.exists():
+            sessions += [json.loads(line)["session"] for line in log_path.read_text(encoding='utf-8').splitlines()]
+    return sessions
+
+
+def test_rotates_to_backup(tmp_path):
+    path = tmp_path / 'usage.jsonl'
+    _write_entries(path, 3000, 'a', 40)
+    sessions = _read_sessions(path)
+    assert path.with_name('usage.jsonl.1').exists()
+    assert sessions == [f"a-{i}" for i in range(40)]
+
+
+@pytest.mark.skipif(fcntl is None, reason="fcntl 필요")
+def test_workers_share_one_log_without_losing_entries(tmp_path):
+    path = tmp_path / 'usage.jsonl'
+    context = multiprocessing.get_context('fork')
+    # 전체 기록이 교체 한 번 분량보다 작으므로 .1과 현재 파일에 모두 남아야 함
+    workers = [context.Process(target=_write_entries, args=(path, 20000, name, 100)) for name in 'ab']
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert sorted(_read_sessions(path)) == sorted(f"{name}-{i}" for name in 'ab' for i in range(100))
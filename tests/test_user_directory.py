@@ -0,0 +1,32 @@
+from src.user_directory import NameIndex, trigrams
+
+
+def _index(*names):
+    index = NameIndex()
+    for i, name in enumerate(names):
+        index.add((f"uuid-{i}", name, 'F', 'Y'))
+    return index
+
+
+def test_trigrams():
+    assert trigrams("user") == {"use", "ser"}
+
+
+def test_exact_match_comes_first():
+    index = _index("User_10", "User_1", "User_11", "Other")
+    results = index.search("user_1", 10)
+    assert [r["flnm"] for r in results] == ["User_1", "User_10", "User_11"]
+    assert results[0]["match"] == 'exact'
+    assert results[1]["match"] == 'partial'
+
+
+def test_short_query_and_limit():
+    index = _index("Kim", "Kimberly", "Lee")
+    assert [r["flnm"] for r in index.search("ki", 1)] == ["Kim"]
+
+
+def test_readding_user_replaces_old_name():
+    index = _index("User_1")
+    index.add(("uuid-0", "Renamed", 'F', 'Y'))
+    assert index.search("User_1", 10) == []
+    assert index.search("renamed", 10)[0]["user_uuid"] == "uuid-0"
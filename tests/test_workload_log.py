@@ -0,0 +1,60 @@
+import json
+import multiprocessing
+
+import pytest
+
+from src.workload_log import WorkloadRecorder, fcntl
+
+USER_QUERY = "SELECT * FROM agent.tb_user_info WHERE user_uuid = '{}' AND flnm LIKE '%User_{}%'"
+
+
+def _write_entries(path, max_bytes, count, samples=False):
+    recorder = WorkloadRecorder(path, enabled=True, max_bytes=max_bytes, samples=samples)
+    for i in range(count):
+        recorder.record(USER_QUERY.format(f"uuid-{i}", i), 1.0, 1, True)
+
+
+def _read_entries(path):
+    entries = []
+    for log_path in (path.with_name(path.name + '.1'), path):
+        if log_path.exists():
+            entries += [json.loads(line) for line in log_path.read_text(encoding='utf-8').splitlines()]
+    return entries
+
+
+def test_records_shape_without_literals(tmp_path):
+    path = tmp_path / 'workload.jsonl'
+    _write_entries(path, 10 ** 6, 3)
+    entries = _read_entries(path)
+    assert len(entries) == 3
+    assert entries[0]["shape"] == "select * from agent.tb_user_info where user_uuid = ? and flnm like ?"
+    assert entries[0]["wildcard"] == ['flnm']
+    assert "uuid-0" not in path.read_text(encoding='utf-8')
+    assert all("shape" not in entry for entry in entries[1:])
+
+
+def test_samples_are_opt_in(tmp_path):
+    path = tmp_path / 'workload.jsonl'
+    _write_entries(path, 10 ** 6, 1, samples=True)
+    assert _read_entries(path)[0]["sample"] == USER_QUERY.format("uuid-0", 0)
+
+
+def test_new_file_starts_with_shape_after_rotation(tmp_path):
+    path = tmp_path / 'workload.jsonl'
+    _write_entries(path, 1000, 30)
+    current = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    assert path.with_name('workload.jsonl.1').exists()
+    assert "shape" in current[0]
+
+
+@pytest.mark.skipif(fcntl is None, reason="fcntl 필요")
+def test_workers_share_one_log_without_losing_entries(tmp_path):
+    path = tmp_path / 'workload.jsonl'
+    context = multiprocessing.get_context('fork')
+    # 전체 기록이 교체 한 번 분량보다 작으므로 .1과 현재 파일에 모두 남아야 함
+    workers = [context.Process(target=_write_entries, args=(path, 12000, 100)) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert len(_read_entries(path)) == 200